@@ -122,7 +122,8 @@ class BPMTool:
         return color_map.get(status, "#ffffff")
     
     def generate_svg(self) -> str:
-        svg_content = f'''
+        svg_parts = []
+        svg_parts.append(f'''
         <svg width="{int(self.canvas_width * self.zoom_level)}" height="{int(self.canvas_height * self.zoom_level)}" 
              viewBox="0 0 {self.canvas_width} {self.canvas_height}" 
              xmlns="http://www.w3.org/2000/svg"
@@ -134,11 +135,11 @@ class BPMTool:
                 <polygon points="0 0, 10 3.5, 0 7" fill="#666"/>
             </marker>
         </defs>
-        '''
+        ''')
         
         # Draw contexts
         for context in self.contexts.values():
-            svg_content += f'''
+            svg_parts.append(f'''
             <rect x="{context.x}" y="{context.y}" 
                   width="{context.width}" height="{context.height}"
                   fill="{context.color}" stroke="#333" stroke-width="2" rx="5"/>
@@ -146,38 +147,38 @@ class BPMTool:
                   font-family="Arial" font-size="14" font-weight="bold" fill="#333">
                 {context.name}
             </text>
-            '''
+            ''')
         
         # Draw connections
         for task in self.tasks.values():
             for successor_id in task.successors:
                 if successor_id in self.tasks:
                     successor = self.tasks[successor_id]
-                    svg_content += f'''
+                    svg_parts.append(f'''
                     <line x1="{task.x + 40}" y1="{task.y + 15}" 
                           x2="{successor.x}" y2="{successor.y + 15}"
                           stroke="#666" stroke-width="2" marker-end="url(#arrowhead)"/>
-                    '''
+                    ''')
         
         # Draw tasks
         for task in self.tasks.values():
             task_color = task.color if task.color != "#ffffff" else self.get_status_color(task.status)
-            svg_content += f'''
+            svg_parts.append(f'''
             <rect x="{task.x}" y="{task.y}" width="80" height="30"
                   fill="{task_color}" stroke="#333" stroke-width="1" rx="3"/>
             <text x="{task.x + 5}" y="{task.y + 20}" 
                   font-family="Arial" font-size="10" fill="#000">
                 {task.name[:8]}{'...' if len(task.name) > 8 else ''}
             </text>
-            '''
+            ''')
         
-        svg_content += f'''
+        svg_parts.append(f'''
         <text x="10" y="{self.canvas_height - 10}" 
               font-family="Arial" font-size="12" fill="#666">
             BPM Designer | Zoom: {self.zoom_level:.1f}x
         </text>
-        </svg>'''
-        return svg_content
+        </svg>''')
+        return ''.join(svg_parts)
 
 # Global instance
 bpm_tool = BPMTool()
@@ -0,0 +1,69 @@
+"""Time critical-path analysis on large generated workflows.
+
+Usage: python benchmarks/critical_path_benchmark.py [--tasks N] [--width N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from critical_path import compute_schedule, compute_schedule_condensed
+
+
+def layered_dag(tasks: int, width: int, fan_in: int = 3, back_edges: int = 0, seed: int = 0):
+    """CSR of a DAG with ``width`` tasks per layer, each fed by ``fan_in`` tasks of the previous layer.
+
+    ``back_edges`` edges from a layer to the one before it are added to close cycles.
+    """
+    rng = np.random.default_rng(seed)
+    targets = np.arange(width, tasks)
+    layer_start = (targets // width - 1) * width
+    sources = layer_start[:, None] + rng.integers(0, width, size=(len(targets), fan_in))
+    sources = sources.ravel()
+    targets = np.repeat(targets, fan_in)
+    if back_edges:
+        back_sources = rng.integers(width, tasks, back_edges)
+        back_targets = back_sources - width + rng.integers(0, 2, back_edges)
+        sources = np.concatenate([sources, back_sources])
+        targets = np.concatenate([targets, back_targets])
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(tasks + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=tasks), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100_000)
+    parser.add_argument('--width', type=int, default=100)
+    args = parser.parse_args()
+
+    durations = np.random.default_rng(1).uniform(1, 10, args.tasks)
+    shapes = (
+        ('chain', 1, 0),
+        (f'layered x{args.width}', args.width, 0),
+        ('wide', max(1, args.tasks // 10), 0),
+        # Legacy imports may contain cycles; these are condensed first
+        ('cyclic', args.width, args.tasks // 100),
+    )
+    print(f"{'shape':<16}{'edges':>10}{'build s':>10}{'schedule s':>12}{'makespan':>12}{'critical':>10}{'cycles':>8}")
+    for label, width, back_edges in shapes:
+        started = time.perf_counter()
+        indptr, indices = layered_dag(args.tasks, width, fan_in=1 if width == 1 else 3, back_edges=back_edges)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        if back_edges:
+            schedule, cycles = compute_schedule_condensed(indptr, indices, durations)
+        else:
+            schedule, cycles = compute_schedule(indptr, indices, durations), []
+        elapsed = time.perf_counter() - started
+        print(f"{label:<16}{len(indices):>10,}{built:>10.2f}{elapsed:>12.3f}"
+              f"{schedule.makespan:>12.1f}{int(schedule.critical.sum()):>10,}{len(cycles):>8,}")
+
+
+if __name__ == '__main__':
+    main()
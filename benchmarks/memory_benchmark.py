@@ -0,0 +1,84 @@
+"""Compare memory and file size of the dataclass BPMTool and the columnar store.
+
+Integer ids shrink the JSON and speed up the build, but barely change the
+retained memory of the dataclass model: most of each task's ~1.5 KB is its
+two edge index sets, its list copies of them and its spatial grid entries.
+``--breakdown`` lists where the retained memory of each backend goes.
+
+Usage: python benchmarks/memory_benchmark.py [--tasks N] [--contexts N] [--breakdown]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from columnar_store import ColumnarBPMTool
+from id_allocator import UUIDAllocator
+
+
+def build(tool, tasks: int, contexts: int, seed: int = 0):
+    rng = random.Random(seed)
+    statuses = list(TaskStatus)
+    context_ids = [tool.add_context(f"Context {i}", x=i * 400, y=50) for i in range(contexts)]
+    task_ids = []
+    for i in range(tasks):
+        task_ids.append(tool.add_task(f"Task {i}", context_ids[i % contexts],
+                                      x=(i % 100) * 120, y=(i // 100) * 60,
+                                      status=rng.choice(statuses)))
+    # A chain plus one random forward edge per task
+    for i in range(1, tasks):
+        tool.connect_tasks(task_ids[i - 1], task_ids[i])
+        tool.connect_tasks(task_ids[rng.randrange(i)], task_ids[i])
+    return tool
+
+
+def measure(factory, tasks: int, contexts: int, breakdown: bool = False):
+    tracemalloc.start()
+    started = time.perf_counter()
+    tool = build(factory(), tasks, contexts)
+    if isinstance(tool, ColumnarBPMTool):
+        tool.flush_edges()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    sources = tracemalloc.take_snapshot().statistics('lineno')[:8] if breakdown else []
+    tracemalloc.stop()
+    file_size = len(json.dumps(tool.to_dict(), separators=(',', ':')))
+    return current, peak, elapsed, file_size, sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200_000)
+    parser.add_argument('--contexts', type=int, default=100)
+    parser.add_argument('--breakdown', action='store_true', help="show the top allocation sites per backend")
+    args = parser.parse_args()
+
+    print(f"{args.tasks:,} tasks, {args.contexts} contexts, ~{2 * args.tasks:,} edges")
+    backends = (
+        ('dataclass/uuid', lambda: BPMTool(id_allocator=UUIDAllocator())),
+        ('dataclass/int', BPMTool),
+        ('columnar/int', ColumnarBPMTool),
+    )
+    print(f"{'backend':<16}{'retained MB':>14}{'peak MB':>12}{'bytes/task':>12}{'build s':>10}{'JSON MB':>10}")
+    breakdowns = []
+    for label, factory in backends:
+        current, peak, elapsed, file_size, sources = measure(factory, args.tasks, args.contexts, args.breakdown)
+        print(f"{label:<16}{current / 2**20:>14.1f}{peak / 2**20:>12.1f}"
+              f"{current / args.tasks:>12.0f}{elapsed:>10.2f}{file_size / 2**20:>10.1f}")
+        breakdowns.append((label, sources))
+    for label, sources in breakdowns:
+        if sources:
+            print(f"\n{label}: retained bytes/task by allocation site")
+            for stat in sources:
+                frame = stat.traceback[0]
+                print(f"  {stat.size / args.tasks:>8.0f}  {os.path.basename(frame.filename)}:{frame.lineno}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Per-instance dispatch overhead: the live model against a compiled ExecutionPlan.
+
+Usage: python benchmarks/plan_benchmark.py [--tasks N] [--width N] [--instances N]
+
+"dispatch" walks the graph the way a runner does (ready units, completions,
+in-degree updates) without executing anything; "run" is a full thread-pool
+run with no-op actions. The model rows rebuild their run state from the
+tool's dicts and update the tool's statuses; the plan rows only copy the
+in-degree vector.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from critical_path_benchmark import layered_dag
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from execution import RunState, ThreadPoolRunner
+
+
+def build_tool(tasks: int, width: int) -> BPMTool:
+    indptr, indices = layered_dag(tasks, width, fan_in=1 if width == 1 else 3)
+    tool = BPMTool()
+    with tool.batch():
+        context_id = tool.add_context("Benchmark", 0, 0)
+        ids = [tool.add_task(f"Task {i}", context_id, x=1, y=1) for i in range(tasks)]
+        for row in range(tasks):
+            for target in indices[indptr[row]:indptr[row + 1]].tolist():
+                tool.connect_tasks(ids[row], ids[target])
+    return tool
+
+
+def run_model(tool: BPMTool):
+    # Runs skip tasks that already succeeded, so each instance starts from DEFAULT
+    tool.set_task_statuses(dict.fromkeys(tool.tasks, TaskStatus.DEFAULT))
+    return ThreadPoolRunner(tool, max_workers=4).run()
+
+
+def drain(state) -> int:
+    """Complete every unit in dispatch order; returns how many ran."""
+    ready = list(state.ready)
+    count = 0
+    while ready:
+        unit = ready.pop()
+        ready.extend(state.complete(unit))
+        count += 1
+    return count
+
+
+def timed(label: str, instances: int, tasks: int, run):
+    started = time.perf_counter()
+    for _ in range(instances):
+        run()
+    elapsed = (time.perf_counter() - started) / instances
+    print(f"{label:<22}{elapsed * 1e3:>14.2f}{elapsed / tasks * 1e6:>14.2f}")
+    return elapsed
+
+
+class _Ready:
+    """Adapts a PlanInstance to the ``ready``/``complete`` shape used by drain."""
+
+    def __init__(self, instance):
+        self.ready = instance.ready()
+        self.complete = instance.complete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5_000)
+    parser.add_argument('--width', type=int, default=50)
+    parser.add_argument('--instances', type=int, default=20)
+    args = parser.parse_args()
+
+    tool = build_tool(args.tasks, args.width)
+    started = time.perf_counter()
+    plan = tool.compile()
+    print(f"compile: {(time.perf_counter() - started) * 1e3:.1f} ms for {len(plan):,} tasks, "
+          f"{len(plan.indices):,} edges\n")
+
+    print(f"{'per instance':<22}{'ms':>14}{'us / task':>14}")
+    model = timed("model dispatch", args.instances, args.tasks, lambda: drain(RunState(tool)))
+    compiled = timed("plan dispatch", args.instances, args.tasks, lambda: drain(_Ready(plan.start())))
+    model_run = timed("model run (threads)", max(1, args.instances // 4), args.tasks,
+                      lambda: run_model(tool))
+    plan_run = timed("plan run (threads)", max(1, args.instances // 4), args.tasks,
+                     lambda: plan.run(max_workers=4))
+    print(f"\ndispatch speedup x{model / compiled:.1f}, run speedup x{model_run / plan_run:.1f}")
+
+
+if __name__ == '__main__':
+    main()
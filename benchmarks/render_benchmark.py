@@ -0,0 +1,76 @@
+"""Canvas redraw time and size for views of a large workflow.
+
+Usage: python benchmarks/render_benchmark.py [--tasks N] [--repeat N]
+
+"first" renders every fragment in view (the first ``generate_svg`` of a
+view); "status" and "move" change one visible task and redraw, which
+re-renders only the fragments that changed. Only elements in view are
+rendered, and the overview collapses contexts to status histograms.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def grid_tool(tasks: int, columns: int = 100) -> BPMTool:
+    """Tasks on a grid, each connected to its right-hand neighbour."""
+    tool = BPMTool()
+    with tool.batch():
+        context_id = tool.add_context("Benchmark", 0, 0, width=columns * 150, height=(tasks // columns + 1) * 60)
+        ids = [tool.add_task(f"Task {i}", context_id, x=10 + i % columns * 150, y=40 + i // columns * 60)
+               for i in range(tasks)]
+        for i in range(tasks - 1):
+            if (i + 1) % columns:
+                tool.connect_tasks(ids[i], ids[i + 1])
+    return tool
+
+
+def timed(tool: BPMTool, repeat: int, edit) -> float:
+    elapsed = 0.0
+    for i in range(repeat):
+        edit(i)
+        started = time.perf_counter()
+        tool.generate_svg()
+        elapsed += time.perf_counter() - started
+    return elapsed / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tool = grid_tool(args.tasks)
+    x0, y0, x1, y1 = tool.bounds()
+    views = (
+        ("canvas", None, 1.0),
+        ("zoomed in", (3000, 3000), 2.0),
+        ("outline", (0, 0), 0.5),
+        ("overview", (x0, y0), min(tool.canvas_width / (x1 - x0), tool.canvas_height / (y1 - y0))),
+    )
+    print(f"{'view':<12}{'detail':>10}{'KB':>10}{'first ms':>10}{'status ms':>11}{'move ms':>10}")
+    for label, viewport, zoom in views:
+        tool.set_viewport(*(viewport or (None,)))
+        tool.zoom_level = zoom
+        first = timed(tool, 3, lambda i: tool._renderer.invalidate() if tool._renderer else None)
+        size = len(tool.generate_svg()) / 1e3
+        shown = tool.query_rect(*tool.visible_rect())[1] or list(tool.tasks)
+        statuses = (TaskStatus.RUNNING, TaskStatus.DEFAULT)
+        status = timed(tool, args.repeat, lambda i: tool.set_task_status(shown[i % len(shown)], statuses[i % 2]))
+        task = tool.tasks[shown[0]]
+        move = timed(tool, args.repeat, lambda i: tool.move_task(task.id, task.x + (-1) ** i, task.y))
+        print(f"{label:<12}{tool.detail_level():>10}{size:>10.1f}{first:>10.2f}{status:>11.2f}{move:>10.2f}")
+
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in tool.iter_svg(whole=True))
+    print(f"\nwhole diagram (iter_svg): {size / 1e6:.1f} MB in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Simulated makespan of each scheduling policy on sample and synthetic workflows.
+
+Usage: python benchmarks/scheduling_benchmark.py [--tasks N] [--width N] [--workers N ...]
+
+Each policy drives the same list scheduler the execution engines use;
+"bound" is the larger of the critical path and total work / workers, so
+a ratio of 1.00 is optimal.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from critical_path_benchmark import layered_dag
+from enhanced_bpm_tool import BPMTool
+from execution import RunState
+from scheduling import POLICIES, remaining_path, simulate_makespan, unit_durations
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_tool(seed: int = 0) -> BPMTool:
+    tool = BPMTool()
+    tool.load_from_file(os.path.join(ROOT, 'sample_workflow.json'))
+    rng = random.Random(seed)
+    for task_id, task in tool.tasks.items():
+        if task.duration is None:
+            tool.set_task_duration(task_id, rng.uniform(1, 10))
+    return tool
+
+
+def synthetic_tool(tasks: int, width: int, contexts: int = 8, seed: int = 0) -> BPMTool:
+    """A layered DAG with skewed durations, random user priorities and context weights."""
+    indptr, indices = layered_dag(tasks, width, fan_in=2, seed=seed)
+    rng = random.Random(seed)
+    tool = BPMTool()
+    with tool.batch():
+        context_ids = [tool.add_context(f"Context {i}", 0, 0) for i in range(contexts)]
+        for context_id in context_ids:
+            tool.set_context_weight(context_id, rng.choice((1.0, 2.0, 4.0)))
+        ids = [tool.add_task(f"Task {i}", context_ids[i % contexts], x=1, y=1,
+                             duration=rng.expovariate(0.2), priority=rng.randint(0, 3))
+               for i in range(tasks)]
+        for row in range(tasks):
+            for target in indices[indptr[row]:indptr[row + 1]].tolist():
+                tool.connect_tasks(ids[row], ids[target])
+    return tool
+
+
+def chains_tool(tasks: int, chains: int, seed: int = 0) -> BPMTool:
+    """Independent short tasks queued ahead of a few long chains: the case FIFO starves."""
+    rng = random.Random(seed)
+    tool = BPMTool()
+    with tool.batch():
+        context_id = tool.add_context("Batch", 0, 0)
+        chain_context = tool.add_context("Chains", 0, 0)
+        tool.set_context_weight(chain_context, 2.0)
+        for i in range(tasks // 2):
+            tool.add_task(f"Short {i}", context_id, x=1, y=1, duration=rng.uniform(0.5, 1.5))
+        length = max(1, tasks // 2 // chains)
+        for chain in range(chains):
+            previous = None
+            for i in range(length):
+                task_id = tool.add_task(f"Chain {chain}.{i}", chain_context, x=1, y=1,
+                                        duration=rng.uniform(0.5, 1.5), priority=1)
+                if previous is not None:
+                    tool.connect_tasks(previous, task_id)
+                previous = task_id
+    return tool
+
+
+def report(label: str, tool: BPMTool, workers: int):
+    state = RunState(tool)
+    durations = unit_durations(tool, state.units)
+    bound = max(max(remaining_path(state.successors, durations), default=0.0), sum(durations) / workers)
+    cells = []
+    for name, policy in POLICIES.items():
+        keys = policy.keys(tool, state.units, state.successors)
+        makespan = simulate_makespan(state.successors, durations, workers, keys)
+        cells.append(f"{makespan:>12.1f}{makespan / bound:>6.2f}")
+    print(f"{label:<24}{workers:>8}{bound:>10.1f}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20_000)
+    parser.add_argument('--width', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 32, 256])
+    args = parser.parse_args()
+
+    header = "".join(f"{name:>18}" for name in POLICIES)
+    print(f"{'workflow':<24}{'workers':>8}{'bound':>10}{header}")
+    sample = sample_tool()
+    for workers in args.workers:
+        report("sample_workflow.json", sample, workers)
+    started = time.perf_counter()
+    shapes = (
+        (f"layered x{args.width}", lambda: synthetic_tool(args.tasks, args.width)),
+        ("wide", lambda: synthetic_tool(args.tasks, max(1, args.tasks // 10))),
+        ("chains + short tasks", lambda: chains_tool(args.tasks, 8)),
+    )
+    for label, build in shapes:
+        tool = build()
+        for workers in args.workers:
+            report(label, tool, workers)
+    print(f"\n{time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Time Monte Carlo makespan simulation on a generated workflow.
+
+Usage: python benchmarks/simulation_benchmark.py [--tasks N] [--width N] [--trials N] [--workers N ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduling_benchmark import synthetic_tool
+from simulation import LogNormal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1_000)
+    parser.add_argument('--width', type=int, default=20)
+    parser.add_argument('--trials', type=int, default=10_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 4, 16])
+    args = parser.parse_args()
+
+    tool = synthetic_tool(args.tasks, args.width)
+    # Skewed durations around each task's estimate
+    distributions = {task_id: LogNormal(task.duration, 0.4) for task_id, task in tool.tasks.items()}
+    print(f"{'workers':>8}{'seconds':>10}{'p50':>10}{'p95':>10}{'p99':>10}  most critical")
+    for workers in args.workers:
+        started = time.perf_counter()
+        result = tool.simulate(args.trials, workers or None, distributions, seed=0)
+        elapsed = time.perf_counter() - started
+        p = result.percentiles((50, 95, 99))
+        critical = ", ".join(f"{tool.tasks[task_id].name} {share:.0%}" for task_id, share in result.most_critical(3))
+        print(f"{workers or 'all':>8}{elapsed:>10.2f}{p[50]:>10.1f}{p[95]:>10.1f}{p[99]:>10.1f}  {critical}")
+
+
+if __name__ == '__main__':
+    main()
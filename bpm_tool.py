@@ -113,15 +113,16 @@ class BPMTool:
         return color_map.get(status, "#ffffff")
     
     def generate_svg(self) -> str:
-        svg_content = f'''
+        svg_parts = []
+        svg_parts.append(f'''
         <svg width="{self.canvas_width * self.zoom_level}" height="{self.canvas_height * self.zoom_level}" 
              viewBox="0 0 {self.canvas_width} {self.canvas_height}" 
              xmlns="http://www.w3.org/2000/svg">
-        '''
+        ''')
         
         # Draw contexts (boxes)
         for context in self.contexts.values():
-            svg_content += f'''
+            svg_parts.append(f'''
             <rect x="{context.x}" y="{context.y}" 
                   width="{context.width}" height="{context.height}"
                   fill="{context.color}" stroke="#333" stroke-width="2" rx="5"/>
@@ -129,7 +130,7 @@ class BPMTool:
                   font-family="Arial" font-size="14" font-weight="bold" fill="#333">
                 {context.name}
             </text>
-            '''
+            ''')
         
         # Draw task connections (wires)
         for task in self.tasks.values():
@@ -137,36 +138,36 @@ class BPMTool:
                 if successor_id in self.tasks:
                     successor = self.tasks[successor_id]
                     # Draw arrow line
-                    svg_content += f'''
+                    svg_parts.append(f'''
                     <line x1="{task.x + 50}" y1="{task.y + 15}" 
                           x2="{successor.x}" y2="{successor.y + 15}"
                           stroke="#666" stroke-width="2" marker-end="url(#arrowhead)"/>
-                    '''
+                    ''')
         
         # Arrow marker definition
-        svg_content += '''
+        svg_parts.append('''
         <defs>
             <marker id="arrowhead" markerWidth="10" markerHeight="7" 
                     refX="9" refY="3.5" orient="auto">
                 <polygon points="0 0, 10 3.5, 0 7" fill="#666"/>
             </marker>
         </defs>
-        '''
+        ''')
         
         # Draw tasks
         for task in self.tasks.values():
             task_color = task.color if task.color != "#ffffff" else self.get_status_color(task.status)
-            svg_content += f'''
+            svg_parts.append(f'''
             <rect x="{task.x}" y="{task.y}" width="100" height="30"
                   fill="{task_color}" stroke="#333" stroke-width="1" rx="3"/>
             <text x="{task.x + 5}" y="{task.y + 20}" 
                   font-family="Arial" font-size="12" fill="#000">
                 {task.name[:12]}{'...' if len(task.name) > 12 else ''}
             </text>
-            '''
+            ''')
         
-        svg_content += '</svg>'
-        return svg_content
+        svg_parts.append('</svg>')
+        return ''.join(svg_parts)
     
     def save_to_file(self, filename: str):
         data = {
@@ -0,0 +1,331 @@
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from enhanced_bpm_tool import TaskStatus, Task, Context, BPMTool
+from id_allocator import ElementId, IntegerIdAllocator
+
+# Status codes stored in the int8 status column, in TaskStatus declaration order
+STATUS_CODES: List[TaskStatus] = list(TaskStatus)
+STATUS_INDEX: Dict[TaskStatus, int] = {status: code for code, status in enumerate(STATUS_CODES)}
+
+
+class StringTable:
+    """Interns repeated strings (names, colors) behind small integer codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ColumnarBPMTool:
+    """Struct-of-arrays task store with the BPMTool add/connect/to_dict API.
+
+    Task attributes live in NumPy columns indexed by a dense row number and
+    edges are kept as CSR arrays (``indptr``/``indices``). New edges collect in
+    a small pending buffer that is merged into the CSR arrays in bulk, so a
+    million-task workflow costs tens of bytes per task instead of a dataclass,
+    an enum reference and two Python lists each.
+    """
+
+    # Pending edges are merged once the buffer reaches this size (or half the CSR)
+    MIN_FLUSH_EDGES = 65536
+
+    def __init__(self, capacity: int = 1024, id_allocator=None):
+        self.id_allocator = id_allocator if id_allocator is not None else IntegerIdAllocator()
+        self.contexts: Dict[ElementId, Context] = {}
+        self.context_ids: List[ElementId] = []
+        self._context_rows: Dict[ElementId, int] = {}
+        self._context_task_counts: List[int] = []
+
+        self.task_ids: List[ElementId] = []
+        self._task_rows: Dict[ElementId, int] = {}
+        self.task_count = 0
+        self.names = StringTable()
+        self.colors = StringTable()
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.context_index = np.full(capacity, -1, dtype=np.int32)
+        self.name_index = np.zeros(capacity, dtype=np.int32)
+        self.color_index = np.zeros(capacity, dtype=np.int32)
+        self.duration = np.full(capacity, np.nan, dtype=np.float32)  # NaN = no estimate
+
+        # CSR successor arrays cover rows [0, len(indptr) - 1); later rows have no merged edges
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self._pending: Dict[int, Set[int]] = {}
+        self._pending_count = 0
+        self._reverse = None
+
+        self.zoom_level = 1.0
+        self.canvas_width = 1400
+        self.canvas_height = 900
+
+    def _grow(self, needed: int):
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        fill = {'context_index': -1, 'duration': np.nan}
+        for column in ('x', 'y', 'status', 'context_index', 'name_index', 'color_index', 'duration'):
+            old = getattr(self, column)
+            new = np.full(capacity, fill.get(column, 0), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def add_context(self, name: str, x: float = 100, y: float = 100,
+                    width: float = 350, height: float = 250, color: str = "#e6f3ff"):
+        return self._insert_context(self.id_allocator.allocate(), name, x, y, width, height, color)
+
+    def _insert_context(self, context_id: ElementId, name: str, x: float, y: float,
+                        width: float, height: float, color: str):
+        self.contexts[context_id] = Context(
+            id=context_id,
+            name=name,
+            x=x, y=y,
+            width=width, height=height,
+            color=color,
+            tasks=[]
+        )
+        self._context_rows[context_id] = len(self.context_ids)
+        self.context_ids.append(context_id)
+        self._context_task_counts.append(0)
+        return context_id
+
+    def add_task(self, name: str, context_id: ElementId, x: float = 0, y: float = 0,
+                 status: TaskStatus = TaskStatus.DEFAULT, color: str = "#ffffff",
+                 duration: Optional[float] = None):
+        task_id = self.id_allocator.allocate()
+        context_row = self._context_rows.get(context_id, -1)
+
+        # Auto-position task within context if coordinates are 0,0
+        if x == 0 and y == 0 and context_row >= 0:
+            context = self.contexts[context_id]
+            task_count = self._context_task_counts[context_row]
+            x = context.x + 20 + (task_count % 3) * 110
+            y = context.y + 50 + (task_count // 3) * 50
+
+        self._insert_task(task_id, name, context_row, x, y, status, color, duration)
+        return task_id
+
+    def _insert_task(self, task_id: ElementId, name: str, context_row: int, x: float, y: float,
+                     status: TaskStatus, color: str, duration: Optional[float] = None):
+        row = self.task_count
+        self._grow(row + 1)
+        self.x[row] = x
+        self.y[row] = y
+        self.status[row] = STATUS_INDEX[status]
+        self.context_index[row] = context_row
+        self.name_index[row] = self.names.intern(name)
+        self.color_index[row] = self.colors.intern(color)
+        self.duration[row] = np.nan if duration is None else duration
+        if context_row >= 0:
+            self._context_task_counts[context_row] += 1
+
+        self.task_ids.append(task_id)
+        self._task_rows[task_id] = row
+        self.task_count += 1
+
+    def _merged_successors(self, row: int) -> np.ndarray:
+        if row + 1 >= len(self.indptr):
+            return self.indices[:0]
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def _has_edge(self, source_row: int, target_row: int) -> bool:
+        if target_row in self._pending.get(source_row, ()):
+            return True
+        row = self._merged_successors(source_row)
+        position = np.searchsorted(row, target_row)
+        return position < len(row) and row[position] == target_row
+
+    def connect_tasks(self, source_id: ElementId, target_id: ElementId):
+        source_row = self._task_rows.get(source_id)
+        target_row = self._task_rows.get(target_id)
+        if source_row is None or target_row is None:
+            return False
+        if self._has_edge(source_row, target_row):
+            return False
+        self._pending.setdefault(source_row, set()).add(target_row)
+        self._pending_count += 1
+        self._reverse = None
+        if self._pending_count >= max(self.MIN_FLUSH_EDGES, len(self.indices) // 2):
+            self.flush_edges()
+        return True
+
+    def flush_edges(self):
+        """Merge pending edges into the CSR arrays (sorted by source, then target)."""
+        n = self.task_count
+        old_sources = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        if self._pending_count:
+            new_sources = np.fromiter(
+                (s for s, targets in self._pending.items() for _ in targets),
+                dtype=np.int32, count=self._pending_count)
+            new_targets = np.fromiter(
+                (t for targets in self._pending.values() for t in targets),
+                dtype=np.int32, count=self._pending_count)
+            sources = np.concatenate([old_sources, new_sources])
+            targets = np.concatenate([self.indices, new_targets])
+            order = np.lexsort((targets, sources))
+            sources = sources[order]
+            self.indices = targets[order]
+        else:
+            sources = old_sources
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=self.indptr[1:])
+        self._pending = {}
+        self._pending_count = 0
+
+    def csr(self):
+        """Return ``(indptr, indices)`` successor arrays covering every task row."""
+        if self._pending_count or len(self.indptr) != self.task_count + 1:
+            self.flush_edges()
+        return self.indptr, self.indices
+
+    def reverse_csr(self):
+        """Return ``(indptr, indices)`` predecessor arrays, cached until the next edge change."""
+        if self._reverse is None:
+            indptr, indices = self.csr()
+            sources = np.repeat(np.arange(self.task_count, dtype=np.int32), np.diff(indptr))
+            order = np.lexsort((sources, indices))
+            reverse_indptr = np.zeros(self.task_count + 1, dtype=np.int64)
+            np.cumsum(np.bincount(indices, minlength=self.task_count), out=reverse_indptr[1:])
+            self._reverse = (reverse_indptr, sources[order])
+        return self._reverse
+
+    def successors(self, task_id: ElementId) -> List[ElementId]:
+        indptr, indices = self.csr()
+        row = self._task_rows[task_id]
+        return [self.task_ids[r] for r in indices[indptr[row]:indptr[row + 1]]]
+
+    def predecessors(self, task_id: ElementId) -> List[ElementId]:
+        indptr, indices = self.reverse_csr()
+        row = self._task_rows[task_id]
+        return [self.task_ids[r] for r in indices[indptr[row]:indptr[row + 1]]]
+
+    def get_task(self, task_id: ElementId) -> Optional[Task]:
+        """Materialize a Task dataclass view of one row."""
+        row = self._task_rows.get(task_id)
+        if row is None:
+            return None
+        context_row = self.context_index[row]
+        return Task(
+            id=task_id,
+            name=self.names[self.name_index[row]],
+            x=float(self.x[row]),
+            y=float(self.y[row]),
+            status=STATUS_CODES[self.status[row]],
+            color=self.colors[self.color_index[row]],
+            context_id=self.context_ids[context_row] if context_row >= 0 else None,
+            successors=self.successors(task_id),
+            predecessors=self.predecessors(task_id),
+            duration=None if np.isnan(self.duration[row]) else float(self.duration[row])
+        )
+
+    def to_dict(self):
+        """Serialize in the BPMTool file format, writing every id in its external form."""
+        indptr, indices = self.csr()
+        reverse_indptr, reverse_indices = self.reverse_csr()
+        external = self.id_allocator.external
+        ids = [external(task_id) for task_id in self.task_ids]
+        context_ids = [external(context_id) for context_id in self.context_ids]
+        context_tasks: Dict[int, List[str]] = {row: [] for row in range(len(self.context_ids))}
+        tasks = {}
+        for row in range(self.task_count):
+            context_row = int(self.context_index[row])
+            if context_row >= 0:
+                context_tasks[context_row].append(ids[row])
+            tasks[ids[row]] = {
+                'id': ids[row],
+                'name': self.names[self.name_index[row]],
+                'x': float(self.x[row]),
+                'y': float(self.y[row]),
+                'status': STATUS_CODES[self.status[row]].value,
+                'color': self.colors[self.color_index[row]],
+                'context_id': context_ids[context_row] if context_row >= 0 else None,
+                'successors': [ids[r] for r in indices[indptr[row]:indptr[row + 1]]],
+                'predecessors': [ids[r] for r in reverse_indices[reverse_indptr[row]:reverse_indptr[row + 1]]]
+            }
+            if not np.isnan(self.duration[row]):
+                tasks[ids[row]]['duration'] = float(self.duration[row])
+        contexts = {}
+        for context_row, context_id in enumerate(self.context_ids):
+            context_data = self.contexts[context_id].to_dict()
+            context_data['id'] = context_ids[context_row]
+            context_data['tasks'] = context_tasks[context_row]
+            contexts[context_data['id']] = context_data
+        return {
+            'contexts': contexts,
+            'tasks': tasks,
+            'zoom_level': self.zoom_level,
+            'canvas_width': self.canvas_width,
+            'canvas_height': self.canvas_height
+        }
+
+    def load_dict(self, data: dict):
+        """Load a BPMTool-format dict into this (empty) store."""
+        register = self.id_allocator.register
+        lookup = self.id_allocator.lookup
+        task_items = data.get('tasks', {}).values()
+        self._grow(len(task_items))
+        for context_data in data.get('contexts', {}).values():
+            self._insert_context(register(context_data['id']), context_data['name'],
+                                 context_data['x'], context_data['y'],
+                                 context_data['width'], context_data['height'], context_data['color'])
+        for task_data in task_items:
+            context_id = lookup(task_data['context_id'])
+            self._insert_task(register(task_data['id']), task_data['name'],
+                              self._context_rows.get(context_id, -1),
+                              task_data['x'], task_data['y'],
+                              TaskStatus(task_data['status']), task_data['color'], task_data.get('duration'))
+        for task_data in task_items:
+            source_id = lookup(task_data['id'])
+            for successor_id in task_data['successors']:
+                self.connect_tasks(source_id, lookup(successor_id))
+        self.flush_edges()
+        self.zoom_level = data.get('zoom_level', 1.0)
+        self.canvas_width = data.get('canvas_width', 1400)
+        self.canvas_height = data.get('canvas_height', 900)
+
+    def to_bpm_tool(self) -> BPMTool:
+        """Convert to the dataclass-backed BPMTool (e.g. for editing in the UI)."""
+        tool = BPMTool(id_allocator=type(self.id_allocator)())
+        tool.load_dict(self.to_dict())
+        return tool
+
+    @classmethod
+    def from_bpm_tool(cls, tool: BPMTool) -> 'ColumnarBPMTool':
+        store = cls(capacity=max(len(tool.tasks), 1), id_allocator=type(tool.id_allocator)())
+        store.load_dict(tool.to_dict())
+        return store
+
+    def get_workflow_stats(self):
+        counts = np.bincount(self.status[:self.task_count], minlength=len(STATUS_CODES))
+        return {
+            'total_contexts': len(self.contexts),
+            'total_tasks': self.task_count,
+            'total_connections': len(self.indices) + self._pending_count,
+            'status_counts': {status.value: int(counts[code]) for code, status in enumerate(STATUS_CODES)}
+        }
+
+    def nbytes(self) -> int:
+        """Bytes held by the NumPy columns and CSR arrays."""
+        columns = (self.x, self.y, self.status, self.context_index, self.name_index,
+                   self.color_index, self.duration, self.indptr, self.indices)
+        return sum(column.nbytes for column in columns)
@@ -0,0 +1,262 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from id_allocator import ElementId
+from scc import tarjan
+from topological_order import CycleError
+
+# Duration used for tasks without an estimate
+DEFAULT_DURATION = 1.0
+# Relative tolerance when deciding that a task has zero slack
+SLACK_EPSILON = 1e-9
+
+
+@dataclass
+class Schedule:
+    """Earliest/latest start and finish times for tasks in CSR row order."""
+    earliest_start: np.ndarray
+    earliest_finish: np.ndarray
+    latest_start: np.ndarray
+    latest_finish: np.ndarray
+    slack: np.ndarray
+    makespan: float
+    critical: np.ndarray        # boolean mask of zero-slack rows
+    critical_chain: List[int]   # rows of one longest path, in order
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (source rows, target rows) of every CSR edge leaving ``rows``."""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return rows[:0], indices[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return np.repeat(rows, counts), indices[offsets]
+
+
+def topological_levels(indptr: np.ndarray, indices: np.ndarray,
+                       min_width: int = 32) -> Tuple[List[np.ndarray], List[int]]:
+    """Peel the DAG into levels of rows whose predecessors are all in earlier levels.
+
+    Returns ``(levels, tail)``. Once a level is narrower than ``min_width``
+    (a long thin chain), NumPy's per-call overhead would dominate, so the
+    remaining rows are ordered by a scalar Kahn pass and returned as
+    ``tail`` instead.
+    """
+    n = len(indptr) - 1
+    indegree = np.bincount(indices, minlength=n)
+    frontier = np.flatnonzero(indegree == 0)
+    levels: List[np.ndarray] = []
+    tail: List[int] = []
+    seen = 0
+    while len(frontier):
+        if len(frontier) < min_width:
+            tail = _scalar_order(frontier.tolist(), indegree.tolist(), indptr.tolist(), indices.tolist())
+            seen += len(tail)
+            break
+        levels.append(frontier)
+        seen += len(frontier)
+        _, targets = _gather(indptr, indices, frontier)
+        if len(targets) == 0:
+            break
+        np.subtract.at(indegree, targets, 1)
+        candidates = np.unique(targets)
+        frontier = candidates[indegree[candidates] == 0]
+    if seen != n:
+        raise CycleError("Workflow contains cycles; critical path needs a DAG", [])
+    return levels, tail
+
+
+def _scalar_order(ready: List[int], indegree: List[int], indptr: List[int], indices: List[int]) -> List[int]:
+    order = []
+    while ready:
+        row = ready.pop()
+        order.append(row)
+        for k in range(indptr[row], indptr[row + 1]):
+            target = indices[k]
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                ready.append(target)
+    return order
+
+
+def compute_schedule(indptr: np.ndarray, indices: np.ndarray, durations: np.ndarray) -> Schedule:
+    """Critical-path schedule of a DAG given as CSR successor arrays.
+
+    Works level by level: each level's outgoing edges are relaxed with one
+    vectorized ``np.maximum.at`` (forward pass) or ``np.minimum.at``
+    (backward pass), so the Python overhead is per level, not per task.
+    Narrow chains at the end fall back to a scalar pass.
+    """
+    n = len(indptr) - 1
+    durations = np.asarray(durations, dtype=np.float64)
+    levels, tail = topological_levels(indptr, indices)
+    if tail:
+        indptr_list, indices_list, duration_list = indptr.tolist(), indices.tolist(), durations.tolist()
+
+    earliest_start = np.zeros(n)
+    for level in levels:
+        sources, targets = _gather(indptr, indices, level)
+        if len(targets):
+            np.maximum.at(earliest_start, targets, earliest_start[sources] + durations[sources])
+    if tail:
+        start = earliest_start.tolist()
+        for row in tail:
+            finish = start[row] + duration_list[row]
+            for k in range(indptr_list[row], indptr_list[row + 1]):
+                target = indices_list[k]
+                if finish > start[target]:
+                    start[target] = finish
+        earliest_start = np.array(start)
+    earliest_finish = earliest_start + durations
+    makespan = float(earliest_finish.max()) if n else 0.0
+
+    latest_finish = np.full(n, makespan)
+    if tail:
+        finish = latest_finish.tolist()
+        for row in reversed(tail):
+            for k in range(indptr_list[row], indptr_list[row + 1]):
+                target = indices_list[k]
+                bound = finish[target] - duration_list[target]
+                if bound < finish[row]:
+                    finish[row] = bound
+        latest_finish = np.array(finish)
+    for level in reversed(levels):
+        sources, targets = _gather(indptr, indices, level)
+        if len(targets):
+            np.minimum.at(latest_finish, sources, latest_finish[targets] - durations[targets])
+    latest_start = latest_finish - durations
+    slack = latest_start - earliest_start
+    critical = slack <= SLACK_EPSILON * max(makespan, 1.0)
+
+    # Follow zero-slack edges whose times meet exactly, from a critical start task
+    chain: List[int] = []
+    starts = np.flatnonzero(critical & (earliest_start == 0))
+    if len(starts):
+        tolerance = SLACK_EPSILON * max(makespan, 1.0)
+        on_path = critical.tolist()
+        start, finish = earliest_start.tolist(), earliest_finish.tolist()
+        if not tail:
+            indptr_list, indices_list = indptr.tolist(), indices.tolist()
+        row = int(starts[0])
+        while row is not None:
+            chain.append(row)
+            next_row = None
+            for k in range(indptr_list[row], indptr_list[row + 1]):
+                target = indices_list[k]
+                if on_path[target] and abs(start[target] - finish[row]) <= tolerance:
+                    next_row = target
+                    break
+            row = next_row
+
+    return Schedule(earliest_start, earliest_finish, latest_start, latest_finish,
+                    slack, makespan, critical, chain)
+
+
+def condense_csr(indptr: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, int, np.ndarray, np.ndarray]:
+    """Collapse strongly connected components.
+
+    Returns ``(labels, count, indptr, indices)``: the component of each row
+    (numbered in topological order) and the CSR of the component DAG.
+    """
+    labels, count = tarjan(indptr, indices)
+    labels = np.asarray(labels, dtype=np.int64)
+    sources = labels[np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))]
+    targets = labels[indices]
+    keys = np.unique((sources * count + targets)[sources != targets])
+    component_indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // count, minlength=count), out=component_indptr[1:])
+    return labels, count, component_indptr, keys % count
+
+
+def compute_schedule_condensed(indptr: np.ndarray, indices: np.ndarray,
+                               durations: np.ndarray) -> Tuple[Schedule, List[List[int]]]:
+    """Like compute_schedule, but tolerates cycles.
+
+    Each cycle is treated as one step whose duration is the sum of its
+    members; members share that step's times. Returns ``(schedule, cycles)``
+    with each cycle as a list of rows.
+    """
+    try:
+        return compute_schedule(indptr, indices, durations), []
+    except CycleError:
+        pass
+    labels, count, component_indptr, component_indices = condense_csr(indptr, indices)
+    component_durations = np.bincount(labels, weights=np.asarray(durations, dtype=np.float64), minlength=count)
+    condensed = compute_schedule(component_indptr, component_indices, component_durations)
+    order = np.argsort(labels, kind='stable')
+    members = np.split(order, np.cumsum(np.bincount(labels, minlength=count))[:-1])
+    chain = [int(row) for component in condensed.critical_chain for row in members[component]]
+    schedule = Schedule(condensed.earliest_start[labels], condensed.earliest_finish[labels],
+                        condensed.latest_start[labels], condensed.latest_finish[labels],
+                        condensed.slack[labels], condensed.makespan, condensed.critical[labels], chain)
+    # Single-node components are only cycles when they have a self-loop
+    sources = np.repeat(np.arange(len(labels)), np.diff(indptr))
+    looped = set(sources[sources == indices].tolist())
+    cycles = [rows.tolist() for rows in members if len(rows) > 1 or int(rows[0]) in looped]
+    return schedule, cycles
+
+
+@dataclass
+class CriticalPath:
+    """Schedule of a BPMTool workflow keyed by task id."""
+    task_ids: List[ElementId]
+    schedule: Schedule
+    cycles: List[List[ElementId]] = field(default_factory=list)  # Condensed into single steps
+
+    @property
+    def makespan(self) -> float:
+        return self.schedule.makespan
+
+    @property
+    def critical_tasks(self) -> List[ElementId]:
+        return [self.task_ids[row] for row in np.flatnonzero(self.schedule.critical)]
+
+    @property
+    def critical_chain(self) -> List[ElementId]:
+        return [self.task_ids[row] for row in self.schedule.critical_chain]
+
+    def timing(self) -> Dict[ElementId, Dict[str, float]]:
+        s = self.schedule
+        return {
+            task_id: {
+                'earliest_start': float(s.earliest_start[row]),
+                'earliest_finish': float(s.earliest_finish[row]),
+                'latest_start': float(s.latest_start[row]),
+                'latest_finish': float(s.latest_finish[row]),
+                'slack': float(s.slack[row]),
+            }
+            for row, task_id in enumerate(self.task_ids)
+        }
+
+
+def workflow_csr(tool) -> Tuple[List[ElementId], np.ndarray, np.ndarray]:
+    """Return (task ids, indptr, indices) for a BPMTool's successor index."""
+    task_ids = list(tool.tasks)
+    rows = {task_id: row for row, task_id in enumerate(task_ids)}
+    counts = np.fromiter((len(tool.successor_index[t]) for t in task_ids), dtype=np.int64, count=len(task_ids))
+    indptr = np.zeros(len(task_ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.fromiter((rows[s] for t in task_ids for s in tool.successor_index[t]),
+                          dtype=np.int64, count=int(indptr[-1]))
+    return task_ids, indptr, indices
+
+
+def critical_path(tool) -> CriticalPath:
+    """Critical-path analysis of a BPMTool (or ColumnarBPMTool) using each task's ``duration``."""
+    if hasattr(tool, 'csr'):
+        # Columnar store: its CSR and duration column are used as-is
+        indptr, indices = tool.csr()
+        durations = tool.duration[:tool.task_count].astype(np.float64)
+        durations[np.isnan(durations)] = DEFAULT_DURATION
+        task_ids = list(tool.task_ids)
+    else:
+        task_ids, indptr, indices = workflow_csr(tool)
+        durations = np.fromiter(
+            (DEFAULT_DURATION if tool.tasks[t].duration is None else tool.tasks[t].duration for t in task_ids),
+            dtype=np.float64, count=len(task_ids))
+    schedule, cycles = compute_schedule_condensed(indptr, indices, durations)
+    return CriticalPath(task_ids, schedule, [[task_ids[row] for row in rows] for rows in cycles])
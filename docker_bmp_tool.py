@@ -1,355 +1,111 @@
 import gradio as gr
 import json
-import uuid
 import os
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
-from enum import Enum
+import queue
+import threading
+import time
+import event_bus
+from enhanced_bpm_tool import TaskStatus, Task, Context, BPMTool as EnhancedBPMTool
+from run_log import RunLog, replay_run_log
 
-class TaskStatus(Enum):
-    SUCCESS = "success"
-    FAILURE = "failure" 
-    SKIPPED = "skipped"
-    DELAYED = "delayed"
-    DEFAULT = "default"
-
-@dataclass
-class Task:
-    id: str
-    name: str
-    x: float
-    y: float
-    status: TaskStatus
-    color: str
-    context_id: str
-    successors: List[str]
-    predecessors: List[str]
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'x': self.x,
-            'y': self.y,
-            'status': self.status.value,
-            'color': self.color,
-            'context_id': self.context_id,
-            'successors': self.successors,
-            'predecessors': self.predecessors
-        }
-
-@dataclass
-class Context:
-    id: str
-    name: str
-    x: float
-    y: float
-    width: float
-    height: float
-    color: str
-    tasks: List[str]
+class BPMTool(EnhancedBPMTool):
+    """Enhanced BPM model that keeps its files in the Docker data volume."""
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'x': self.x,
-            'y': self.y,
-            'width': self.width,
-            'height': self.height,
-            'color': self.color,
-            'tasks': self.tasks
-        }
-
-class BPMTool:
-    def __init__(self):
-        self.contexts: Dict[str, Context] = {}
-        self.tasks: Dict[str, Task] = {}
-        self.zoom_level = 1.0
-        self.canvas_width = 1400
-        self.canvas_height = 900
+    def __init__(self, id_allocator=None):
+        super().__init__(id_allocator)
         self.data_dir = "/app/data"
+        self.canvas_label = " | Running in Docker 🐳"
         
         # Create data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
-        
-    def add_context(self, name: str, x: float = 100, y: float = 100, 
-                   width: float = 350, height: float = 250, color: str = "#e6f3ff"):
-        context_id = str(uuid.uuid4())
-        context = Context(
-            id=context_id,
-            name=name,
-            x=x, y=y,
-            width=width, height=height,
-            color=color,
-            tasks=[]
-        )
-        self.contexts[context_id] = context
-        return context_id
     
-    def add_task(self, name: str, context_id: str, x: float = 0, y: float = 0,
-                status: TaskStatus = TaskStatus.DEFAULT, color: str = "#ffffff"):
-        task_id = str(uuid.uuid4())
-        
-        # Auto-position task within context if coordinates are 0,0
-        if x == 0 and y == 0 and context_id in self.contexts:
-            context = self.contexts[context_id]
-            task_count = len(context.tasks)
-            x = context.x + 20 + (task_count % 3) * 110
-            y = context.y + 50 + (task_count // 3) * 50
-        
-        task = Task(
-            id=task_id,
-            name=name,
-            x=x, y=y,
-            status=status,
-            color=color,
-            context_id=context_id,
-            successors=[],
-            predecessors=[]
-        )
-        self.tasks[task_id] = task
-        if context_id in self.contexts:
-            self.contexts[context_id].tasks.append(task_id)
-        return task_id
-    
-    def connect_tasks(self, source_id: str, target_id: str):
-        if source_id in self.tasks and target_id in self.tasks:
-            if target_id not in self.tasks[source_id].successors:
-                self.tasks[source_id].successors.append(target_id)
-                self.tasks[target_id].predecessors.append(source_id)
-                return True
-        return False
+    def resolve_path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
     
-    def disconnect_tasks(self, source_id: str, target_id: str):
-        if source_id in self.tasks and target_id in self.tasks[source_id].successors:
-            self.tasks[source_id].successors.remove(target_id)
-            self.tasks[target_id].predecessors.remove(source_id)
-            return True
-        return False
-    
-    def delete_task(self, task_id: str):
-        if task_id in self.tasks:
-            task = self.tasks[task_id]
-            # Remove from context
-            if task.context_id in self.contexts:
-                self.contexts[task.context_id].tasks.remove(task_id)
-            
-            # Remove connections to this task
-            for other_task in self.tasks.values():
-                if task_id in other_task.successors:
-                    other_task.successors.remove(task_id)
-                if task_id in other_task.predecessors:
-                    other_task.predecessors.remove(task_id)
-            
-            # Delete the task
-            del self.tasks[task_id]
-            return True
-        return False
+    def save_to_file(self, filename: str):
+        result = super().save_to_file(filename)
+        if result.startswith("✅"):
+            result += " (Docker volume: /app/data)"
+        return result
     
-    def delete_context(self, context_id: str):
-        if context_id in self.contexts:
-            # Delete all tasks in this context
-            context = self.contexts[context_id]
-            for task_id in context.tasks.copy():
-                self.delete_task(task_id)
-            
-            # Delete the context
-            del self.contexts[context_id]
-            return True
-        return False
+    def export_svg(self, filename: str):
+        result = super().export_svg(filename)
+        if result.startswith("✅"):
+            result += " (Docker volume: /app/data)"
+        return result
     
-    def get_status_color(self, status: TaskStatus) -> str:
-        color_map = {
-            TaskStatus.SUCCESS: "#28a745",  # Green
-            TaskStatus.FAILURE: "#dc3545",  # Red
-            TaskStatus.SKIPPED: "#6c757d",  # Grey
-            TaskStatus.DELAYED: "#fd7e14",  # Orange
-            TaskStatus.DEFAULT: "#ffffff"   # White
-        }
-        return color_map.get(status, "#ffffff")
+    # Workflow snapshot and transition log of the current run, kept in the data volume
+    RUN_SNAPSHOT = "active_run.json"
+    RUN_LOG = "active_run.wal"
     
-    def generate_svg(self) -> str:
-        svg_content = f'''
-        <svg width="{self.canvas_width * self.zoom_level}" height="{self.canvas_height * self.zoom_level}" 
-             viewBox="0 0 {self.canvas_width} {self.canvas_height}" 
-             xmlns="http://www.w3.org/2000/svg"
-             style="border: 2px solid #ddd; background: #f9f9f9;">
-        
-        <!-- Grid pattern -->
-        <defs>
-            <pattern id="grid" width="20" height="20" patternUnits="userSpaceOnUse">
-                <path d="M 20 0 L 0 0 0 20" fill="none" stroke="#e0e0e0" stroke-width="1"/>
-            </pattern>
-            <marker id="arrowhead" markerWidth="10" markerHeight="7" 
-                    refX="9" refY="3.5" orient="auto">
-                <polygon points="0 0, 10 3.5, 0 7" fill="#666"/>
-            </marker>
-        </defs>
-        
-        <!-- Grid background -->
-        <rect width="100%" height="100%" fill="url(#grid)" />
-        '''
-        
-        # Draw contexts (boxes)
-        for context in self.contexts.values():
-            svg_content += f'''
-            <g class="context" data-id="{context.id}">
-                <rect x="{context.x}" y="{context.y}" 
-                      width="{context.width}" height="{context.height}"
-                      fill="{context.color}" stroke="#333" stroke-width="2" rx="8"
-                      style="filter: drop-shadow(2px 2px 4px rgba(0,0,0,0.1));"/>
-                <text x="{context.x + 15}" y="{context.y + 25}" 
-                      font-family="Arial, sans-serif" font-size="16" font-weight="bold" fill="#333">
-                    {context.name}
-                </text>
-                <text x="{context.x + 15}" y="{context.y + context.height - 10}" 
-                      font-family="Arial, sans-serif" font-size="10" fill="#666">
-                    {len(context.tasks)} task(s)
-                </text>
-            </g>
-            '''
-        
-        # Draw task connections (wires) first so they appear behind tasks
-        for task in self.tasks.values():
-            for successor_id in task.successors:
-                if successor_id in self.tasks:
-                    successor = self.tasks[successor_id]
-                    # Calculate connection points
-                    start_x = task.x + 100
-                    start_y = task.y + 20
-                    end_x = successor.x
-                    end_y = successor.y + 20
-                    
-                    # Create curved connection
-                    control_x = start_x + (end_x - start_x) / 2
-                    
-                    svg_content += f'''
-                    <g class="connection">
-                        <path d="M {start_x} {start_y} Q {control_x} {start_y} {end_x} {end_y}"
-                              stroke="#666" stroke-width="2" fill="none" 
-                              marker-end="url(#arrowhead)"
-                              style="filter: drop-shadow(1px 1px 2px rgba(0,0,0,0.1));"/>
-                    </g>
-                    '''
-        
-        # Draw tasks
-        for task in self.tasks.values():
-            task_color = task.color if task.color != "#ffffff" else self.get_status_color(task.status)
-            text_color = "#000" if task.status != TaskStatus.FAILURE else "#fff"
-            
-            svg_content += f'''
-            <g class="task" data-id="{task.id}">
-                <rect x="{task.x}" y="{task.y}" width="100" height="40"
-                      fill="{task_color}" stroke="#333" stroke-width="1.5" rx="5"
-                      style="filter: drop-shadow(1px 1px 3px rgba(0,0,0,0.2)); cursor: pointer;"/>
-                <text x="{task.x + 50}" y="{task.y + 15}" 
-                      font-family="Arial, sans-serif" font-size="11" font-weight="bold" 
-                      fill="{text_color}" text-anchor="middle">
-                    {task.name[:10]}{'...' if len(task.name) > 10 else ''}
-                </text>
-                <text x="{task.x + 50}" y="{task.y + 30}" 
-                      font-family="Arial, sans-serif" font-size="9" 
-                      fill="{text_color}" text-anchor="middle">
-                    {task.status.value.title()}
-                </text>
-            </g>
-            '''
-        
-        # Add zoom level indicator
-        svg_content += f'''
-        <text x="10" y="{self.canvas_height - 10}" 
-              font-family="Arial, sans-serif" font-size="12" fill="#666">
-            Zoom: {self.zoom_level:.1f}x | Running in Docker 🐳
-        </text>
-        '''
+    def run(self, max_workers=None, actions=None, engine="threads", **options):
+        """Run the workflow with every task transition written ahead to data_dir.
         
-        svg_content += '</svg>'
-        return svg_content
+        If the container stops mid-run, resume_run() picks up where it left off.
+        """
+        snapshot = self.resolve_path(self.RUN_SNAPSHOT)
+        with open(snapshot + ".tmp", 'w') as f:
+            json.dump(self.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(snapshot + ".tmp", snapshot)
+        log = RunLog(self.resolve_path(self.RUN_LOG), truncate=True)
+        log.append({'type': 'begin', 'engine': engine, 'max_workers': max_workers, 'time': time.time()})
+        log.flush()
+        return self._run_logged(log, max_workers, actions, engine, **options)
     
-    def save_to_file(self, filename: str):
+    def _run_logged(self, log: RunLog, max_workers, actions, engine, **options):
         try:
-            filepath = os.path.join(self.data_dir, filename)
-            data = {
-                'contexts': {k: v.to_dict() for k, v in self.contexts.items()},
-                'tasks': {k: v.to_dict() for k, v in self.tasks.items()},
-                'zoom_level': self.zoom_level,
-                'canvas_width': self.canvas_width,
-                'canvas_height': self.canvas_height
-            }
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-            return f"✅ Configuration saved to {filename} (Docker volume: /app/data)"
-        except Exception as e:
-            return f"❌ Error saving file: {str(e)}"
+            result = super().run(max_workers, actions, engine, log=log, **options)
+            log.append({'type': 'end', 'summary': result.summary(), 'time': time.time()})
+            return result
+        finally:
+            log.close()
     
-    def load_from_file(self, filename: str):
-        try:
-            filepath = os.path.join(self.data_dir, filename)
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-            
-            self.contexts = {}
-            self.tasks = {}
-            
-            # Load contexts
-            for context_data in data.get('contexts', {}).values():
-                context = Context(
-                    id=context_data['id'],
-                    name=context_data['name'],
-                    x=context_data['x'],
-                    y=context_data['y'],
-                    width=context_data['width'],
-                    height=context_data['height'],
-                    color=context_data['color'],
-                    tasks=context_data['tasks']
-                )
-                self.contexts[context.id] = context
-            
-            # Load tasks
-            for task_data in data.get('tasks', {}).values():
-                task = Task(
-                    id=task_data['id'],
-                    name=task_data['name'],
-                    x=task_data['x'],
-                    y=task_data['y'],
-                    status=TaskStatus(task_data['status']),
-                    color=task_data['color'],
-                    context_id=task_data['context_id'],
-                    successors=task_data['successors'],
-                    predecessors=task_data.get('predecessors', [])
-                )
-                self.tasks[task.id] = task
-            
-            self.zoom_level = data.get('zoom_level', 1.0)
-            self.canvas_width = data.get('canvas_width', 1400)
-            self.canvas_height = data.get('canvas_height', 900)
-            
-            return f"✅ Configuration loaded from {filename}"
-        except FileNotFoundError:
-            return f"❌ File not found: {filename}"
-        except Exception as e:
-            return f"❌ Error loading file: {str(e)}"
+    def interrupted_run(self):
+        """The log of a run that never finished (e.g. the container restarted), or None."""
+        if not os.path.exists(self.resolve_path(self.RUN_SNAPSHOT)):
+            return None
+        return replay_run_log(self.resolve_path(self.RUN_LOG))
     
-    def get_workflow_stats(self):
-        total_tasks = len(self.tasks)
-        total_contexts = len(self.contexts)
-        
-        status_counts = {}
-        for status in TaskStatus:
-            status_counts[status.value] = sum(1 for task in self.tasks.values() if task.status == status)
-        
-        total_connections = sum(len(task.successors) for task in self.tasks.values())
+    def resume_run(self, run=None, actions=None, **options):
+        """Reload an interrupted run, keep its SUCCESS tasks and run only the rest."""
+        run = self.load_interrupted_run(run)
+        if run is None:
+            return None
+        return self.continue_run(run, actions, **options)
+    
+    def load_interrupted_run(self, run=None):
+        """Load the snapshot of an interrupted run with its logged successes applied.
         
-        return {
-            'total_contexts': total_contexts,
-            'total_tasks': total_tasks,
-            'total_connections': total_connections,
-            'status_counts': status_counts
-        }
+        Returns the run (see interrupted_run), or None if there is nothing to resume.
+        """
+        run = run or self.interrupted_run()
+        if run is None:
+            return None
+        with open(self.resolve_path(self.RUN_SNAPSHOT), 'r') as f:
+            data = json.load(f)
+        # Apply the logged results to the snapshot before loading it, in one pass
+        tasks = data.get('tasks', {})
+        for task_id, status in run['statuses'].items():
+            if status == TaskStatus.SUCCESS.value and task_id in tasks:
+                tasks[task_id]['status'] = status
+                tasks[task_id].pop('own_status', None)
+        self.load_dict(data)
+        return run
+    
+    def continue_run(self, run, actions=None, **options):
+        """Run the rest of a run loaded with load_interrupted_run, logging to the same WAL."""
+        log = RunLog(self.resolve_path(self.RUN_LOG))
+        log.append({'type': 'resume', 'time': time.time()})
+        options.setdefault('max_workers', run.get('max_workers'))
+        options.setdefault('engine', run.get('engine', 'threads'))
+        return self._run_logged(log, actions=actions, **options)
 
 # Global BPM tool instance
 bpm_tool = BPMTool()
+# Held while a run (started from the UI or resumed at startup) is in progress
+run_lock = threading.Lock()
 
 def create_gradio_interface():
     with gr.Blocks(
@@ -470,6 +226,16 @@ def create_gradio_interface():
                         zoom_fit_btn = gr.Button("📐 Fit to Screen")
                         zoom_reset_btn = gr.Button("🔄 Reset Zoom")
                 
+                # Workflow Execution
+                with gr.Group():
+                    gr.Markdown("### 🚀 Execution")
+                    gr.HTML("<small>Runs are logged to /app/data and resume after a restart</small>")
+                    with gr.Row():
+                        run_engine = gr.Dropdown(label="Engine", choices=["threads", "asyncio", "processes"], value="threads")
+                        max_workers = gr.Number(label="Max Workers", value=8, precision=0)
+                    run_btn = gr.Button("▶️ Run Workflow", variant="primary")
+                    run_status = gr.Textbox(label="Run Result", interactive=False)
+                
                 # File Operations
                 with gr.Group():
                     gr.Markdown("### 💾 File Operations")
@@ -478,6 +244,7 @@ def create_gradio_interface():
                     with gr.Row():
                         save_btn = gr.Button("💾 Save", variant="primary")
                         load_btn = gr.Button("📂 Load", variant="secondary")
+                        export_btn = gr.Button("🖼️ Export SVG", variant="secondary")
                         clear_btn = gr.Button("🗑️ Clear All", variant="stop")
                     file_status = gr.Textbox(label="Status", interactive=False)
             
@@ -505,7 +272,8 @@ def create_gradio_interface():
                 'failure': '#dc3545', 
                 'skipped': '#6c757d',
                 'delayed': '#fd7e14',
-                'default': '#ffffff'
+                'default': '#ffffff',
+                'running': '#0d6efd'
             }
             
             for status, count in stats['status_counts'].items():
@@ -583,15 +351,60 @@ def create_gradio_interface():
                 return "❌ Please enter a filename"
             return bpm_tool.save_to_file(filename.strip())
         
+        def export_handler(filename):
+            if not filename.strip():
+                return "❌ Please enter a filename"
+            return bpm_tool.export_svg(os.path.splitext(filename.strip())[0] + ".svg")
+        
         def load_handler(filename):
             if not filename.strip():
                 return "❌ Please enter a filename", gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update()
             status = bpm_tool.load_from_file(filename.strip())
             return (status, update_canvas(), update_stats(), *update_dropdowns())
         
+        def run_handler(engine, workers):
+            if not run_lock.acquire(blocking=False):
+                yield "⏳ A run is already in progress", update_canvas(), update_stats()
+                return
+            # Run in the background and redraw once per batch of coalesced status events
+            refreshes = queue.Queue()
+            subscription = bpm_tool.subscribe(refreshes.put, kinds=[event_bus.TASK_STATUS], window=0.25)
+            outcome = {}
+            
+            def work():
+                try:
+                    outcome['result'] = bpm_tool.run(max_workers=int(workers) if workers else None, engine=engine)
+                except Exception as e:
+                    outcome['error'] = e
+                finally:
+                    run_lock.release()
+                    refreshes.put(None)
+            
+            threading.Thread(target=work, daemon=True).start()
+            try:
+                while True:
+                    finished = refreshes.get() is None
+                    # Skip deliveries that queued up while the last frame was drawn
+                    while not finished and not refreshes.empty():
+                        finished = refreshes.get_nowait() is None
+                    if finished:
+                        break
+                    counts = bpm_tool.status_counts
+                    yield (f"⏳ Running: {counts[TaskStatus.RUNNING]} running, {counts[TaskStatus.SUCCESS]} succeeded",
+                           update_canvas(), update_stats())
+            finally:
+                subscription.close()
+            if 'error' in outcome:
+                yield f"❌ Run failed: {outcome['error']}", update_canvas(), update_stats()
+                return
+            result = outcome['result']
+            status = f"{'✅' if result.ok else '❌'} {result.summary()}"
+            for task_id, error in list(result.errors.items())[:3]:
+                status += f"\n{bpm_tool.tasks[task_id].name}: {error}"
+            yield status, update_canvas(), update_stats()
+        
         def clear_all_handler():
-            bpm_tool.contexts.clear()
-            bpm_tool.tasks.clear()
+            bpm_tool.clear()
             return (update_canvas(), update_stats(), *update_dropdowns())
         
         # Bind all event handlers
@@ -605,7 +418,9 @@ def create_gradio_interface():
         zoom_fit_btn.click(zoom_fit_handler, outputs=[canvas, zoom_slider])
         zoom_reset_btn.click(zoom_reset_handler, outputs=[canvas, zoom_slider])
         save_btn.click(save_handler, inputs=[filename], outputs=[file_status])
+        export_btn.click(export_handler, inputs=[filename], outputs=[file_status])
         load_btn.click(load_handler, inputs=[filename], outputs=[file_status, canvas, stats_display, task_context, context_list, task_list, source_task, target_task])
+        run_btn.click(run_handler, inputs=[run_engine, max_workers], outputs=[run_status, canvas, stats_display])
         clear_btn.click(clear_all_handler, outputs=[canvas, stats_display, task_context, context_list, task_list, source_task, target_task])
         
         # Initialize display
@@ -613,13 +428,8 @@ def create_gradio_interface():
     
     return demo
 
-if __name__ == "__main__":
-    # Initialize with sample data for Docker demo
-    print("🐳 Starting BPM Workflow Designer in Docker...")
-    print(f"📁 Data directory: {bpm_tool.data_dir}")
-    print("🌐 Server will be available on port 80")
-    
-    # Create sample workflow
+def create_sample_workflow():
+    """Populate the tool with the Docker demo workflow."""
     ctx1_id = bpm_tool.add_context("Docker Processing", 50, 50, color="#e6f3ff")
     ctx2_id = bpm_tool.add_context("Container QA", 450, 50, color="#fff2e6")
     ctx3_id = bpm_tool.add_context("Deployment", 850, 50, color="#f0fff0")
@@ -640,6 +450,28 @@ if __name__ == "__main__":
     bpm_tool.connect_tasks(task3_id, task4_id)
     bpm_tool.connect_tasks(task4_id, task5_id)
     bpm_tool.connect_tasks(task5_id, task6_id)
+
+if __name__ == "__main__":
+    # Initialize with sample data for Docker demo
+    print("🐳 Starting BPM Workflow Designer in Docker...")
+    print(f"📁 Data directory: {bpm_tool.data_dir}")
+    print("🌐 Server will be available on port 80")
+    
+    # Load the interrupted run before the UI exists; only its tasks run in the background
+    interrupted = bpm_tool.load_interrupted_run()
+    if interrupted is not None:
+        print("🔁 Resuming interrupted workflow run from the write-ahead log")
+        run_lock.acquire()
+        
+        def finish_interrupted_run():
+            try:
+                bpm_tool.continue_run(interrupted)
+            finally:
+                run_lock.release()
+        
+        threading.Thread(target=finish_interrupted_run, daemon=True).start()
+    else:
+        create_sample_workflow()
     
     # Launch with Docker-optimized settings
     demo = create_gradio_interface()
@@ -1,9 +1,25 @@
 import gradio as gr
+import heapq
+import itertools
 import json
-import uuid
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
+import os
+import queue
+import random
+import threading
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional, Iterable, Iterator, Union
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
+from id_allocator import ElementId, IntegerIdAllocator
+from spatial_index import Box, SpatialGrid
+from operation_log import OperationLog
+from topological_order import CycleError, DynamicTopologicalOrder
+from reachability import ReachabilityIndex
+from scc import Condensation, condense
+import event_bus
+from svg_renderer import FULL, OUTLINE, SUMMARY, SvgRenderer, iter_svg
 
 class TaskStatus(Enum):
     SUCCESS = "success"
@@ -11,21 +27,47 @@ class TaskStatus(Enum):
     SKIPPED = "skipped"
     DELAYED = "delayed"
     DEFAULT = "default"
+    RUNNING = "running"
 
-@dataclass
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often a failing task is retried and how long it waits in between.
+    
+    The n-th retry waits ``backoff * multiplier ** (n - 1)`` seconds (at most
+    ``max_delay``), scaled by a random factor in ``1 ± jitter`` so that tasks
+    failing together do not all retry in the same instant.
+    """
+    max_attempts: int = 3  # Including the first run
+    backoff: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 300.0
+    jitter: float = 0.1
+    
+    def delay(self, failures: int) -> float:
+        """Seconds to wait after the task failed ``failures`` times."""
+        base = min(self.max_delay, self.backoff * self.multiplier ** (failures - 1))
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+@dataclass(slots=True)
 class Task:
-    id: str
+    id: ElementId
     name: str
     x: float
     y: float
     status: TaskStatus
     color: str
-    context_id: str
-    successors: List[str]
-    predecessors: List[str]
+    context_id: ElementId
+    successors: List[ElementId]
+    predecessors: List[ElementId]
+    duration: Optional[float] = None  # Estimate used by critical-path analysis
+    own_status: Optional[TaskStatus] = None  # Status set by hand while `status` shows a propagated one
+    # What running the task does: a callable, a "module:function" entry point or a shell command
+    action: Optional[Union[str, Callable[['Task'], Any]]] = None
+    retry: Optional[RetryPolicy] = None  # None: a failure is final
+    priority: float = 0  # Higher runs first under the "priority" scheduling policy
     
     def to_dict(self):
-        return {
+        data = {
             'id': self.id,
             'name': self.name,
             'x': self.x,
@@ -36,20 +78,34 @@ class Task:
             'successors': self.successors,
             'predecessors': self.predecessors
         }
+        if self.duration is not None:
+            data['duration'] = self.duration
+        if self.own_status is not None:
+            data['own_status'] = self.own_status.value
+        # Callables only live for the session
+        if isinstance(self.action, str):
+            data['action'] = self.action
+        if self.retry is not None:
+            data['retry'] = asdict(self.retry)
+        if self.priority:
+            data['priority'] = self.priority
+        return data
 
-@dataclass
+@dataclass(slots=True)
 class Context:
-    id: str
+    id: ElementId
     name: str
     x: float
     y: float
     width: float
     height: float
     color: str
-    tasks: List[str]
+    tasks: List[ElementId]
+    concurrency: Optional[int] = None  # Max tasks of this context running at once (asyncio engine)
+    weight: float = 1.0  # Higher runs first under the "context" scheduling policy
     
     def to_dict(self):
-        return {
+        data = {
             'id': self.id,
             'name': self.name,
             'x': self.x,
@@ -59,19 +115,79 @@ class Context:
             'color': self.color,
             'tasks': self.tasks
         }
+        if self.concurrency is not None:
+            data['concurrency'] = self.concurrency
+        if self.weight != 1.0:
+            data['weight'] = self.weight
+        return data
+
+def _locked(method):
+    """Run a model method while holding the tool's lock (see BPMTool.lock)."""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked
 
 class BPMTool:
-    def __init__(self):
-        self.contexts: Dict[str, Context] = {}
-        self.tasks: Dict[str, Task] = {}
+    # Rendered task size, used for hit-testing and placement
+    task_width = 100
+    task_height = 40
+    
+    def __init__(self, id_allocator=None):
+        # Dense integer ids by default; pass UUIDAllocator() for uuid4 strings
+        self.id_allocator = id_allocator if id_allocator is not None else IntegerIdAllocator()
+        self.contexts: Dict[ElementId, Context] = {}
+        self.tasks: Dict[ElementId, Task] = {}
+        # Set-backed edge indexes mirroring Task.successors/predecessors
+        self.successor_index: Dict[ElementId, Set[ElementId]] = {}
+        self.predecessor_index: Dict[ElementId, Set[ElementId]] = {}
+        # Online topological order; rejects edges that would close a cycle
+        self.topo_order = DynamicTopologicalOrder(
+            self.successor_index, self.predecessor_index, label=lambda task_id: self.tasks[task_id].name)
+        # Transitive closure for downstream/upstream queries, built on first use
+        self.reachability = ReachabilityIndex(self.successor_index, self.predecessor_index, self.topo_order)
+        # Grid indexes over context and task bounding boxes
+        self.context_grid = SpatialGrid()
+        self.task_grid = SpatialGrid()
+        # Insertion sequence of every context and task: query hits are drawn in this order
+        self.draw_order: Dict[ElementId, int] = {}
+        self._draw_sequence = itertools.count()
+        # Incrementally maintained statistics (see get_workflow_stats)
+        self.edge_count = 0
+        self.status_counts: Counter = Counter()
+        self.context_status_counts: Dict[ElementId, Counter] = {}
+        # Cross-check the counters against a full recount on every stats read
+        self.verify_stats = False
+        # Failure/skip/delay propagation to downstream tasks, run once per mutation or batch
+        self.propagate_status = True
+        self._status_seeds: Set[ElementId] = set()
+        # Held by every edit, batch and reader (rendering, stats, saving), so a
+        # run on another thread never interleaves with an edit or a read
+        self.lock = threading.RLock()
+        # Change notification, batch and undo/redo state
+        self.change_listeners: List[Callable[[], None]] = []
+        self.events = event_bus.EventBus()
+        self.journal = OperationLog()
+        self._batch_ops: Optional[List[Tuple[tuple, tuple]]] = None
+        self._batch_changed = False
+        self._replaying = False
         self.zoom_level = 1.0
+        # Top-left canvas point of a panned view; None shows the whole canvas scaled by zoom_level
+        self.viewport: Optional[Tuple[float, float]] = None
         self.canvas_width = 1400
         self.canvas_height = 900
         self.selected_element = None
+        self.canvas_label = ""
+        self.highlight_critical = False
+        # Per-task status counts across many instances (see show_instances)
+        self.instance_counts: Optional[Dict[ElementId, Counter]] = None
+        self._renderer: Optional[SvgRenderer] = None
         
+    @_locked
     def add_context(self, name: str, x: float = 100, y: float = 100, 
                    width: float = 350, height: float = 250, color: str = "#e6f3ff"):
-        context_id = str(uuid.uuid4())
+        context_id = self.id_allocator.allocate()
         context = Context(
             id=context_id,
             name=name,
@@ -80,19 +196,20 @@ class BPMTool:
             color=color,
             tasks=[]
         )
-        self.contexts[context_id] = context
+        self._insert_context(context)
+        self._record(('restore', [self._snapshot_context(context)], []), ('delete_context', context_id))
         return context_id
     
-    def add_task(self, name: str, context_id: str, x: float = 0, y: float = 0,
-                status: TaskStatus = TaskStatus.DEFAULT, color: str = "#ffffff"):
-        task_id = str(uuid.uuid4())
+    @_locked
+    def add_task(self, name: str, context_id: ElementId, x: float = 0, y: float = 0,
+                status: TaskStatus = TaskStatus.DEFAULT, color: str = "#ffffff",
+                duration: Optional[float] = None, action: Optional[Union[str, Callable]] = None,
+                retry: Optional[RetryPolicy] = None, priority: float = 0):
+        task_id = self.id_allocator.allocate()
         
         # Auto-position task within context if coordinates are 0,0
         if x == 0 and y == 0 and context_id in self.contexts:
-            context = self.contexts[context_id]
-            task_count = len(context.tasks)
-            x = context.x + 20 + (task_count % 3) * 110
-            y = context.y + 50 + (task_count // 3) * 50
+            x, y = self._free_slot(self.contexts[context_id])
         
         task = Task(
             id=task_id,
@@ -102,73 +219,825 @@ class BPMTool:
             color=color,
             context_id=context_id,
             successors=[],
-            predecessors=[]
+            predecessors=[],
+            duration=duration,
+            action=action,
+            retry=retry,
+            priority=priority
         )
-        self.tasks[task_id] = task
-        if context_id in self.contexts:
-            self.contexts[context_id].tasks.append(task_id)
+        self._insert_task(task)
+        self._record(('restore', [], [self._snapshot_task(task)]), ('delete_tasks', [task_id]))
         return task_id
     
-    def connect_tasks(self, source_id: str, target_id: str):
+    def _insert_context(self, context: Context):
+        self.contexts[context.id] = context
+        self.context_status_counts[context.id] = Counter()
+        self.draw_order[context.id] = next(self._draw_sequence)
+        self.context_grid.insert(context.id, context.x, context.y, context.width, context.height)
+    
+    def _insert_task(self, task: Task):
+        self.tasks[task.id] = task
+        self.successor_index[task.id] = set()
+        self.predecessor_index[task.id] = set()
+        self.topo_order.add_node(task.id)
+        self.reachability.add_node(task.id)
+        self.task_grid.insert(task.id, task.x, task.y, self.task_width, self.task_height)
+        self.draw_order[task.id] = next(self._draw_sequence)
+        if task.context_id in self.contexts:
+            self.contexts[task.context_id].tasks.append(task.id)
+        self._count_task(task, 1)
+    
+    def _count_task(self, task: Task, delta: int):
+        self.status_counts[task.status] += delta
+        if task.context_id in self.context_status_counts:
+            self.context_status_counts[task.context_id][task.status] += delta
+    
+    def _free_slot(self, context: Context) -> Tuple[float, float]:
+        # Next 3-column slot after the context's tasks that no task overlaps
+        slot = len(context.tasks)
+        while True:
+            x = context.x + 20 + (slot % 3) * 110
+            y = context.y + 50 + (slot // 3) * 50
+            if not self.task_grid.query_rect(x, y, x + self.task_width, y + self.task_height):
+                return x, y
+            slot += 1
+    
+    def _set_task_position(self, task: Task, x: float, y: float):
+        task.x, task.y = x, y
+        self.task_grid.update(task.id, x, y, self.task_width, self.task_height)
+    
+    @_locked
+    def move_task(self, task_id: ElementId, x: float, y: float):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_x, old_y = task.x, task.y
+            self._set_task_position(task, x, y)
+            self._record(('move_task', task_id, x, y), ('move_task', task_id, old_x, old_y))
+            return True
+        return False
+    
+    @_locked
+    def move_context(self, context_id: ElementId, x: float, y: float):
+        """Move a context box, carrying its tasks along by the same offset."""
+        if context_id in self.contexts:
+            context = self.contexts[context_id]
+            old_x, old_y = context.x, context.y
+            dx, dy = x - old_x, y - old_y
+            context.x, context.y = x, y
+            self.context_grid.update(context_id, x, y, context.width, context.height)
+            for task_id in context.tasks:
+                task = self.tasks[task_id]
+                self._set_task_position(task, task.x + dx, task.y + dy)
+            self._record(('move_context', context_id, x, y), ('move_context', context_id, old_x, old_y))
+            return True
+        return False
+    
+    @_locked
+    def set_context_concurrency(self, context_id: ElementId, concurrency: Optional[int]):
+        if context_id in self.contexts:
+            context = self.contexts[context_id]
+            old_concurrency = context.concurrency
+            context.concurrency = concurrency
+            self._record(('set_context_concurrency', context_id, concurrency),
+                         ('set_context_concurrency', context_id, old_concurrency))
+            return True
+        return False
+    
+    @_locked
+    def set_context_weight(self, context_id: ElementId, weight: float):
+        if context_id in self.contexts:
+            context = self.contexts[context_id]
+            old_weight = context.weight
+            context.weight = weight
+            self._record(('set_context_weight', context_id, weight), ('set_context_weight', context_id, old_weight))
+            return True
+        return False
+    
+    @_locked
+    def set_task_status(self, task_id: ElementId, status: TaskStatus):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_status = task.own_status or task.status
+            # Results are never overridden, and only failed, skipped or delayed
+            # tasks affect their dependents, so e.g. RUNNING -> SUCCESS needs no pass
+            if status not in self.UNBLOCKING_STATUSES or task.status in self.BLOCKING_STATUSES:
+                self._seed_status(task_id)
+            self._count_task(task, -1)
+            task.status = status
+            task.own_status = None
+            self._count_task(task, 1)
+            self._record(('set_task_status', task_id, status), ('set_task_status', task_id, old_status))
+            return True
+        return False
+    
+    @_locked
+    def set_task_action(self, task_id: ElementId, action: Optional[Union[str, Callable]]):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_action = task.action
+            task.action = action
+            self._record(('set_task_action', task_id, action), ('set_task_action', task_id, old_action))
+            return True
+        return False
+    
+    @_locked
+    def set_task_retry(self, task_id: ElementId, retry: Optional[RetryPolicy]):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_retry = task.retry
+            task.retry = retry
+            self._record(('set_task_retry', task_id, retry), ('set_task_retry', task_id, old_retry))
+            return True
+        return False
+    
+    @_locked
+    def set_task_priority(self, task_id: ElementId, priority: float):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_priority = task.priority
+            task.priority = priority
+            self._record(('set_task_priority', task_id, priority), ('set_task_priority', task_id, old_priority))
+            return True
+        return False
+    
+    @_locked
+    def set_task_statuses(self, updates: Dict[ElementId, TaskStatus]) -> int:
+        """Apply a bulk status feed as one undo step with a single propagation pass."""
+        with self.batch():
+            return sum(1 for task_id, status in updates.items() if self.set_task_status(task_id, status))
+    
+    # Reported statuses that stand as set and never hold back dependents
+    UNBLOCKING_STATUSES = (TaskStatus.SUCCESS, TaskStatus.RUNNING)
+    BLOCKING_STATUSES = (TaskStatus.FAILURE, TaskStatus.SKIPPED, TaskStatus.DELAYED)
+    
+    def _seed_status(self, task_id: ElementId):
+        if self.propagate_status:
+            self._status_seeds.add(task_id)
+    
+    def _inherited_status(self, predecessor_ids: Iterable[ElementId]) -> TaskStatus:
+        # A failed or skipped predecessor skips the task and a delayed one delays it
+        inherited = TaskStatus.DEFAULT
+        for predecessor_id in predecessor_ids:
+            status = self.tasks[predecessor_id].status
+            if status in (TaskStatus.FAILURE, TaskStatus.SKIPPED):
+                return TaskStatus.SKIPPED
+            if status == TaskStatus.DELAYED:
+                inherited = TaskStatus.DELAYED
+        return inherited
+    
+    def _derived_status(self, own: TaskStatus, inherited: TaskStatus) -> TaskStatus:
+        # Reported results stand; SKIPPED outranks DELAYED, which outranks DEFAULT
+        if own in (TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.RUNNING):
+            return own
+        if inherited == TaskStatus.DEFAULT or own == TaskStatus.SKIPPED:
+            return own
+        return inherited
+    
+    def _cycle_inherited_status(self, members: List[ElementId]) -> TaskStatus:
+        """What a cycle's members inherit, as one unit.
+        
+        Members would keep each other blocked if they read each other's shown
+        status, so only predecessors outside the cycle count, along with the
+        statuses set by hand on the members themselves.
+        """
+        inside = set(members)
+        outside = {p for member in members for p in self.predecessor_index[member] if p not in inside}
+        inherited = self._inherited_status(outside)
+        for member in members:
+            task = self.tasks[member]
+            own = task.own_status or task.status
+            if own in (TaskStatus.FAILURE, TaskStatus.SKIPPED):
+                return TaskStatus.SKIPPED
+            if own == TaskStatus.DELAYED:
+                inherited = TaskStatus.DELAYED
+        return inherited
+    
+    def _propagate_statuses(self):
+        """Re-derive statuses downstream of the seeded tasks in one topological sweep.
+        
+        Each task is evaluated at most once, after its predecessors, and the
+        sweep only continues past tasks that are seeds or whose status changed.
+        The members of a cycle (in a loaded file) are evaluated together.
+        """
+        seeds = {task_id for task_id in self._status_seeds if task_id in self.tasks}
+        self._status_seeds = set()
+        if not seeds:
+            return
+        self.topo_order.refresh()
+        position = self.topo_order.position
+        cycle_of = self.topo_order.cycle_of
+        heap = [(position[task_id], task_id) for task_id in seeds]
+        heapq.heapify(heap)
+        done = set()
+        # (context, old status, new status) of each change, applied to the stats at the end
+        transitions = []
+        while heap:
+            _, task_id = heapq.heappop(heap)
+            if task_id in done:
+                continue
+            members = cycle_of.get(task_id)
+            if members is None:
+                members = [task_id]
+                inherited = self._inherited_status(self.predecessor_index[task_id])
+            else:
+                inherited = self._cycle_inherited_status(members)
+            done.update(members)
+            changed = False
+            for member in members:
+                task = self.tasks[member]
+                own = task.own_status or task.status
+                status = self._derived_status(own, inherited)
+                if status != task.status:
+                    transitions.append((task.context_id, task.status, status))
+                    task.status = status
+                    changed = True
+                    if self.events:
+                        self.events.publish(event_bus.TASK_STATUS, member, status)
+                task.own_status = None if status == own else own
+            if not changed and seeds.isdisjoint(members):
+                continue
+            for member in members:
+                for successor_id in self.successor_index[member]:
+                    if successor_id not in done:
+                        heapq.heappush(heap, (position[successor_id], successor_id))
+        for (context_id, old, new), count in Counter(transitions).items():
+            self.status_counts[old] -= count
+            self.status_counts[new] += count
+            if context_id in self.context_status_counts:
+                self.context_status_counts[context_id][old] -= count
+                self.context_status_counts[context_id][new] += count
+    
+    @_locked
+    def set_task_duration(self, task_id: ElementId, duration: Optional[float]):
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            old_duration = task.duration
+            task.duration = duration
+            self._record(('set_task_duration', task_id, duration), ('set_task_duration', task_id, old_duration))
+            return True
+        return False
+    
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> Tuple[List[ElementId], List[ElementId]]:
+        """Return (context ids, task ids) whose boxes intersect the rectangle."""
+        return self.context_grid.query_rect(x0, y0, x1, y1), self.task_grid.query_rect(x0, y0, x1, y1)
+    
+    def query_point(self, x: float, y: float) -> Tuple[List[ElementId], List[ElementId]]:
+        """Return (context ids, task ids) whose boxes contain the point."""
+        return self.context_grid.query_point(x, y), self.task_grid.query_point(x, y)
+    
+    def nearest_task(self, x: float, y: float, max_distance: Optional[float] = None) -> Optional[ElementId]:
+        return self.task_grid.nearest(x, y, max_distance)
+    
+    def nearest_context(self, x: float, y: float, max_distance: Optional[float] = None) -> Optional[ElementId]:
+        return self.context_grid.nearest(x, y, max_distance)
+    
+    def rebuild_spatial_index(self):
+        self.context_grid.clear()
+        self.task_grid.clear()
+        self.draw_order.clear()
+        for context in self.contexts.values():
+            self.context_grid.insert(context.id, context.x, context.y, context.width, context.height)
+            self.draw_order[context.id] = next(self._draw_sequence)
+        for task in self.tasks.values():
+            self.task_grid.insert(task.id, task.x, task.y, self.task_width, self.task_height)
+            self.draw_order[task.id] = next(self._draw_sequence)
+    
+    @_locked
+    def connect_tasks(self, source_id: ElementId, target_id: ElementId):
+        """Add an edge; raises CycleError if target already reaches source."""
+        if self._link(source_id, target_id):
+            self._record(('connect_tasks', source_id, target_id), ('disconnect_tasks', source_id, target_id))
+            return True
+        return False
+    
+    @_locked
+    def disconnect_tasks(self, source_id: ElementId, target_id: ElementId):
+        if self._unlink(source_id, target_id):
+            self._record(('disconnect_tasks', source_id, target_id), ('connect_tasks', source_id, target_id))
+            return True
+        return False
+    
+    def _link(self, source_id: ElementId, target_id: ElementId):
         if source_id in self.tasks and target_id in self.tasks:
-            if target_id not in self.tasks[source_id].successors:
+            if target_id not in self.successor_index[source_id]:
+                self.topo_order.add_edge(source_id, target_id)
+                self.successor_index[source_id].add(target_id)
+                self.predecessor_index[target_id].add(source_id)
                 self.tasks[source_id].successors.append(target_id)
                 self.tasks[target_id].predecessors.append(source_id)
+                self.edge_count += 1
+                self.reachability.add_edge(source_id, target_id)
+                # Only a failed, skipped or delayed source can change the target's status
+                if self.tasks[source_id].status in self.BLOCKING_STATUSES:
+                    self._seed_status(target_id)
                 return True
         return False
     
-    def disconnect_tasks(self, source_id: str, target_id: str):
-        if source_id in self.tasks and target_id in self.tasks[source_id].successors:
+    def _unlink(self, source_id: ElementId, target_id: ElementId):
+        if source_id in self.tasks and target_id in self.successor_index[source_id]:
+            self.successor_index[source_id].discard(target_id)
+            self.predecessor_index[target_id].discard(source_id)
             self.tasks[source_id].successors.remove(target_id)
             self.tasks[target_id].predecessors.remove(source_id)
+            self.edge_count -= 1
+            self.topo_order.remove_edge(source_id, target_id)
+            self.reachability.remove_edge(source_id, target_id)
+            if self.tasks[source_id].status in self.BLOCKING_STATUSES:
+                self._seed_status(target_id)
             return True
         return False
     
-    def delete_task(self, task_id: str):
-        if task_id in self.tasks:
-            task = self.tasks[task_id]
-            # Remove from context
-            if task.context_id in self.contexts:
-                self.contexts[task.context_id].tasks.remove(task_id)
-            
-            # Remove connections to this task
-            for other_task in self.tasks.values():
-                if task_id in other_task.successors:
-                    other_task.successors.remove(task_id)
-                if task_id in other_task.predecessors:
-                    other_task.predecessors.remove(task_id)
-            
-            # Delete the task
+    def delete_task(self, task_id: ElementId):
+        return self.delete_tasks([task_id]) > 0
+    
+    @_locked
+    def delete_tasks(self, task_ids: Iterable[ElementId]) -> int:
+        """Delete a selection of tasks in one pass and return how many were removed.
+        
+        Only the contexts and neighbors of the deleted tasks are touched, each once.
+        """
+        snapshots = self._remove_tasks(task_ids)
+        if snapshots:
+            deleted = [snapshot.id for snapshot in snapshots]
+            self._record(('delete_tasks', deleted), ('restore', [], snapshots))
+        return len(snapshots)
+    
+    def _remove_tasks(self, task_ids: Iterable[ElementId]) -> List[Task]:
+        doomed = {task_id for task_id in task_ids if task_id in self.tasks}
+        if not doomed:
+            return []
+        snapshots = [self._snapshot_task(self.tasks[task_id]) for task_id in doomed]
+        
+        # Collect surviving neighbors through the edge indexes
+        affected_contexts = set()
+        affected_tasks = set()
+        for task_id in doomed:
+            affected_contexts.add(self.tasks[task_id].context_id)
+            self._count_task(self.tasks[task_id], -1)
+            # Each edge is counted once, from its source
+            self.edge_count -= len(self.successor_index[task_id])
+            self.edge_count -= sum(1 for p in self.predecessor_index[task_id] if p not in doomed)
+            for successor_id in self.successor_index.pop(task_id):
+                if successor_id not in doomed:
+                    self.predecessor_index[successor_id].discard(task_id)
+                    affected_tasks.add(successor_id)
+                    self._seed_status(successor_id)
+            for predecessor_id in self.predecessor_index.pop(task_id):
+                if predecessor_id not in doomed:
+                    self.successor_index[predecessor_id].discard(task_id)
+                    affected_tasks.add(predecessor_id)
+        
+        # Remove connections to the deleted tasks
+        for other_id in affected_tasks:
+            other_task = self.tasks[other_id]
+            other_task.successors = [s for s in other_task.successors if s not in doomed]
+            other_task.predecessors = [p for p in other_task.predecessors if p not in doomed]
+        
+        # Remove from contexts
+        for context_id in affected_contexts:
+            if context_id in self.contexts:
+                context = self.contexts[context_id]
+                context.tasks = [t for t in context.tasks if t not in doomed]
+        
+        # Delete the tasks
+        for task_id in doomed:
             del self.tasks[task_id]
-            return True
-        return False
+            self.topo_order.remove_node(task_id)
+            self.reachability.remove_node(task_id)
+            self.task_grid.remove(task_id)
+            del self.draw_order[task_id]
+        return snapshots
     
-    def delete_context(self, context_id: str):
+    @_locked
+    def delete_context(self, context_id: ElementId):
         if context_id in self.contexts:
+            context_snapshot = self._snapshot_context(self.contexts[context_id])
+            
             # Delete all tasks in this context
-            context = self.contexts[context_id]
-            for task_id in context.tasks.copy():
-                self.delete_task(task_id)
+            task_snapshots = self._remove_tasks(self.contexts[context_id].tasks)
             
             # Delete the context
             del self.contexts[context_id]
+            del self.context_status_counts[context_id]
+            self.context_grid.remove(context_id)
+            del self.draw_order[context_id]
+            self._record(('delete_context', context_id), ('restore', [context_snapshot], task_snapshots))
             return True
         return False
     
+    def _snapshot_context(self, context: Context) -> Context:
+        return replace(context, tasks=[])
+    
+    def _snapshot_task(self, task: Task) -> Task:
+        return replace(task, successors=list(task.successors), predecessors=list(task.predecessors))
+    
+    @_locked
+    def restore(self, contexts: List[Context], tasks: List[Task]):
+        """Re-insert snapshotted contexts and tasks (with their ids and surviving edges)."""
+        inserted = [context for context in contexts if context.id not in self.contexts]
+        for context in inserted:
+            self._insert_context(replace(context, tasks=[]))
+        restored = [task for task in tasks if task.id not in self.tasks]
+        for task in restored:
+            self._insert_task(replace(task, successors=[], predecessors=[]))
+            self._seed_status(task.id)
+        for task in restored:
+            for successor_id in task.successors:
+                self._link(task.id, successor_id)
+            for predecessor_id in task.predecessors:
+                self._link(predecessor_id, task.id)
+        # One undo step that deletes each restored context with its tasks, then the other tasks
+        inserted_ids = {context.id for context in inserted}
+        with self.batch():
+            for context in inserted:
+                self._record(('restore', [context], [task for task in restored if task.context_id == context.id]),
+                             ('delete_context', context.id))
+            loose = [task for task in restored if task.context_id not in inserted_ids]
+            if loose:
+                self._record(('restore', [], loose), ('delete_tasks', [task.id for task in loose]))
+        return True
+    
+    def _record(self, forward: tuple, inverse: tuple):
+        """Register a completed mutation; ``forward``/``inverse`` are (method, *args) ops."""
+        if not self._replaying:
+            if self._batch_ops is not None:
+                self._batch_ops.append((forward, inverse))
+            else:
+                self.journal.push([(forward, inverse)])
+        if self.events:
+            self._publish(forward, inverse)
+        self._changed()
+    
+    # Forward op -> event kind, for ops on a single element
+    OP_EVENTS = {
+        'move_task': event_bus.TASK_MOVED,
+        'move_context': event_bus.CONTEXT_MOVED,
+        'set_task_status': event_bus.TASK_STATUS,
+        'set_task_duration': event_bus.TASK_UPDATED,
+        'set_task_action': event_bus.TASK_UPDATED,
+        'set_task_retry': event_bus.TASK_UPDATED,
+        'set_task_priority': event_bus.TASK_UPDATED,
+        'set_context_concurrency': event_bus.CONTEXT_UPDATED,
+        'set_context_weight': event_bus.CONTEXT_UPDATED,
+    }
+    
+    def _publish(self, forward: tuple, inverse: tuple):
+        """Turn a recorded op into events on the bus."""
+        name, args = forward[0], forward[1:]
+        publish = self.events.publish
+        if name in ('connect_tasks', 'disconnect_tasks'):
+            publish(event_bus.EDGE_CHANGED, (args[0], args[1]), name == 'connect_tasks')
+        elif name == 'restore':
+            for context in args[0]:
+                publish(event_bus.CONTEXT_ADDED, context.id)
+            for task in args[1]:
+                publish(event_bus.TASK_ADDED, task.id)
+        elif name == 'delete_tasks':
+            for task_id in args[0]:
+                publish(event_bus.TASK_REMOVED, task_id)
+        elif name == 'delete_context':
+            for task in inverse[2]:
+                publish(event_bus.TASK_REMOVED, task.id)
+            publish(event_bus.CONTEXT_REMOVED, args[0])
+        elif name == 'set_task_status':
+            # The shown status, which propagation may still change
+            publish(event_bus.TASK_STATUS, args[0], self.tasks[args[0]].status)
+        elif name in ('move_task', 'move_context'):
+            publish(self.OP_EVENTS[name], args[0], (args[1], args[2]))
+        elif name in self.OP_EVENTS:
+            publish(self.OP_EVENTS[name], args[0])
+    
+    def _apply(self, op: tuple):
+        return getattr(self, op[0])(*op[1:])
+    
+    def _changed(self):
+        if self._batch_ops is not None:
+            self._batch_changed = True
+            return
+        self._propagate_statuses()
+        for listener in list(self.change_listeners):
+            listener()
+        if self.events:
+            self.events.changed()
+    
+    def add_change_listener(self, listener: Callable[[], None]):
+        """Call ``listener()`` after every mutation, or once at the end of a batch."""
+        self.change_listeners.append(listener)
+    
+    def subscribe(self, callback: Callable[[List[event_bus.Event]], None], kinds: Optional[Iterable[str]] = None,
+                  window: float = 0.1) -> event_bus.Subscription:
+        """Receive coalesced lists of change events, at most one list per ``window`` seconds.
+        
+        Kinds are the constants in event_bus (TASK_STATUS, TASK_MOVED, ...);
+        ``window=0`` delivers once per mutation or batch instead.
+        """
+        return self.events.subscribe(callback, kinds, window)
+    
+    @contextmanager
+    def batch(self, journal: bool = True):
+        """Group mutations: one change notification at the end, full rollback on error.
+        
+        The batch holds ``lock`` until its notification is delivered; code
+        that changes the model from another thread (e.g. a run) goes through it.
+        ``journal=False`` leaves the undo and redo stacks alone, for changes
+        that are not edits (a run's status transitions).
+        """
+        with self.lock:
+            if self._batch_ops is not None:
+                # Nested batch: the outermost one owns rollback and notification
+                yield self
+                return
+            self._batch_ops = []
+            self._batch_changed = False
+            try:
+                yield self
+            except BaseException:
+                self._replay([inverse for _, inverse in reversed(self._batch_ops)])
+                self._batch_ops = None
+                self._propagate_statuses()
+                raise
+            ops, changed = self._batch_ops, self._batch_changed
+            self._batch_ops = None
+            # The whole batch is a single undo step
+            if journal:
+                self.journal.push(ops)
+            if changed:
+                self._changed()
+    
+    def _replay(self, ops: List[tuple]):
+        replaying = self._replaying
+        self._replaying = True
+        try:
+            for op in ops:
+                self._apply(op)
+        finally:
+            self._replaying = replaying
+    
+    @_locked
+    def undo(self):
+        """Revert the last edit (or batch); costs only the size of that edit."""
+        entry = self.journal.pop_undo()
+        if entry is None:
+            return False
+        with self.batch():
+            self._replay([inverse for _, inverse in reversed(entry)])
+        return True
+    
+    @_locked
+    def redo(self):
+        entry = self.journal.pop_redo()
+        if entry is None:
+            return False
+        with self.batch():
+            self._replay([forward for forward, _ in entry])
+        return True
+    
+    # Batch op name -> (required fields, optional fields)
+    BATCH_OPS = {
+        'add_context': (('name',), ('x', 'y', 'width', 'height', 'color', 'ref')),
+        'add_task': (('name', 'context_id'), ('x', 'y', 'status', 'color', 'duration', 'action', 'retry', 'priority', 'ref')),
+        'connect_tasks': (('source_id', 'target_id'), ()),
+        'disconnect_tasks': (('source_id', 'target_id'), ()),
+        'move_task': (('task_id', 'x', 'y'), ()),
+        'move_context': (('context_id', 'x', 'y'), ()),
+        'set_task_status': (('task_id', 'status'), ()),
+        'set_task_duration': (('task_id', 'duration'), ()),
+        'set_task_action': (('task_id', 'action'), ()),
+        'set_task_retry': (('task_id', 'retry'), ()),
+        'set_task_priority': (('task_id', 'priority'), ()),
+        'set_context_concurrency': (('context_id', 'concurrency'), ()),
+        'set_context_weight': (('context_id', 'weight'), ()),
+        'delete_task': (('task_id',), ()),
+        'delete_context': (('context_id',), ()),
+    }
+    BATCH_ID_FIELDS = ('context_id', 'task_id', 'source_id', 'target_id')
+    
+    @_locked
+    def apply_ops(self, ops: List[dict]) -> list:
+        """Apply a list of op dicts atomically and return each op's result.
+        
+        Each op is ``{'op': <name in BATCH_OPS>, **fields}``. Adds may carry a
+        ``'ref'`` label that later ops use as an id in the form ``'@label'``.
+        Other string ids are external ids, as written in saved and exported
+        files; integers are the model's own ids.
+        All ops are validated before any is applied; if one fails, every
+        change is rolled back and ValueError is raised.
+        """
+        prepared = []
+        refs = set()
+        for index, op in enumerate(ops):
+            name = op.get('op')
+            if name not in self.BATCH_OPS:
+                raise ValueError(f"op {index}: unknown op {name!r}")
+            required, optional = self.BATCH_OPS[name]
+            fields = {k: v for k, v in op.items() if k != 'op'}
+            missing = [k for k in required if k not in fields]
+            unknown = [k for k in fields if k not in required and k not in optional]
+            if missing or unknown:
+                raise ValueError(f"op {index} ({name}): missing {missing}, unknown {unknown}")
+            for key in self.BATCH_ID_FIELDS:
+                value = fields.get(key)
+                if isinstance(value, str) and value.startswith('@'):
+                    if value[1:] not in refs:
+                        raise ValueError(f"op {index} ({name}): undefined reference {value}")
+                elif key in fields:
+                    if isinstance(value, str):
+                        value = fields[key] = self.id_allocator.internal(value)
+                    known = self.contexts if key == 'context_id' else self.tasks
+                    if value not in known:
+                        raise ValueError(f"op {index} ({name}): unknown {key} {value!r}")
+            if 'status' in fields and not isinstance(fields['status'], TaskStatus):
+                try:
+                    fields['status'] = TaskStatus(fields['status'])
+                except ValueError:
+                    raise ValueError(f"op {index} ({name}): invalid status {fields['status']!r}")
+            if isinstance(fields.get('retry'), dict):
+                try:
+                    fields['retry'] = RetryPolicy(**fields['retry'])
+                except TypeError:
+                    raise ValueError(f"op {index} ({name}): invalid retry policy {fields['retry']!r}")
+            ref = fields.pop('ref', None)
+            if ref is not None:
+                refs.add(ref)
+            prepared.append((index, name, fields, ref))
+        
+        results = []
+        resolved: Dict[str, ElementId] = {}
+        with self.batch():
+            for index, name, fields, ref in prepared:
+                for key in self.BATCH_ID_FIELDS:
+                    value = fields.get(key)
+                    if isinstance(value, str) and value.startswith('@'):
+                        fields[key] = resolved[value[1:]]
+                result = getattr(self, name)(**fields)
+                if result is False:
+                    raise ValueError(f"op {index} ({name}) failed: {fields}")
+                if ref is not None:
+                    resolved[ref] = result
+                results.append(result)
+        return results
+    
+    def clear(self):
+        with self.lock:
+            self._reset()
+            if self.events:
+                self.events.publish(event_bus.RESET)
+            self._changed()
+    
+    def _reset(self):
+        self.journal.clear()
+        self.contexts.clear()
+        self.tasks.clear()
+        self.successor_index.clear()
+        self.predecessor_index.clear()
+        self.topo_order.clear()
+        self.reachability.clear()
+        self.context_grid.clear()
+        self.task_grid.clear()
+        self.draw_order.clear()
+        self.id_allocator.reset()
+        self.edge_count = 0
+        self.status_counts.clear()
+        self.context_status_counts.clear()
+        self._status_seeds.clear()
+    
+    def rebuild_edge_index(self):
+        """Rebuild the edge indexes and predecessor lists from Task.successors."""
+        # Refill in place: the topological order holds references to these dicts
+        self.successor_index.clear()
+        self.predecessor_index.clear()
+        for task_id in self.tasks:
+            self.successor_index[task_id] = set()
+            self.predecessor_index[task_id] = set()
+        for task in self.tasks.values():
+            task.predecessors = []
+        for task in self.tasks.values():
+            successors = []
+            for successor_id in task.successors:
+                if successor_id in self.tasks and successor_id not in self.successor_index[task.id]:
+                    self.successor_index[task.id].add(successor_id)
+                    self.predecessor_index[successor_id].add(task.id)
+                    self.tasks[successor_id].predecessors.append(task.id)
+                    successors.append(successor_id)
+            task.successors = successors
+        self.topo_order.rebuild(self.tasks)
+        self.reachability.invalidate()
+    
     def get_status_color(self, status: TaskStatus) -> str:
         color_map = {
             TaskStatus.SUCCESS: "#28a745",  # Green
             TaskStatus.FAILURE: "#dc3545",  # Red
             TaskStatus.SKIPPED: "#6c757d",  # Grey
             TaskStatus.DELAYED: "#fd7e14",  # Orange
-            TaskStatus.DEFAULT: "#ffffff"   # White
+            TaskStatus.DEFAULT: "#ffffff",  # White
+            TaskStatus.RUNNING: "#0d6efd"   # Blue
         }
         return color_map.get(status, "#ffffff")
     
+    def show_instances(self, counts):
+        """Heat-color tasks by their outcome across many instances.
+        
+        ``counts`` is an InstanceStore or its ``task_counts()``; None goes back
+        to showing the tool's own statuses.
+        """
+        if hasattr(counts, 'task_counts'):
+            counts = counts.task_counts()
+        self.instance_counts = counts
+    
+    # Failure share of finished instances: 0 -> green, 0.5 -> amber, 1 -> red
+    HEAT_STOPS = ((0.0, (40, 167, 69)), (0.5, (255, 193, 7)), (1.0, (220, 53, 69)))
+    
+    def get_heat_color(self, share: float) -> str:
+        for (low, low_rgb), (high, high_rgb) in zip(self.HEAT_STOPS, self.HEAT_STOPS[1:]):
+            if share <= high:
+                t = (share - low) / (high - low)
+                rgb = [round(a + (b - a) * t) for a, b in zip(low_rgb, high_rgb)]
+                return "#{:02x}{:02x}{:02x}".format(*rgb)
+        return "#{:02x}{:02x}{:02x}".format(*self.HEAT_STOPS[-1][1])
+    
+    def _instance_heat(self, task_id: ElementId) -> Tuple[str, str, str]:
+        """(fill, text color, label) of a task in the instance heat view."""
+        counts = self.instance_counts.get(task_id, Counter())
+        succeeded = counts[TaskStatus.SUCCESS]
+        failed = counts[TaskStatus.FAILURE] + counts[TaskStatus.SKIPPED]
+        pending = sum(counts.values()) - succeeded - failed
+        label = f"✓{succeeded} ✗{failed}" + (f" …{pending}" if pending else "")
+        if succeeded + failed == 0:
+            return self.get_status_color(TaskStatus.DEFAULT), "#000", label
+        share = failed / (succeeded + failed)
+        return self.get_heat_color(share), "#fff" if share > 0.75 else "#000", label
+    
     def generate_svg(self) -> str:
-        svg_content = f'''
-        <svg width="{self.canvas_width * self.zoom_level}" height="{self.canvas_height * self.zoom_level}" 
-             viewBox="0 0 {self.canvas_width} {self.canvas_height}" 
+        # Elements are re-rendered only when they change (see svg_renderer)
+        with self.lock:
+            if self._renderer is None:
+                self._renderer = SvgRenderer(self)
+            return self._renderer.render()
+    
+    def iter_svg(self, chunk_size: int = 64 * 1024, whole: bool = False) -> Iterator[str]:
+        """The same document as generate_svg, streamed in chunks (for files and HTTP responses).
+        
+        ``whole=True`` streams the entire workflow at full detail instead of the current view.
+        Hold ``lock`` while consuming it if a run may be changing the model.
+        """
+        return iter_svg(self, chunk_size, whole)
+    
+    # Level of detail: below LABEL_ZOOM tasks lose their labels, below SUMMARY_ZOOM
+    # contexts collapse to status histograms and edges are bundled per context pair
+    LABEL_ZOOM = 0.6
+    SUMMARY_ZOOM = 0.35
+    
+    def detail_level(self) -> str:
+        if self.zoom_level < self.SUMMARY_ZOOM:
+            return SUMMARY
+        if self.zoom_level < self.LABEL_ZOOM:
+            return OUTLINE
+        return FULL
+    
+    def set_viewport(self, x: Optional[float], y: Optional[float] = None):
+        """Pan so canvas point (x, y) is the top-left corner; None goes back to the whole canvas."""
+        self.viewport = None if x is None else (x, y)
+    
+    def focus_context(self, context_id: ElementId, margin: float = 20) -> bool:
+        """Zoom and pan so the context fills the view."""
+        context = self.contexts.get(context_id)
+        if context is None:
+            return False
+        self.zoom_level = min(self.canvas_width / (context.width + 2 * margin),
+                              self.canvas_height / (context.height + 2 * margin))
+        self.viewport = (context.x - margin, context.y - margin)
+        return True
+    
+    def visible_rect(self) -> Box:
+        """The canvas area in view; only elements that intersect it are rendered."""
+        if self.viewport is None:
+            return (0, 0, self.canvas_width, self.canvas_height)
+        x, y = self.viewport
+        return (x, y, x + self.canvas_width / self.zoom_level, y + self.canvas_height / self.zoom_level)
+    
+    def bounds(self, margin: float = 20) -> Box:
+        """Bounding box of every context and task (the canvas when empty)."""
+        boxes = list(self.context_grid.boxes.values()) + list(self.task_grid.boxes.values())
+        if not boxes:
+            return (0, 0, self.canvas_width, self.canvas_height)
+        return (min(b[0] for b in boxes) - margin, min(b[1] for b in boxes) - margin,
+                max(b[2] for b in boxes) + margin, max(b[3] for b in boxes) + margin)
+    
+    def svg_header(self, view: Optional[Box] = None) -> str:
+        """Opening of the document; ``view`` draws that canvas box at 1:1 instead of the current view."""
+        if view is None and self.viewport is None:
+            width, height = self.canvas_width * self.zoom_level, self.canvas_height * self.zoom_level
+            view_box = f"0 0 {self.canvas_width} {self.canvas_height}"
+            background = 'width="100%" height="100%"'
+        else:
+            # A panned view keeps the canvas size on screen and moves the viewBox instead
+            x0, y0, x1, y1 = view or self.visible_rect()
+            width, height = (x1 - x0, y1 - y0) if view else (self.canvas_width, self.canvas_height)
+            view_box = f"{x0} {y0} {x1 - x0} {y1 - y0}"
+            background = f'x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}"'
+        return f'''
+        <svg width="{width}" height="{height}" 
+             viewBox="{view_box}" 
              xmlns="http://www.w3.org/2000/svg"
              style="border: 2px solid #ddd; background: #f9f9f9;">
         
@@ -184,12 +1053,11 @@ class BPMTool:
         </defs>
         
         <!-- Grid background -->
-        <rect width="100%" height="100%" fill="url(#grid)" />
+        <rect {background} fill="url(#grid)" />
         '''
-        
-        # Draw contexts (boxes)
-        for context in self.contexts.values():
-            svg_content += f'''
+    
+    def render_context(self, context: Context) -> str:
+        return f'''
             <g class="context" data-id="{context.id}">
                 <rect x="{context.x}" y="{context.y}" 
                       width="{context.width}" height="{context.height}"
@@ -205,39 +1073,48 @@ class BPMTool:
                 </text>
             </g>
             '''
+    
+    def render_edge(self, task: Task, successor: Task, on_chain: bool, detail: str = FULL) -> str:
+        # Calculate connection points
+        start_x = task.x + 100
+        start_y = task.y + 20
+        end_x = successor.x
+        end_y = successor.y + 20
         
-        # Draw task connections (wires) first so they appear behind tasks
-        for task in self.tasks.values():
-            for successor_id in task.successors:
-                if successor_id in self.tasks:
-                    successor = self.tasks[successor_id]
-                    # Calculate connection points
-                    start_x = task.x + 100
-                    start_y = task.y + 20
-                    end_x = successor.x
-                    end_y = successor.y + 20
-                    
-                    # Create curved connection
-                    control_x = start_x + (end_x - start_x) / 2
-                    
-                    svg_content += f'''
+        # Create curved connection
+        control_x = start_x + (end_x - start_x) / 2
+        if detail != FULL:
+            return f'''
+                    <path class="connection" d="M {start_x} {start_y} Q {control_x} {start_y} {end_x} {end_y}"
+                          stroke="{'#d63384' if on_chain else '#666'}" stroke-width="{3 if on_chain else 2}" fill="none"
+                          marker-end="url(#arrowhead)"/>
+                    '''
+        return f'''
                     <g class="connection">
                         <path d="M {start_x} {start_y} Q {control_x} {start_y} {end_x} {end_y}"
-                              stroke="#666" stroke-width="2" fill="none" 
+                              stroke="{'#d63384' if on_chain else '#666'}" stroke-width="{3 if on_chain else 2}" fill="none" 
                               marker-end="url(#arrowhead)"
                               style="filter: drop-shadow(1px 1px 2px rgba(0,0,0,0.1));"/>
                     </g>
                     '''
-        
-        # Draw tasks
-        for task in self.tasks.values():
+    
+    def render_task(self, task: Task, critical: bool, detail: str = FULL) -> str:
+        if self.instance_counts is not None:
+            task_color, text_color, status_label = self._instance_heat(task.id)
+        else:
             task_color = task.color if task.color != "#ffffff" else self.get_status_color(task.status)
-            text_color = "#000" if task.status != TaskStatus.FAILURE else "#fff"
-            
-            svg_content += f'''
-            <g class="task" data-id="{task.id}">
+            text_color = "#fff" if task.status in (TaskStatus.FAILURE, TaskStatus.RUNNING) else "#000"
+            status_label = task.status.value.title()
+        if detail != FULL:
+            # Too small to read: no labels or shadows
+            return f'''
+            <rect class="task{' critical' if critical else ''}" data-id="{task.id}" x="{task.x}" y="{task.y}" width="100" height="40"
+                  fill="{task_color}" stroke="{'#d63384' if critical else '#333'}" stroke-width="{3 if critical else 1.5}" rx="5"/>
+            '''
+        return f'''
+            <g class="task{' critical' if critical else ''}" data-id="{task.id}">
                 <rect x="{task.x}" y="{task.y}" width="100" height="40"
-                      fill="{task_color}" stroke="#333" stroke-width="1.5" rx="5"
+                      fill="{task_color}" stroke="{'#d63384' if critical else '#333'}" stroke-width="{3 if critical else 1.5}" rx="5"
                       style="filter: drop-shadow(1px 1px 3px rgba(0,0,0,0.2)); cursor: pointer;"/>
                 <text x="{task.x + 50}" y="{task.y + 15}" 
                       font-family="Arial, sans-serif" font-size="11" font-weight="bold" 
@@ -247,99 +1124,302 @@ class BPMTool:
                 <text x="{task.x + 50}" y="{task.y + 30}" 
                       font-family="Arial, sans-serif" font-size="9" 
                       fill="{text_color}" text-anchor="middle">
-                    {task.status.value.title()}
+                    {status_label}
                 </text>
             </g>
             '''
-        
-        # Add zoom level indicator
-        svg_content += f'''
-        <text x="10" y="{self.canvas_height - 10}" 
-              font-family="Arial, sans-serif" font-size="12" fill="#666">
-            Zoom: {self.zoom_level:.1f}x
+    
+    def render_context_summary(self, context: Context, counts: Counter) -> str:
+        """A collapsed context: its name and a bar of its tasks' statuses."""
+        total = sum(counts.values())
+        scale = 1 / self.zoom_level
+        bar_x, bar_y = context.x + 15, context.y + context.height / 2
+        bar_width, bar_height = context.width - 30, min(context.height / 4, 12 * scale)
+        segments = []
+        for status in TaskStatus:
+            if counts[status]:
+                width = bar_width * counts[status] / total
+                segments.append(f'''<rect x="{bar_x}" y="{bar_y}" width="{width}" height="{bar_height}" fill="{self.get_status_color(status)}" stroke="#333" stroke-width="{scale / 2}"><title>{status.value.title()}: {counts[status]}</title></rect>''')
+                bar_x += width
+        return f'''
+            <g class="context summary" data-id="{context.id}">
+                <rect x="{context.x}" y="{context.y}" 
+                      width="{context.width}" height="{context.height}"
+                      fill="{context.color}" stroke="#333" stroke-width="{2 * scale}" rx="8"/>
+                <text x="{context.x + 15}" y="{context.y + min(context.height / 3, 16 * scale)}" 
+                      font-family="Arial, sans-serif" font-size="{min(context.height / 4, 14 * scale)}" font-weight="bold" fill="#333">
+                    {context.name}
+                </text>
+                {''.join(segments)}
+                <text x="{context.x + 15}" y="{context.y + context.height - 10}" 
+                      font-family="Arial, sans-serif" font-size="{min(context.height / 6, 10 * scale)}" fill="#666">
+                    {total} task(s)
+                </text>
+            </g>
+            '''
+    
+    def render_bundle(self, source: Context, target: Context, count: int) -> str:
+        """The ``count`` edges from one collapsed context to another, drawn as one labelled connection."""
+        scale = 1 / self.zoom_level
+        start_x, start_y = source.x + source.width, source.y + source.height / 2
+        end_x, end_y = target.x, target.y + target.height / 2
+        control_x = start_x + (end_x - start_x) / 2
+        return f'''
+            <g class="connection bundle">
+                <path d="M {start_x} {start_y} Q {control_x} {start_y} {end_x} {end_y}"
+                      stroke="#666" stroke-width="{min(1 + count.bit_length(), 8) * scale}" fill="none" opacity="0.7"/>
+                <text x="{(start_x + end_x) / 2}" y="{(start_y + end_y) / 2}" 
+                      font-family="Arial, sans-serif" font-size="{10 * scale}" fill="#333" text-anchor="middle">
+                    {count}
+                </text>
+            </g>
+            '''
+    
+    def svg_footer(self, makespan: Optional[float], view: Optional[Box] = None) -> str:
+        # Zoom level indicator, kept at the same size in the bottom-left corner of the view
+        x0, _, _, y1 = view or self.visible_rect()
+        scale = 1 if view or self.viewport is None else 1 / self.zoom_level
+        return f'''
+        <text x="{x0 + 10 * scale}" y="{y1 - 10 * scale}" 
+              font-family="Arial, sans-serif" font-size="{12 * scale}" fill="#666">
+            Zoom: {self.zoom_level:.1f}x{self.canvas_label}{f' | Makespan: {makespan:g}' if makespan is not None else ''}
         </text>
-        '''
-        
-        svg_content += '</svg>'
-        return svg_content
+        </svg>'''
     
-    def save_to_file(self, filename: str):
-        try:
-            data = {
-                'contexts': {k: v.to_dict() for k, v in self.contexts.items()},
-                'tasks': {k: v.to_dict() for k, v in self.tasks.items()},
+    def _critical_highlight(self):
+        if not self.highlight_critical or not self.tasks:
+            return set(), set(), None
+        # Imported lazily: NumPy is only needed when the highlight is switched on
+        from critical_path import critical_path
+        result = critical_path(self)
+        chain = result.critical_chain
+        return set(result.critical_tasks), set(zip(chain, chain[1:])), result.makespan
+    
+    def resolve_path(self, filename: str) -> str:
+        return filename
+    
+    def to_dict(self):
+        """Serialize the workflow, writing every id in its external form."""
+        with self.lock:
+            external = self.id_allocator.external
+            contexts = {}
+            for context in self.contexts.values():
+                context_data = context.to_dict()
+                context_data['id'] = external(context.id)
+                context_data['tasks'] = [external(t) for t in context.tasks]
+                contexts[context_data['id']] = context_data
+            tasks = {}
+            for task in self.tasks.values():
+                task_data = task.to_dict()
+                task_data['id'] = external(task.id)
+                task_data['context_id'] = external(task.context_id)
+                task_data['successors'] = [external(t) for t in task.successors]
+                task_data['predecessors'] = [external(t) for t in task.predecessors]
+                tasks[task_data['id']] = task_data
+            return {
+                'contexts': contexts,
+                'tasks': tasks,
                 'zoom_level': self.zoom_level,
                 'canvas_width': self.canvas_width,
                 'canvas_height': self.canvas_height
             }
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
-            return f"✅ Configuration saved to {filename}"
-        except Exception as e:
-            return f"❌ Error saving file: {str(e)}"
     
-    def load_from_file(self, filename: str):
-        try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            
-            self.contexts = {}
-            self.tasks = {}
-            
+    def load_dict(self, data: dict):
+        with self.lock:
+            self._reset()
+        
+            # Map external ids (uuids, "task-001", ...) to model ids up front
+            register = self.id_allocator.register
+            lookup = self.id_allocator.lookup
+            context_items = data.get('contexts', {}).values()
+            task_items = data.get('tasks', {}).values()
+            for context_data in context_items:
+                register(context_data['id'])
+            for task_data in task_items:
+                register(task_data['id'])
+        
             # Load contexts
-            for context_data in data.get('contexts', {}).values():
+            for context_data in context_items:
                 context = Context(
-                    id=context_data['id'],
+                    id=lookup(context_data['id']),
                     name=context_data['name'],
                     x=context_data['x'],
                     y=context_data['y'],
                     width=context_data['width'],
                     height=context_data['height'],
                     color=context_data['color'],
-                    tasks=context_data['tasks']
+                    tasks=[lookup(t) for t in context_data['tasks'] if lookup(t) is not None],
+                    concurrency=context_data.get('concurrency'),
+                    weight=context_data.get('weight', 1.0)
                 )
                 self.contexts[context.id] = context
-            
+        
             # Load tasks
-            for task_data in data.get('tasks', {}).values():
+            for task_data in task_items:
                 task = Task(
-                    id=task_data['id'],
+                    id=lookup(task_data['id']),
                     name=task_data['name'],
                     x=task_data['x'],
                     y=task_data['y'],
                     status=TaskStatus(task_data['status']),
                     color=task_data['color'],
-                    context_id=task_data['context_id'],
-                    successors=task_data['successors'],
-                    predecessors=task_data.get('predecessors', [])
+                    context_id=lookup(task_data['context_id']),
+                    successors=[lookup(t) for t in task_data['successors']],
+                    predecessors=[],
+                    duration=task_data.get('duration'),
+                    own_status=TaskStatus(task_data['own_status']) if 'own_status' in task_data else None,
+                    action=task_data.get('action'),
+                    retry=RetryPolicy(**task_data['retry']) if 'retry' in task_data else None,
+                    priority=task_data.get('priority', 0)
                 )
                 self.tasks[task.id] = task
-            
+            self.rebuild_edge_index()
+            self.rebuild_spatial_index()
+            self.edge_count, self.status_counts, self.context_status_counts = self._recount_stats()
+        
             self.zoom_level = data.get('zoom_level', 1.0)
             self.canvas_width = data.get('canvas_width', 1400)
             self.canvas_height = data.get('canvas_height', 900)
+            if self.events:
+                self.events.publish(event_bus.RESET)
+            self._changed()
+    
+    def save_to_file(self, filename: str):
+        try:
+            data = self.to_dict()
+            with open(self.resolve_path(filename), 'w') as f:
+                json.dump(data, f, indent=2)
+            return f"✅ Configuration saved to {filename}"
+        except Exception as e:
+            return f"❌ Error saving file: {str(e)}"
+    
+    def export_svg(self, filename: str):
+        try:
+            with open(self.resolve_path(filename), 'w', encoding='utf-8') as f, self.lock:
+                for chunk in self.iter_svg(whole=True):
+                    f.write(chunk)
+            return f"✅ Diagram exported to {filename}"
+        except Exception as e:
+            return f"❌ Error exporting diagram: {str(e)}"
+    
+    def load_from_file(self, filename: str):
+        try:
+            with open(self.resolve_path(filename), 'r') as f:
+                data = json.load(f)
+            
+            self.load_dict(data)
             
+            cycles = self.find_cycles()
+            if cycles:
+                return f"✅ Configuration loaded from {filename} ⚠️ {self.describe_cycles(cycles)}"
             return f"✅ Configuration loaded from {filename}"
         except FileNotFoundError:
             return f"❌ File not found: {filename}"
         except Exception as e:
             return f"❌ Error loading file: {str(e)}"
     
-    def get_workflow_stats(self):
-        total_tasks = len(self.tasks)
-        total_contexts = len(self.contexts)
+    def topological_order(self) -> List[ElementId]:
+        """Task ids in dependency order, maintained incrementally by connect_tasks."""
+        if not self.topo_order.acyclic:
+            raise CycleError("Workflow contains cycles; use condensation() for an order of its components", [])
+        return self.topo_order.order()
+    
+    def run(self, max_workers: Optional[int] = None, actions: Optional[Dict[ElementId, Any]] = None,
+            engine: str = "threads", **options):
+        """Execute the workflow and return a RunResult.
         
-        status_counts = {}
+        Tasks run once all their predecessors succeeded; statuses update live
+        (RUNNING, then SUCCESS or FAILURE). ``actions`` overrides Task.action
+        per task for this run. ``engine`` is "threads" (ThreadPoolExecutor
+        with ``max_workers``), "asyncio" (``max_workers`` becomes the
+        default per-context limit; see AsyncRunner for ``options``) or
+        "processes" (ProcessPoolExecutor for CPU-bound tasks; see
+        ProcessPoolRunner).
+        """
+        from execution import make_runner
+        return make_runner(self, engine, max_workers, actions, **options).run()
+    
+    async def run_async(self, actions: Optional[Dict[ElementId, Any]] = None, **options):
+        """Run on the current event loop with the asyncio engine."""
+        from execution import AsyncRunner
+        return await AsyncRunner(self, actions=actions, **options).run_async()
+    
+    def compile(self):
+        """Freeze the workflow into an ExecutionPlan for running many instances of it."""
+        # Imported lazily: the plan needs NumPy and the execution module
+        from execution_plan import ExecutionPlan
+        return ExecutionPlan.compile(self)
+    
+    def simulate(self, trials: int = 10_000, workers: Optional[int] = None, distributions=None, **options):
+        """Monte Carlo makespan percentiles and task criticality (see simulation.simulate)."""
+        from simulation import simulate
+        return simulate(self, trials, workers, distributions, **options)
+    
+    def condensation(self) -> Condensation:
+        """The workflow with each cycle collapsed into one node (iterative Tarjan, O(V + E))."""
+        return condense(self.topo_order.order(), self.successor_index)
+    
+    def find_cycles(self) -> List[List[ElementId]]:
+        """Task ids of each cycle; only loaded files can contain them."""
+        if self.topo_order.acyclic:
+            return []
+        return self.condensation().cycles
+    
+    def describe_cycles(self, cycles: List[List[ElementId]], limit: int = 3) -> str:
+        shown = "; ".join("{" + ", ".join(self.tasks[t].name for t in cycle) + "}" for cycle in cycles[:limit])
+        more = f" and {len(cycles) - limit} more" if len(cycles) > limit else ""
+        return f"{len(cycles)} cycle(s) condensed into single steps: {shown}{more}"
+    
+    def descendants(self, task_id: ElementId) -> Set[ElementId]:
+        """All tasks downstream of ``task_id``, across contexts."""
+        return self.reachability.descendants(task_id)
+    
+    def ancestors(self, task_id: ElementId) -> Set[ElementId]:
+        """All tasks upstream of ``task_id``, across contexts."""
+        return self.reachability.ancestors(task_id)
+    
+    def reachable(self, source_id: ElementId, target_id: ElementId) -> bool:
+        """True if ``target_id`` depends (directly or transitively) on ``source_id``."""
+        return self.reachability.reachable(source_id, target_id)
+    
+    def _recount_stats(self):
+        edge_count = sum(len(successors) for successors in self.successor_index.values())
+        status_counts = Counter(task.status for task in self.tasks.values())
+        context_status_counts = {context_id: Counter() for context_id in self.contexts}
+        for task in self.tasks.values():
+            if task.context_id in context_status_counts:
+                context_status_counts[task.context_id][task.status] += 1
+        return edge_count, status_counts, context_status_counts
+    
+    def check_stats(self):
+        """Raise AssertionError if the maintained counters disagree with a full recount."""
+        edge_count, status_counts, context_status_counts = self._recount_stats()
+        if edge_count != self.edge_count:
+            raise AssertionError(f"edge count {self.edge_count} != recount {edge_count}")
         for status in TaskStatus:
-            status_counts[status.value] = sum(1 for task in self.tasks.values() if task.status == status)
+            if status_counts[status] != self.status_counts[status]:
+                raise AssertionError(f"{status.value} count {self.status_counts[status]} != recount {status_counts[status]}")
+        for context_id, counts in context_status_counts.items():
+            maintained = self.context_status_counts.get(context_id, Counter())
+            if +counts != +maintained:
+                raise AssertionError(f"context {context_id} counts {dict(maintained)} != recount {dict(counts)}")
+    
+    def get_workflow_stats(self):
+        with self.lock:
+            if self.verify_stats:
+                self.check_stats()
         
-        total_connections = sum(len(task.successors) for task in self.tasks.values())
+            status_counts = {status.value: self.status_counts[status] for status in TaskStatus}
+            context_task_counts = {
+                context_id: sum(counts.values()) for context_id, counts in self.context_status_counts.items()
+            }
         
         return {
-            'total_contexts': total_contexts,
-            'total_tasks': total_tasks,
-            'total_connections': total_connections,
-            'status_counts': status_counts
+            'total_contexts': len(self.contexts),
+            'total_tasks': len(self.tasks),
+            'total_connections': self.edge_count,
+            'status_counts': status_counts,
+            'context_task_counts': context_task_counts
         }
 
 # Global BPM tool instance
@@ -420,10 +1500,14 @@ def create_gradio_interface():
                     with gr.Row():
                         task_x = gr.Number(label="X", value=0, precision=0)
                         task_y = gr.Number(label="Y", value=0, precision=0)
+                        task_duration = gr.Number(label="Duration", value=None)
+                    task_action = gr.Textbox(label="Action (optional)",
+                                             placeholder="Shell command, or module:function")
                     with gr.Row():
                         add_task_btn = gr.Button("➕ Add Task", variant="primary")
                         delete_task_btn = gr.Button("🗑️ Delete", variant="secondary")
                     task_list = gr.Dropdown(label="Select Task", choices=[], interactive=True)
+                    set_status_btn = gr.Button("🎯 Set Status of Selected Task")
                 
                 # Connection Management
                 with gr.Group():
@@ -434,6 +1518,17 @@ def create_gradio_interface():
                         connect_btn = gr.Button("🔗 Connect", variant="primary")
                         disconnect_btn = gr.Button("✂️ Disconnect", variant="secondary")
                 
+                # Batch Operations
+                with gr.Group():
+                    gr.Markdown("### 📜 Batch Operations")
+                    batch_ops = gr.Textbox(
+                        label="Operations (JSON list)", lines=4,
+                        placeholder='[{"op": "add_context", "name": "Review", "ref": "c"}, '
+                                    '{"op": "add_task", "name": "Check", "context_id": "@c", "status": "delayed"}]'
+                    )
+                    apply_ops_btn = gr.Button("▶️ Apply Batch", variant="primary")
+                    batch_status = gr.Textbox(label="Batch Result", interactive=False)
+                
                 # Canvas Controls
                 with gr.Group():
                     gr.Markdown("### 🎛️ Canvas Controls")
@@ -444,6 +1539,26 @@ def create_gradio_interface():
                     with gr.Row():
                         zoom_fit_btn = gr.Button("📐 Fit to Screen")
                         zoom_reset_btn = gr.Button("🔄 Reset Zoom")
+                    with gr.Row():
+                        pan_x = gr.Number(label="View X", value=0, precision=0)
+                        pan_y = gr.Number(label="View Y", value=0, precision=0)
+                    with gr.Row():
+                        pan_btn = gr.Button("🧭 Pan")
+                        focus_btn = gr.Button("🎯 Focus Context")
+                        show_all_btn = gr.Button("🗺️ Show All")
+                    with gr.Row():
+                        undo_btn = gr.Button("↩️ Undo")
+                        redo_btn = gr.Button("↪️ Redo")
+                    critical_toggle = gr.Checkbox(label="⏱️ Highlight Critical Path", value=False)
+                
+                # Workflow Execution
+                with gr.Group():
+                    gr.Markdown("### 🚀 Execution")
+                    with gr.Row():
+                        run_engine = gr.Dropdown(label="Engine", choices=["threads", "asyncio", "processes"], value="threads")
+                        max_workers = gr.Number(label="Max Workers", value=8, precision=0)
+                    run_btn = gr.Button("▶️ Run Workflow", variant="primary")
+                    run_status = gr.Textbox(label="Run Result", interactive=False)
                 
                 # File Operations
                 with gr.Group():
@@ -452,6 +1567,7 @@ def create_gradio_interface():
                     with gr.Row():
                         save_btn = gr.Button("💾 Save", variant="primary")
                         load_btn = gr.Button("📂 Load", variant="secondary")
+                        export_btn = gr.Button("🖼️ Export SVG", variant="secondary")
                         clear_btn = gr.Button("🗑️ Clear All", variant="stop")
                     file_status = gr.Textbox(label="Status", interactive=False)
             
@@ -478,7 +1594,8 @@ def create_gradio_interface():
                 'failure': '#dc3545', 
                 'skipped': '#6c757d',
                 'delayed': '#fd7e14',
-                'default': '#ffffff'
+                'default': '#ffffff',
+                'running': '#0d6efd'
             }
             
             for status, count in stats['status_counts'].items():
@@ -511,10 +1628,11 @@ def create_gradio_interface():
                 return (update_canvas(), update_stats(), *update_dropdowns())
             return (gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
         
-        def add_task_handler(name, context_id, status, color, x, y):
+        def add_task_handler(name, context_id, status, color, x, y, duration, action):
             if name.strip() and context_id:
                 task_status_enum = TaskStatus(status)
-                bpm_tool.add_task(name.strip(), context_id, x, y, task_status_enum, color)
+                bpm_tool.add_task(name.strip(), context_id, x, y, task_status_enum, color, duration,
+                                  action.strip() or None)
                 return (update_canvas(), update_stats(), *update_dropdowns())
             return (gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
         
@@ -524,9 +1642,19 @@ def create_gradio_interface():
                 return (update_canvas(), update_stats(), *update_dropdowns())
             return (gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
         
+        def set_status_handler(task_id, status):
+            if task_id:
+                # Failures skip and delays delay everything downstream
+                bpm_tool.set_task_status(task_id, TaskStatus(status))
+                return update_canvas(), update_stats()
+            return gr.update(), gr.update()
+        
         def connect_tasks_handler(source_id, target_id):
             if source_id and target_id and source_id != target_id:
-                success = bpm_tool.connect_tasks(source_id, target_id)
+                try:
+                    success = bpm_tool.connect_tasks(source_id, target_id)
+                except CycleError as e:
+                    raise gr.Error(str(e))
                 if success:
                     return update_canvas(), update_stats()
             return gr.update(), gr.update()
@@ -538,10 +1666,69 @@ def create_gradio_interface():
                     return update_canvas(), update_stats()
             return gr.update(), gr.update()
         
+        def apply_ops_handler(ops_json):
+            try:
+                results = bpm_tool.apply_ops(json.loads(ops_json))
+            except (ValueError, TypeError, AttributeError) as e:
+                return (f"❌ Batch rolled back: {str(e)}", gr.update(), gr.update(),
+                        gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
+            return (f"✅ Applied {len(results)} operation(s)", update_canvas(), update_stats(), *update_dropdowns())
+        
+        def run_handler(engine, workers):
+            # Run in the background and redraw once per batch of coalesced status events
+            refreshes = queue.Queue()
+            subscription = bpm_tool.subscribe(refreshes.put, kinds=[event_bus.TASK_STATUS], window=0.25)
+            outcome = {}
+            
+            def work():
+                try:
+                    outcome['result'] = bpm_tool.run(max_workers=int(workers) if workers else None, engine=engine)
+                except Exception as e:
+                    outcome['error'] = e
+                finally:
+                    refreshes.put(None)
+            
+            threading.Thread(target=work, daemon=True).start()
+            try:
+                while True:
+                    finished = refreshes.get() is None
+                    # Skip deliveries that queued up while the last frame was drawn
+                    while not finished and not refreshes.empty():
+                        finished = refreshes.get_nowait() is None
+                    if finished:
+                        break
+                    counts = bpm_tool.status_counts
+                    yield (f"⏳ Running: {counts[TaskStatus.RUNNING]} running, {counts[TaskStatus.SUCCESS]} succeeded",
+                           update_canvas(), update_stats())
+            finally:
+                subscription.close()
+            if 'error' in outcome:
+                yield f"❌ Run failed: {outcome['error']}", update_canvas(), update_stats()
+                return
+            result = outcome['result']
+            status = f"{'✅' if result.ok else '❌'} {result.summary()}"
+            for task_id, error in list(result.errors.items())[:3]:
+                status += f"\n{bpm_tool.tasks[task_id].name}: {error}"
+            yield status, update_canvas(), update_stats()
+        
         def zoom_handler(zoom_value):
             bpm_tool.zoom_level = zoom_value
             return update_canvas()
         
+        def critical_toggle_handler(enabled):
+            bpm_tool.highlight_critical = enabled
+            return update_canvas()
+        
+        def undo_handler():
+            if bpm_tool.undo():
+                return (update_canvas(), update_stats(), *update_dropdowns())
+            return (gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
+        
+        def redo_handler():
+            if bpm_tool.redo():
+                return (update_canvas(), update_stats(), *update_dropdowns())
+            return (gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update())
+        
         def zoom_fit_handler():
             bpm_tool.zoom_level = 0.8
             return update_canvas(), gr.Slider.update(value=0.8)
@@ -550,11 +1737,33 @@ def create_gradio_interface():
             bpm_tool.zoom_level = 1.0
             return update_canvas(), gr.Slider.update(value=1.0)
         
+        def pan_handler(x, y):
+            bpm_tool.set_viewport(x or 0, y or 0)
+            return update_canvas()
+        
+        def focus_handler(context_id):
+            if not context_id or not bpm_tool.focus_context(context_id):
+                return gr.update(), gr.update(), gr.update(), gr.update()
+            # Keep the zoom within the slider's range so the slider can show it
+            bpm_tool.zoom_level = min(max(bpm_tool.zoom_level, 0.3), 3.0)
+            x, y = bpm_tool.viewport
+            return (update_canvas(), gr.Slider.update(value=bpm_tool.zoom_level),
+                    gr.Number.update(value=x), gr.Number.update(value=y))
+        
+        def show_all_handler():
+            bpm_tool.set_viewport(None)
+            return update_canvas()
+        
         def save_handler(filename):
             if not filename.strip():
                 return "❌ Please enter a filename"
             return bpm_tool.save_to_file(filename.strip())
         
+        def export_handler(filename):
+            if not filename.strip():
+                return "❌ Please enter a filename"
+            return bpm_tool.export_svg(os.path.splitext(filename.strip())[0] + ".svg")
+        
         def load_handler(filename):
             if not filename.strip():
                 return "❌ Please enter a filename", gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update()
@@ -562,8 +1771,7 @@ def create_gradio_interface():
             return (status, update_canvas(), update_stats(), *update_dropdowns())
         
         def clear_all_handler():
-            bpm_tool.contexts.clear()
-            bpm_tool.tasks.clear()
+            bpm_tool.clear()
             return (update_canvas(), update_stats(), *update_dropdowns())
         
         # Event handlers
@@ -581,7 +1789,7 @@ def create_gradio_interface():
         
         add_task_btn.click(
             add_task_handler,
-            inputs=[task_name, task_context, task_status, task_color, task_x, task_y],
+            inputs=[task_name, task_context, task_status, task_color, task_x, task_y, task_duration, task_action],
             outputs=[canvas, stats_display, task_context, context_list, task_list, source_task, target_task]
         )
         
@@ -591,6 +1799,12 @@ def create_gradio_interface():
             outputs=[canvas, stats_display, task_context, context_list, task_list, source_task, target_task]
         )
         
+        set_status_btn.click(
+            set_status_handler,
+            inputs=[task_list, task_status],
+            outputs=[canvas, stats_display]
+        )
+        
         connect_btn.click(
             connect_tasks_handler,
             inputs=[source_task, target_task],
@@ -603,12 +1817,40 @@ def create_gradio_interface():
             outputs=[canvas, stats_display]
         )
         
+        apply_ops_btn.click(
+            apply_ops_handler,
+            inputs=[batch_ops],
+            outputs=[batch_status, canvas, stats_display, task_context, context_list, task_list, source_task, target_task]
+        )
+        
+        run_btn.click(
+            run_handler,
+            inputs=[run_engine, max_workers],
+            outputs=[run_status, canvas, stats_display]
+        )
+        
         zoom_slider.change(
             zoom_handler,
             inputs=[zoom_slider],
             outputs=[canvas]
         )
         
+        critical_toggle.change(
+            critical_toggle_handler,
+            inputs=[critical_toggle],
+            outputs=[canvas]
+        )
+        
+        undo_btn.click(
+            undo_handler,
+            outputs=[canvas, stats_display, task_context, context_list, task_list, source_task, target_task]
+        )
+        
+        redo_btn.click(
+            redo_handler,
+            outputs=[canvas, stats_display, task_context, context_list, task_list, source_task, target_task]
+        )
+        
         zoom_fit_btn.click(
             zoom_fit_handler,
             outputs=[canvas, zoom_slider]
@@ -619,12 +1861,35 @@ def create_gradio_interface():
             outputs=[canvas, zoom_slider]
         )
         
+        pan_btn.click(
+            pan_handler,
+            inputs=[pan_x, pan_y],
+            outputs=[canvas]
+        )
+        
+        focus_btn.click(
+            focus_handler,
+            inputs=[context_list],
+            outputs=[canvas, zoom_slider, pan_x, pan_y]
+        )
+        
+        show_all_btn.click(
+            show_all_handler,
+            outputs=[canvas]
+        )
+        
         save_btn.click(
             save_handler,
             inputs=[filename],
             outputs=[file_status]
         )
         
+        export_btn.click(
+            export_handler,
+            inputs=[filename],
+            outputs=[file_status]
+        )
+        
         load_btn.click(
             load_handler,
             inputs=[filename],
@@ -0,0 +1,108 @@
+"""In-process pub/sub for workflow changes, with coalesced delivery.
+
+Subscribers get lists of events, at most one list per time window, and
+only the latest event per (kind, element): a burst of 10k status flips
+arrives as one list with one event per task that changed.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+TASK_ADDED = "task_added"
+TASK_REMOVED = "task_removed"
+TASK_MOVED = "task_moved"
+TASK_STATUS = "task_status"
+TASK_UPDATED = "task_updated"  # Duration, action, retry policy or priority
+EDGE_CHANGED = "edge_changed"  # data: True if the edge now exists
+CONTEXT_ADDED = "context_added"
+CONTEXT_REMOVED = "context_removed"
+CONTEXT_MOVED = "context_moved"
+CONTEXT_UPDATED = "context_updated"
+RESET = "reset"  # The whole workflow was cleared or loaded
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str
+    id: Hashable = None  # Element id, or (source, target) for edges
+    data: Any = None  # New position, status or edge presence
+
+
+class Subscription:
+    """One subscriber's pending events and delivery timer."""
+
+    def __init__(self, bus: 'EventBus', callback: Callable[[List[Event]], None],
+                 kinds: Optional[Iterable[str]], window: float):
+        self.bus = bus
+        self.callback = callback
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        self.window = window
+        self._pending: Dict[Tuple[str, Hashable], Event] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def offer(self, event: Event):
+        if self.kinds is not None and event.kind not in self.kinds:
+            return
+        with self._lock:
+            if event.kind == RESET:
+                # Nothing before a reset matters any more
+                self._pending.clear()
+            self._pending.pop((event.kind, event.id), None)
+            self._pending[(event.kind, event.id)] = event
+            if self.window > 0 and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Deliver the pending events now (if any)."""
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if events:
+            self.callback(events)
+
+    def close(self):
+        """Unsubscribe, delivering whatever is still pending."""
+        self.bus.unsubscribe(self)
+        self.flush()
+
+
+class EventBus:
+    """Fan-out of model events to subscriptions.
+
+    A subscription with ``window`` > 0 is delivered from a timer thread
+    ``window`` seconds after the first event since its last delivery; with
+    ``window`` = 0 it is delivered when the change (or batch) that caused
+    the events completes, on the thread that made it.
+    """
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.subscriptions)
+
+    def subscribe(self, callback: Callable[[List[Event]], None], kinds: Optional[Iterable[str]] = None,
+                  window: float = 0.1) -> Subscription:
+        subscription = Subscription(self, callback, kinds, window)
+        self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def publish(self, kind: str, id: Hashable = None, data: Any = None):
+        event = Event(kind, id, data)
+        for subscription in self.subscriptions:
+            subscription.offer(event)
+
+    def changed(self):
+        """A change or batch completed: deliver to the subscriptions without a window."""
+        for subscription in self.subscriptions:
+            if subscription.window <= 0:
+                subscription.flush()
@@ -0,0 +1,604 @@
+import asyncio
+import heapq
+import inspect
+import math
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from enhanced_bpm_tool import BPMTool, RetryPolicy, Task, TaskStatus
+from id_allocator import ElementId
+from scheduling import ReadyQueue, SchedulingPolicy, get_policy
+from task_worker import ENTRY_POINT, ActionError, SharedOutput, TaskSpec, resolve_action, run_specs
+
+# A task action: a callable taking the Task, a "module:function" entry point or a shell command
+Action = Union[Callable[[Task], Any], str]
+
+
+@dataclass
+class RunResult:
+    """Outcome of one workflow run."""
+    succeeded: List[ElementId] = field(default_factory=list)
+    failed: List[ElementId] = field(default_factory=list)
+    not_run: List[ElementId] = field(default_factory=list)
+    outputs: Dict[ElementId, Any] = field(default_factory=dict)
+    errors: Dict[ElementId, str] = field(default_factory=dict)
+    retries: Dict[ElementId, int] = field(default_factory=dict)  # Tasks that were retried, and how often
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.not_run
+
+    def summary(self) -> str:
+        retried = f", {sum(self.retries.values())} retries" if self.retries else ""
+        return (f"{len(self.succeeded)} succeeded, {len(self.failed)} failed, "
+                f"{len(self.not_run)} not run{retried} in {self.elapsed:.2f}s")
+
+
+class RunState:
+    """In-degree bookkeeping for one run over the task graph.
+
+    The unit of work is a task, or a whole cycle when the workflow was
+    loaded with cycles (its members then run one after another in a single
+    job). ``remaining[unit]`` counts predecessor units that have not yet
+    succeeded; a unit is ready when it reaches zero, so completing a unit
+    only touches its successors. Tasks that are already SUCCESS are kept and
+    not run again.
+    """
+
+    def __init__(self, tool: BPMTool):
+        self.tool = tool
+        if tool.topo_order.acyclic:
+            task_ids = list(tool.tasks)
+            self.units: List[List[ElementId]] = [[task_id] for task_id in task_ids]
+            unit_of = {task_id: index for index, task_id in enumerate(task_ids)}
+            self.successors: List[List[int]] = [
+                [unit_of[s] for s in tool.successor_index[task_id]] for task_id in task_ids]
+        else:
+            condensation = tool.condensation()
+            self.units = condensation.components
+            self.successors = [list(successors) for successors in condensation.successors]
+        self.remaining = [0] * len(self.units)
+        tasks = tool.tasks
+        self.finished = [all(tasks[t].status is TaskStatus.SUCCESS for t in members) for members in self.units]
+        for unit, successors in enumerate(self.successors):
+            if not self.finished[unit]:
+                for successor in successors:
+                    self.remaining[successor] += 1
+        self.ready = [unit for unit in range(len(self.units))
+                      if not self.finished[unit] and self.remaining[unit] == 0]
+
+    def pending_tasks(self) -> List[ElementId]:
+        return [task_id for unit, members in enumerate(self.units) if not self.finished[unit]
+                for task_id in members]
+
+    def complete(self, unit: int) -> List[int]:
+        """Mark ``unit`` as succeeded and return the units it made ready."""
+        self.finished[unit] = True
+        ready = []
+        for successor in self.successors[unit]:
+            self.remaining[successor] -= 1
+            if self.remaining[successor] == 0:
+                ready.append(successor)
+        return ready
+
+
+def run_unit(tasks: List[Tuple[Task, Optional[Callable[[Task], Any]]]]) -> List[Tuple[ElementId, bool, Any]]:
+    """Run a unit's tasks in order; stop at the first failure.
+
+    Returns ``(task id, ok, output or error message)`` for each task that ran.
+    """
+    outcomes = []
+    for task, handler in tasks:
+        try:
+            output = handler(task) if handler is not None else None
+        except BaseException as e:
+            # Even SystemExit and the like: an unreported unit would stall the run
+            outcomes.append((task.id, False, f"{type(e).__name__}: {e}"))
+            break
+        outcomes.append((task.id, True, output))
+    return outcomes
+
+
+class WorkflowRunner:
+    """Base runner: owns the run state and applies outcomes to the model.
+
+    All model updates happen on the calling thread inside
+    ``tool.batch(journal=False)`` (a batch per round of completions), which
+    holds the tool's lock, so renders and stats on other threads never see
+    a half-applied round, and status transitions never reach the undo
+    journal: after a run, Undo still reverts the user's last edit.
+    Backends implement ``_execute``.
+
+    Ready units wait in a ReadyQueue ordered by the scheduling ``policy``
+    (a name from scheduling.POLICIES or a SchedulingPolicy; longest
+    remaining path first by default) and are started as workers free up.
+
+    A failed task with attempts left under its RetryPolicy (``Task.retry``,
+    else the run's ``retry``) turns DELAYED and its unit waits in a heap of
+    retry deadlines; backends wait for the earliest deadline alongside
+    completions, so pending retries cost nothing until they are due.
+    """
+
+    def __init__(self, tool: BPMTool, actions: Optional[Dict[ElementId, Action]] = None, log=None,
+                 retry: Optional[RetryPolicy] = None, policy: Union[str, SchedulingPolicy, None] = None):
+        self.tool = tool
+        # Per-run overrides of Task.action, e.g. callables that cannot be saved
+        self.actions = actions or {}
+        # Optional RunLog receiving every status transition (see run_log.py)
+        self.log = log
+        self.retry = retry
+        self.policy = get_policy(policy)
+        self.ready_queue = ReadyQueue([])
+        self.cancelled = threading.Event()
+        self.result = RunResult()
+        self._handlers: Dict[Action, Callable[[Task], Any]] = {}
+        self._failures: Dict[ElementId, int] = {}
+        # (deadline, unit, task id) of units waiting to retry a failed task
+        self._timers: List[Tuple[float, int, ElementId]] = []
+        self._wake: Callable[[], None] = lambda: None
+
+    def cancel(self):
+        """Stop dispatching new tasks; tasks already running finish."""
+        self.cancelled.set()
+        self._wake()
+
+    def handler(self, task: Task) -> Optional[Callable[[Task], Any]]:
+        action = self.actions.get(task.id, task.action)
+        if action is None:
+            return None
+        if callable(action):
+            return action
+        if action not in self._handlers:
+            self._handlers[action] = resolve_action(action)
+        return self._handlers[action]
+
+    def run(self) -> RunResult:
+        started = time.perf_counter()
+        state = self._prepare()
+        self._execute(state)
+        return self._conclude(state, started)
+
+    def _prepare(self) -> RunState:
+        self.result = RunResult()
+        self._failures = {}
+        self._timers = []
+        state = RunState(self.tool)
+        self.ready_queue = ReadyQueue(self.policy.keys(self.tool, state.units, state.successors))
+        # Re-run everything that did not succeed last time
+        with self.tool.batch(journal=False):
+            for task_id in state.pending_tasks():
+                if self.tool.tasks[task_id].status != TaskStatus.DEFAULT:
+                    self._set_status(task_id, TaskStatus.DEFAULT)
+        return state
+
+    def _set_status(self, task_id: ElementId, status: TaskStatus):
+        self.tool.set_task_status(task_id, status)
+        if self.log is not None:
+            self.log.append({'task': self.tool.id_allocator.external(task_id), 'status': status.value})
+
+    def _conclude(self, state: RunState, started: float) -> RunResult:
+        if self._timers:
+            # Cancelled while waiting to retry: the last attempt stands
+            with self.tool.batch(journal=False):
+                for _, _, task_id in self._timers:
+                    self.result.failed.append(task_id)
+                    self._set_status(task_id, TaskStatus.FAILURE)
+            self._timers = []
+        self.result.not_run = [task_id for task_id in state.pending_tasks()
+                               if task_id not in self.result.errors]
+        self.result.elapsed = time.perf_counter() - started
+        return self.result
+
+    def _execute(self, state: RunState):
+        raise NotImplementedError
+
+    def _waiting(self) -> bool:
+        """True while retries are pending and the run was not cancelled."""
+        return bool(self._timers) and not self.cancelled.is_set()
+
+    def _next_timeout(self) -> Optional[float]:
+        """Seconds until the earliest retry is due; None if none is pending."""
+        if not self._timers:
+            return None
+        return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _due_retries(self) -> List[int]:
+        """Pop the units whose retry is due."""
+        now = time.monotonic()
+        due = []
+        while self._timers and self._timers[0][0] <= now:
+            due.append(heapq.heappop(self._timers)[1])
+        due = list(dict.fromkeys(due))
+        # A unit that failed several tasks at once (a failed chunk) has a timer per task; it retries once
+        pending = set(due)
+        if any(unit in pending for _, unit, _ in self._timers):
+            self._timers = [timer for timer in self._timers if timer[1] not in pending]
+            heapq.heapify(self._timers)
+        return due
+
+    @staticmethod
+    def _drain(completions: queue.Queue, timeout: Optional[float]) -> list:
+        """Wait up to ``timeout`` for a completion, then take every one already queued."""
+        try:
+            done = [completions.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                done.append(completions.get_nowait())
+            except queue.Empty:
+                break
+        # None only wakes the loop (see cancel)
+        return [item for item in done if item is not None]
+
+    def _start(self, state: RunState, unit: int) -> List[Tuple[Task, Optional[Callable[[Task], Any]]]]:
+        """Mark a ready unit RUNNING and return its (task, handler) pairs."""
+        tasks = self._unit_tasks(state, unit)
+        for task, _ in tasks:
+            self._set_status(task.id, TaskStatus.RUNNING)
+        return tasks
+
+    def _unit_tasks(self, state: RunState, unit: int) -> List[Tuple[Task, Optional[Callable[[Task], Any]]]]:
+        tasks = []
+        for task_id in state.units[unit]:
+            task = self.tool.tasks[task_id]
+            if task.status is TaskStatus.SUCCESS:
+                # Cycle members that succeeded before a retry
+                continue
+            tasks.append((task, self.handler(task)))
+        return tasks
+
+    def _finish(self, state: RunState, unit: int, outcomes: List[Tuple[ElementId, bool, Any]]) -> List[int]:
+        """Apply a unit's outcomes and return the units it made ready."""
+        for task_id, ok, value in outcomes:
+            self._apply_outcome(unit, task_id, ok, value)
+        return self._close_unit(state, unit, {task_id for task_id, _, _ in outcomes})
+
+    def _apply_outcome(self, unit: int, task_id: ElementId, ok: bool, value: Any):
+        if ok:
+            self.result.succeeded.append(task_id)
+            self.result.errors.pop(task_id, None)
+            if value is not None:
+                self.result.outputs[task_id] = value
+            self._set_status(task_id, TaskStatus.SUCCESS)
+        else:
+            self.result.errors[task_id] = value
+            if self._retry_later(unit, task_id):
+                self._set_status(task_id, TaskStatus.DELAYED)
+            else:
+                self.result.failed.append(task_id)
+                self._set_status(task_id, TaskStatus.FAILURE)
+
+    def _close_unit(self, state: RunState, unit: int, ran: Set[ElementId]) -> List[int]:
+        """Reset the unit's members that never ran; return the units it made ready if it succeeded."""
+        tasks = self.tool.tasks
+        for task_id in state.units[unit]:
+            if task_id not in ran and tasks[task_id].status is TaskStatus.RUNNING:
+                # Cycle members after a failure never started
+                self._set_status(task_id, TaskStatus.DEFAULT)
+        if all(tasks[task_id].status is TaskStatus.SUCCESS for task_id in state.units[unit]):
+            return state.complete(unit)
+        return []
+
+    def _retry_later(self, unit: int, task_id: ElementId) -> bool:
+        """Schedule a retry of ``unit`` if the failed task has attempts left."""
+        policy = self.tool.tasks[task_id].retry or self.retry
+        failures = self._failures[task_id] = self._failures.get(task_id, 0) + 1
+        if policy is None or failures >= policy.max_attempts or self.cancelled.is_set():
+            return False
+        self.result.retries[task_id] = failures
+        heapq.heappush(self._timers, (time.monotonic() + policy.delay(failures), unit, task_id))
+        return True
+
+
+class ThreadPoolRunner(WorkflowRunner):
+    """Runs ready tasks on a ThreadPoolExecutor, at most ``max_workers`` at a time."""
+
+    def __init__(self, tool: BPMTool, max_workers: Optional[int] = None,
+                 actions: Optional[Dict[ElementId, Action]] = None, log=None,
+                 retry: Optional[RetryPolicy] = None, policy: Union[str, SchedulingPolicy, None] = None):
+        super().__init__(tool, actions, log, retry, policy)
+        self.max_workers = max_workers
+
+    def _execute(self, state: RunState):
+        completions: queue.Queue = queue.Queue()
+        self._wake = lambda: completions.put(None)
+        # ThreadPoolExecutor's default; units beyond it wait in the ready queue, not the pool's
+        workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        in_flight = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def dispatch():
+                nonlocal in_flight
+                while in_flight < workers and self.ready_queue and not self.cancelled.is_set():
+                    unit = self.ready_queue.pop()
+                    future = pool.submit(run_unit, self._start(state, unit))
+                    future.add_done_callback(lambda f, unit=unit: completions.put((unit, f.result())))
+                    in_flight += 1
+
+            with self.tool.batch(journal=False):
+                self.ready_queue.push(state.ready)
+                dispatch()
+            while in_flight or self._waiting():
+                # Apply every completion that is already waiting in one batch
+                done = self._drain(completions, self._next_timeout())
+                in_flight -= len(done)
+                with self.tool.batch(journal=False):
+                    for unit, outcomes in done:
+                        self.ready_queue.push(self._finish(state, unit, outcomes))
+                    self.ready_queue.push(self._due_retries())
+                    dispatch()
+
+
+class AsyncRunner(WorkflowRunner):
+    """Runs the workflow as asyncio tasks on one event loop.
+
+    Each context gets its own semaphore, so a busy context cannot starve
+    the others: the limit is ``context_limits[context_id]``, else
+    ``Context.concurrency``, else ``default_limit`` (None = unlimited).
+    A task shows RUNNING only while it holds its context's slot, so the
+    model never has more tasks of a context running than its limit.
+    Coroutine handlers are awaited, shell commands run as asyncio
+    subprocesses and plain callables run in the loop's default thread pool.
+    With ``fail_fast``, the first FAILURE cancels every task still running;
+    cancelled tasks are reported as not run.
+    """
+
+    def __init__(self, tool: BPMTool, context_limits: Optional[Dict[ElementId, int]] = None,
+                 default_limit: Optional[int] = None, fail_fast: bool = False,
+                 actions: Optional[Dict[ElementId, Action]] = None, log=None,
+                 retry: Optional[RetryPolicy] = None, policy: Union[str, SchedulingPolicy, None] = None):
+        super().__init__(tool, actions, log, retry, policy)
+        self.context_limits = context_limits or {}
+        self.default_limit = default_limit
+        self.fail_fast = fail_fast
+        self._semaphores: Dict[ElementId, Optional[asyncio.Semaphore]] = {}
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def run(self) -> RunResult:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> RunResult:
+        started = time.perf_counter()
+        state = self._prepare()
+        await self._execute_async(state)
+        return self._conclude(state, started)
+
+    def cancel(self):
+        """Stop dispatching and cancel the tasks that are running (thread-safe)."""
+        super().cancel()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._cancel_jobs)
+
+    def _cancel_jobs(self):
+        for job in self._jobs.values():
+            job.cancel()
+
+    def handler(self, task: Task) -> Optional[Callable[[Task], Any]]:
+        action = self.actions.get(task.id, task.action)
+        if isinstance(action, str) and not ENTRY_POINT.match(action):
+            async def shell(task: Task, command: str = action):
+                return await run_shell_async(command)
+            return shell
+        return super().handler(task)
+
+    def _start(self, state: RunState, unit: int) -> List[Tuple[Task, Optional[Callable[[Task], Any]]]]:
+        # Tasks turn RUNNING once they hold their context's semaphore (see _run_unit)
+        return self._unit_tasks(state, unit)
+
+    def _semaphore(self, context_id: ElementId) -> Optional[asyncio.Semaphore]:
+        if context_id not in self._semaphores:
+            limit = self.context_limits.get(context_id)
+            if limit is None and context_id in self.tool.contexts:
+                limit = self.tool.contexts[context_id].concurrency
+            if limit is None:
+                limit = self.default_limit
+            self._semaphores[context_id] = asyncio.Semaphore(limit) if limit else None
+        return self._semaphores[context_id]
+
+    async def _run_unit(self, unit: int, tasks: List[Tuple[Task, Optional[Callable[[Task], Any]]]],
+                        outcomes: List[Tuple[ElementId, bool, Any]]):
+        loop = asyncio.get_running_loop()
+        for task, handler in tasks:
+            semaphore = self._semaphore(task.context_id)
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                with self.tool.batch(journal=False):
+                    self._set_status(task.id, TaskStatus.RUNNING)
+                try:
+                    if handler is None:
+                        output = None
+                    elif inspect.iscoroutinefunction(handler):
+                        output = await handler(task)
+                    else:
+                        output = await loop.run_in_executor(None, handler, task)
+                    if inspect.isawaitable(output):
+                        output = await output
+                except Exception as e:
+                    outcome = (task.id, False, f"{type(e).__name__}: {e}")
+                else:
+                    outcome = (task.id, True, output)
+                # Applied while the slot is held, so no more tasks show RUNNING than the limit allows
+                with self.tool.batch(journal=False):
+                    self._apply_outcome(unit, *outcome)
+                outcomes.append(outcome)
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+            if not outcome[1]:
+                return
+
+    async def _execute_async(self, state: RunState):
+        self._loop = loop = asyncio.get_running_loop()
+        completions: asyncio.Queue = asyncio.Queue()
+        self._wake = lambda: loop.call_soon_threadsafe(completions.put_nowait, None)
+
+        async def job(unit: int, tasks):
+            outcomes = []
+            try:
+                await self._run_unit(unit, tasks, outcomes)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                completions.put_nowait((unit, outcomes))
+
+        def submit(units: List[int]):
+            # Every ready unit starts at once; the policy decides the order in
+            # which they queue on their context's semaphore
+            self.ready_queue.push(units)
+            while self.ready_queue:
+                unit = self.ready_queue.pop()
+                self._jobs[unit] = asyncio.ensure_future(job(unit, self._start(state, unit)))
+
+        with self.tool.batch(journal=False):
+            submit(state.ready)
+        # Jobs apply their tasks' outcomes as they finish; this loop settles whole units
+        failures = 0
+        try:
+            while self._jobs or self._waiting():
+                if self._timers:
+                    try:
+                        done = [await asyncio.wait_for(completions.get(), self._next_timeout())]
+                    except asyncio.TimeoutError:
+                        done = []
+                else:
+                    done = [await completions.get()]
+                while not completions.empty():
+                    done.append(completions.get_nowait())
+                with self.tool.batch(journal=False):
+                    ready = []
+                    for unit, outcomes in filter(None, done):
+                        del self._jobs[unit]
+                        ready.extend(self._close_unit(state, unit, {task_id for task_id, _, _ in outcomes}))
+                    if len(self.result.failed) > failures and self.fail_fast:
+                        self.cancelled.set()
+                        self._cancel_jobs()
+                    failures = len(self.result.failed)
+                    if not self.cancelled.is_set():
+                        submit(ready + self._due_retries())
+        finally:
+            self._loop = None
+            self._wake = lambda: None
+
+
+async def run_shell_async(command: str) -> str:
+    # On POSIX the shell gets its own process group so cancelling also kills its children
+    posix = os.name == 'posix'
+    process = await asyncio.create_subprocess_shell(
+        command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=posix)
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        if posix:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        await process.wait()
+        raise
+    if process.returncode != 0:
+        raise ActionError(f"exit {process.returncode}: {stderr.decode().strip()}")
+    return stdout.decode()
+
+
+class ProcessPoolRunner(WorkflowRunner):
+    """Runs CPU-bound tasks on a ProcessPoolExecutor.
+
+    Tasks travel as picklable TaskSpecs, so actions must be strings or
+    module-level functions; handlers receive the spec, whose ``inputs`` hold
+    the outputs of the task's predecessors. Ready units are sent in chunks
+    (up to ``chunk_size``, fewer when little is ready) to amortize the
+    per-submission overhead of many small tasks. Outputs of at least
+    ``shared_memory_threshold`` bytes (bytes or NumPy arrays) stay in
+    shared memory and only a handle is passed to dependents; they are
+    copied out into ``RunResult.outputs`` once at the end of the run.
+    At most two chunks per worker are in flight, so the scheduling policy
+    still decides which ready units go next.
+    """
+
+    def __init__(self, tool: BPMTool, max_workers: Optional[int] = None, chunk_size: int = 64,
+                 shared_memory_threshold: int = 1 << 20, actions: Optional[Dict[ElementId, Action]] = None,
+                 log=None, retry: Optional[RetryPolicy] = None,
+                 policy: Union[str, SchedulingPolicy, None] = None):
+        super().__init__(tool, actions, log, retry, policy)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.shared_memory_threshold = shared_memory_threshold
+
+    def _spec(self, state: RunState, unit: int) -> List[TaskSpec]:
+        specs = []
+        outputs = self.result.outputs
+        for task_id in state.units[unit]:
+            task = self.tool.tasks[task_id]
+            if task.status is TaskStatus.SUCCESS:
+                continue
+            self._set_status(task_id, TaskStatus.RUNNING)
+            inputs = {p: outputs[p] for p in self.tool.predecessor_index[task_id] if p in outputs}
+            specs.append(TaskSpec(task_id, task.name, task.context_id,
+                                  self.actions.get(task_id, task.action), task.duration, inputs))
+        return specs
+
+    def _execute(self, state: RunState):
+        completions: queue.Queue = queue.Queue()
+        self._wake = lambda: completions.put(None)
+        in_flight = 0
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                def dispatch():
+                    nonlocal in_flight
+                    queued = self.ready_queue
+                    # Enough chunks to keep every worker busy, none larger than chunk_size
+                    size = min(self.chunk_size, max(1, math.ceil(len(queued) / (4 * self.max_workers))))
+                    while in_flight < 2 * self.max_workers and queued and not self.cancelled.is_set():
+                        units = [queued.pop() for _ in range(min(size, len(queued)))]
+                        chunk = [(unit, self._spec(state, unit)) for unit in units]
+                        future = pool.submit(run_specs, chunk, self.shared_memory_threshold)
+                        future.add_done_callback(lambda f, chunk=chunk: completions.put((chunk, f)))
+                        in_flight += 1
+
+                with self.tool.batch(journal=False):
+                    self.ready_queue.push(state.ready)
+                    dispatch()
+                while in_flight or self._waiting():
+                    done = self._drain(completions, self._next_timeout())
+                    in_flight -= len(done)
+                    with self.tool.batch(journal=False):
+                        for chunk, future in done:
+                            for unit, outcomes in self._chunk_outcomes(chunk, future):
+                                self.ready_queue.push(self._finish(state, unit, outcomes))
+                        self.ready_queue.push(self._due_retries())
+                        dispatch()
+        finally:
+            for task_id, value in list(self.result.outputs.items()):
+                if isinstance(value, SharedOutput):
+                    self.result.outputs[task_id] = value.load()
+                    value.unlink()
+
+    @staticmethod
+    def _chunk_outcomes(chunk: List[Tuple[int, List[TaskSpec]]], future) -> List[Tuple[int, list]]:
+        error = future.exception()
+        if error is None:
+            return future.result()
+        # The chunk never ran (e.g. an unpicklable action or a crashed worker): all of it failed
+        message = f"{type(error).__name__}: {error}"
+        return [(unit, [(spec.id, False, message) for spec in specs]) for unit, specs in chunk]
+
+
+def make_runner(tool: BPMTool, engine: str = "threads", max_workers: Optional[int] = None,
+                actions: Optional[Dict[ElementId, Action]] = None, **options) -> WorkflowRunner:
+    """Create the runner for ``engine`` ("threads", "asyncio" or "processes")."""
+    if engine == "threads":
+        return ThreadPoolRunner(tool, max_workers, actions, **options)
+    if engine == "asyncio":
+        return AsyncRunner(tool, default_limit=max_workers, actions=actions, **options)
+    if engine == "processes":
+        return ProcessPoolRunner(tool, max_workers, actions=actions, **options)
+    raise ValueError(f"Unknown execution engine: {engine!r}")
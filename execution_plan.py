@@ -0,0 +1,264 @@
+"""Compiled execution plans for running one workflow definition many times.
+
+``BPMTool.compile()`` freezes the task graph into an ExecutionPlan: units
+(tasks, or whole cycles) in topological order, their successors as CSR
+arrays and the initial in-degree vector. Starting an instance only copies
+that vector, so repeated runs never walk the model's dicts again.
+"""
+import heapq
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from enhanced_bpm_tool import BPMTool, RetryPolicy
+from execution import Action, RunResult, WorkflowRunner, run_unit
+from id_allocator import ElementId
+from scheduling import ReadyQueue, SchedulingPolicy, get_policy
+from task_worker import TaskSpec, resolve_action
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """An immutable snapshot of a workflow's structure and actions.
+
+    Rows are tasks in topological order. A unit is one task, or a whole
+    cycle when the workflow was loaded with cycles (its members then run
+    one after another). ``indptr``/``indices`` hold each unit's successor
+    units and ``in_degree`` how many predecessors each unit waits for.
+    Edits to the tool after compiling do not affect the plan, including the
+    priorities and context weights that scheduling policies read.
+    """
+    task_ids: Tuple[ElementId, ...]
+    names: Tuple[str, ...]
+    context_ids: Tuple[ElementId, ...]
+    actions: Tuple[Optional[Action], ...]
+    durations: Tuple[Optional[float], ...]
+    retry: Tuple[Optional[RetryPolicy], ...]
+    priorities: Tuple[float, ...]
+    context_weights: Mapping[ElementId, float]
+    units: Tuple[Tuple[int, ...], ...]  # Rows of each unit
+    indptr: np.ndarray
+    indices: np.ndarray
+    in_degree: np.ndarray
+    # Per-unit successor tuples and the units with no predecessors, for the dispatch loop
+    successors: Tuple[Tuple[int, ...], ...] = field(repr=False)
+    sources: Tuple[int, ...] = field(repr=False)
+    # Unit keys per scheduling policy, filled on first use
+    _policy_keys: Dict[SchedulingPolicy, List[Any]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @classmethod
+    def compile(cls, tool: BPMTool) -> 'ExecutionPlan':
+        if tool.topo_order.acyclic:
+            components = [[task_id] for task_id in tool.topo_order.order()]
+            condensation = None
+        else:
+            condensation = tool.condensation()
+            components = condensation.components
+        task_ids = tuple(task_id for members in components for task_id in members)
+        row = {task_id: index for index, task_id in enumerate(task_ids)}
+        units = []
+        start = 0
+        for members in components:
+            units.append(tuple(range(start, start + len(members))))
+            start += len(members)
+        if condensation is None:
+            successor_index = tool.successor_index
+            successors = tuple(tuple(sorted(row[s] for s in successor_index[task_id])) for task_id in task_ids)
+        else:
+            successors = tuple(tuple(sorted(targets)) for targets in condensation.successors)
+
+        indptr = np.zeros(len(units) + 1, dtype=np.int64)
+        np.cumsum([len(targets) for targets in successors], out=indptr[1:])
+        indices = np.fromiter((t for targets in successors for t in targets), dtype=np.int64, count=int(indptr[-1]))
+        in_degree = np.bincount(indices, minlength=len(units)).astype(np.int64)
+
+        tasks = [tool.tasks[task_id] for task_id in task_ids]
+        return cls(
+            task_ids=task_ids,
+            names=tuple(task.name for task in tasks),
+            context_ids=tuple(task.context_id for task in tasks),
+            actions=tuple(task.action for task in tasks),
+            durations=tuple(task.duration for task in tasks),
+            retry=tuple(task.retry for task in tasks),
+            priorities=tuple(task.priority for task in tasks),
+            context_weights=MappingProxyType({context_id: context.weight for context_id, context in tool.contexts.items()}),
+            units=tuple(units),
+            indptr=_frozen(indptr),
+            indices=_frozen(indices),
+            in_degree=_frozen(in_degree),
+            successors=successors,
+            sources=tuple(np.flatnonzero(in_degree == 0).tolist()),
+        )
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def start(self) -> 'PlanInstance':
+        return PlanInstance(self)
+
+    def spec(self, row: int) -> TaskSpec:
+        """What a handler receives for the task in ``row``."""
+        return TaskSpec(self.task_ids[row], self.names[row], self.context_ids[row],
+                        self.actions[row], self.durations[row])
+
+    def run(self, actions: Optional[Dict[ElementId, Action]] = None, max_workers: Optional[int] = None,
+            retry: Optional[RetryPolicy] = None, policy: Union[str, SchedulingPolicy, None] = None) -> RunResult:
+        """Run one instance on a thread pool; the tool's statuses are not touched."""
+        return PlanRunner(self, actions, max_workers, retry, policy).run()
+
+    def policy_keys(self, policy: Union[str, SchedulingPolicy, None] = None) -> List[Any]:
+        """Each unit's sort key under ``policy``, computed from the plan's snapshot.
+
+        Policies read ``tool.tasks`` and ``tool.contexts``; they get stand-ins
+        holding the compiled fields instead of the live model. Keys are
+        computed once per plan and policy.
+        """
+        policy = get_policy(policy)
+        if policy in self._policy_keys:
+            return self._policy_keys[policy]
+        tasks = {
+            task_id: SimpleNamespace(context_id=context_id, duration=duration, priority=priority)
+            for task_id, context_id, duration, priority in zip(self.task_ids, self.context_ids, self.durations, self.priorities)
+        }
+        contexts = {context_id: SimpleNamespace(weight=weight) for context_id, weight in self.context_weights.items()}
+        units = [[self.task_ids[row] for row in rows] for rows in self.units]
+        keys = self._policy_keys[policy] = policy.keys(SimpleNamespace(tasks=tasks, contexts=contexts), units, self.successors)
+        return keys
+
+
+class PlanInstance:
+    """One run of a plan: a private copy of the in-degree vector."""
+    __slots__ = ('plan', 'remaining')
+
+    def __init__(self, plan: ExecutionPlan):
+        self.plan = plan
+        self.remaining = plan.in_degree.tolist()
+
+    def ready(self) -> List[int]:
+        """Units that can start right away."""
+        return list(self.plan.sources)
+
+    def complete(self, unit: int) -> List[int]:
+        """Mark ``unit`` as succeeded and return the units it made ready."""
+        remaining = self.remaining
+        ready = []
+        for successor in self.plan.successors[unit]:
+            remaining[successor] -= 1
+            if remaining[successor] == 0:
+                ready.append(successor)
+        return ready
+
+
+class PlanRunner:
+    """Runs one plan instance on a ThreadPoolExecutor.
+
+    Works like ThreadPoolRunner without a model: handlers receive the
+    task's TaskSpec, completions are applied on the calling thread, ready
+    units start in the order of the scheduling ``policy`` as workers free
+    up, and failed tasks are retried under their RetryPolicy (else ``retry``).
+    """
+
+    def __init__(self, plan: ExecutionPlan, actions: Optional[Dict[ElementId, Action]] = None,
+                 max_workers: Optional[int] = None, retry: Optional[RetryPolicy] = None,
+                 policy: Union[str, SchedulingPolicy, None] = None):
+        self.plan = plan
+        self.actions = actions or {}
+        self.max_workers = max_workers
+        self.retry = retry
+        self.policy = get_policy(policy)
+        self.cancelled = threading.Event()
+        self.result = RunResult()
+        self._handlers: Dict[Action, Callable[[Any], Any]] = {}
+        self._completions: queue.Queue = queue.Queue()
+
+    def cancel(self):
+        """Stop dispatching; running tasks finish and pending retries count as failed."""
+        self.cancelled.set()
+        # Wake a loop that is waiting for a retry deadline
+        self._completions.put(None)
+
+    def _handler(self, row: int) -> Optional[Callable[[Any], Any]]:
+        action = self.actions.get(self.plan.task_ids[row], self.plan.actions[row])
+        if action is None:
+            return None
+        if callable(action):
+            return action
+        if action not in self._handlers:
+            self._handlers[action] = resolve_action(action)
+        return self._handlers[action]
+
+    def run(self) -> RunResult:
+        started = time.perf_counter()
+        plan = self.plan
+        instance = plan.start()
+        self.result = result = RunResult()
+        failures: Dict[ElementId, int] = {}
+        timers: List[Tuple[float, int]] = []
+        # First row of each unit that has not succeeded yet (cycles resume at the failed member)
+        resume = [0] * len(plan.units)
+        completions = self._completions
+        ready_queue = ReadyQueue(plan.policy_keys(self.policy))
+        # ThreadPoolExecutor's default; units beyond it wait in the ready queue, not the pool's
+        workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        in_flight = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def dispatch():
+                nonlocal in_flight
+                while in_flight < workers and ready_queue and not self.cancelled.is_set():
+                    unit = ready_queue.pop()
+                    tasks = [(plan.spec(row), self._handler(row)) for row in plan.units[unit][resume[unit]:]]
+                    future = pool.submit(run_unit, tasks)
+                    future.add_done_callback(lambda f, unit=unit: completions.put((unit, f.result())))
+                    in_flight += 1
+
+            ready_queue.push(instance.ready())
+            dispatch()
+            while in_flight or (timers and not self.cancelled.is_set()):
+                timeout = max(0.0, timers[0][0] - time.monotonic()) if timers else None
+                done = WorkflowRunner._drain(completions, timeout)
+                in_flight -= len(done)
+                ready = []
+                for unit, outcomes in done:
+                    resume[unit] += sum(1 for _, ok, _ in outcomes if ok)
+                    for task_id, ok, value in outcomes:
+                        if ok:
+                            result.succeeded.append(task_id)
+                            result.errors.pop(task_id, None)
+                            if value is not None:
+                                result.outputs[task_id] = value
+                            continue
+                        result.errors[task_id] = value
+                        row = plan.units[unit][resume[unit]]
+                        policy = plan.retry[row] or self.retry
+                        failures[task_id] = failures.get(task_id, 0) + 1
+                        if policy is not None and failures[task_id] < policy.max_attempts and not self.cancelled.is_set():
+                            result.retries[task_id] = failures[task_id]
+                            heapq.heappush(timers, (time.monotonic() + policy.delay(failures[task_id]), unit))
+                        else:
+                            result.failed.append(task_id)
+                    if resume[unit] == len(plan.units[unit]):
+                        ready.extend(instance.complete(unit))
+                now = time.monotonic()
+                while timers and timers[0][0] <= now and not self.cancelled.is_set():
+                    ready.append(heapq.heappop(timers)[1])
+                ready_queue.push(ready)
+                dispatch()
+        for _, unit in timers:
+            result.failed.append(plan.task_ids[plan.units[unit][resume[unit]]])
+        finished = set(result.succeeded)
+        finished.update(result.failed)
+        result.not_run = [task_id for task_id in plan.task_ids if task_id not in finished]
+        result.elapsed = time.perf_counter() - started
+        return result
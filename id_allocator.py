@@ -0,0 +1,86 @@
+import uuid
+from typing import Dict, Hashable, Optional, Union
+
+# Element ids are ints with IntegerIdAllocator and strings with UUIDAllocator
+ElementId = Union[int, str]
+
+
+class UUIDAllocator:
+    """Legacy allocator: every element gets a random uuid4 string."""
+
+    def allocate(self) -> str:
+        return str(uuid.uuid4())
+
+    def register(self, external_id: str) -> str:
+        return external_id
+
+    def lookup(self, external_id: str) -> Optional[str]:
+        return external_id
+
+    def internal(self, external_id: str) -> Optional[str]:
+        return external_id
+
+    def external(self, element_id: str) -> str:
+        return element_id
+
+    def reset(self):
+        pass
+
+
+class IntegerIdAllocator:
+    """Hands out dense integer ids and remembers external ids from imported files.
+
+    Natively allocated ids export as their decimal string ("42"). Ids read from
+    a file (uuid strings, "task-001", ...) are mapped to a fresh integer and
+    exported unchanged, so existing files round-trip byte-for-byte.
+    """
+
+    def __init__(self):
+        # Start at 1 so every id is truthy (UI handlers test `if task_id:`)
+        self._next = 1
+        self._external: Dict[int, str] = {}
+        self._internal: Dict[str, int] = {}
+
+    def allocate(self) -> int:
+        element_id = self._next
+        self._next += 1
+        return element_id
+
+    def register(self, external_id: Hashable) -> int:
+        external_id = str(external_id)
+        element_id = self._internal.get(external_id)
+        if element_id is not None:
+            return element_id
+        # Our own exports ("42") come back as the same integer when it is still free
+        if external_id.isdigit() and str(int(external_id)) == external_id:
+            element_id = int(external_id)
+            if element_id >= self._next:
+                self._next = element_id + 1
+                self._internal[external_id] = element_id
+                return element_id
+        element_id = self.allocate()
+        self._external[element_id] = external_id
+        self._internal[external_id] = element_id
+        return element_id
+
+    def lookup(self, external_id: Hashable) -> Optional[int]:
+        return self._internal.get(str(external_id))
+
+    def external(self, element_id: int) -> str:
+        return self._external.get(element_id) or str(element_id)
+
+    def internal(self, external_id: Hashable) -> Optional[int]:
+        """Inverse of ``external``: the id an exported id stands for, or None."""
+        external_id = str(external_id)
+        element_id = self._internal.get(external_id)
+        if element_id is None and external_id.isdigit() and str(int(external_id)) == external_id:
+            element_id = int(external_id)
+            if element_id in self._external:
+                # Exported under its file id, not as "42"
+                return None
+        return element_id
+
+    def reset(self):
+        self._next = 1
+        self._external.clear()
+        self._internal.clear()
@@ -0,0 +1,126 @@
+"""Columnar state for running one compiled workflow across many instances.
+
+Each instance (an order, a sign-up, ...) is a row of a 2-D status matrix
+with one column per task, so 100k instances of a 50-task workflow take
+5 MB and every step advances all of them with a handful of array ops.
+"""
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from critical_path import _gather
+from enhanced_bpm_tool import TaskStatus
+from execution_plan import ExecutionPlan
+from id_allocator import ElementId
+
+# Status matrix codes: the position of each status in TaskStatus
+STATUS_CODES = tuple(TaskStatus)
+CODE = {status: code for code, status in enumerate(STATUS_CODES)}
+DEFAULT, RUNNING, SUCCESS, FAILURE, SKIPPED = (CODE[s] for s in (
+    TaskStatus.DEFAULT, TaskStatus.RUNNING, TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.SKIPPED))
+
+# execute(store, instances, units) -> bool array (True = succeeded), or None if all succeeded
+Executor = Callable[['InstanceStore', np.ndarray, np.ndarray], Optional[np.ndarray]]
+
+
+class InstanceStore:
+    """Task statuses of many instances of one ExecutionPlan.
+
+    ``status[i, row]`` is the status code (see STATUS_CODES) of the task in
+    plan row ``row`` for instance ``i``; ``remaining[i, unit]`` counts the
+    unit's predecessors that have not succeeded yet. ``step`` takes every
+    ready (instance, unit) pair at once, so the Python overhead is per step
+    rather than per instance. A failure skips everything downstream of it
+    in that instance only.
+    """
+
+    def __init__(self, plan: ExecutionPlan, instances: int):
+        self.plan = plan
+        self.status = np.full((instances, len(plan)), DEFAULT, dtype=np.uint8)
+        self.remaining = np.tile(plan.in_degree.astype(np.int32), (instances, 1))
+        sizes = np.array([len(rows) for rows in plan.units], dtype=np.int64)
+        # Units cover consecutive rows; this CSR maps each unit to its rows
+        self._unit_indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self._unit_indptr[1:])
+        self._first_row = self._unit_indptr[:-1]
+        self._rows = np.arange(len(plan), dtype=np.int64)
+
+    @property
+    def instances(self) -> int:
+        return self.status.shape[0]
+
+    def ready(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(instances, units) of every unit whose predecessors all succeeded and that has not started."""
+        mask = (self.remaining == 0) & (self.status[:, self._first_row] == DEFAULT)
+        return np.nonzero(mask)
+
+    def start(self, instances: np.ndarray, units: np.ndarray):
+        self._set(instances, units, RUNNING)
+
+    def complete(self, instances: np.ndarray, units: np.ndarray, ok: Optional[np.ndarray] = None):
+        """Record finished units; ``ok`` marks the ones that succeeded (default: all)."""
+        if ok is None:
+            ok = np.ones(len(units), dtype=bool)
+        done_instances, done_units = instances[ok], units[ok]
+        self._set(done_instances, done_units, SUCCESS)
+        counts = self.plan.indptr[done_units + 1] - self.plan.indptr[done_units]
+        _, successors = _gather(self.plan.indptr, self.plan.indices, done_units)
+        if len(successors):
+            flat = np.repeat(done_instances, counts) * self.remaining.shape[1] + successors
+            # A unit may lose several predecessors in one step
+            cells, decrements = np.unique(flat, return_counts=True)
+            self.remaining.ravel()[cells] -= decrements.astype(np.int32)
+        failed = ~ok
+        if failed.any():
+            self._set(instances[failed], units[failed], FAILURE)
+            self._skip_downstream(instances[failed], units[failed])
+
+    def step(self, execute: Optional[Executor] = None) -> int:
+        """Run every ready unit of every instance; returns how many ran."""
+        instances, units = self.ready()
+        if not len(units):
+            return 0
+        self.start(instances, units)
+        ok = execute(self, instances, units) if execute is not None else None
+        self.complete(instances, units, None if ok is None else np.asarray(ok, dtype=bool))
+        return len(units)
+
+    def run(self, execute: Optional[Executor] = None) -> int:
+        """Step until no instance has a ready unit; returns the number of steps."""
+        steps = 0
+        while self.step(execute):
+            steps += 1
+        return steps
+
+    def counts(self) -> np.ndarray:
+        """(tasks x statuses) matrix: how many instances have each task in each status."""
+        return np.stack([(self.status == code).sum(axis=0) for code in range(len(STATUS_CODES))], axis=1)
+
+    def task_counts(self) -> Dict[ElementId, Counter]:
+        """Status counts per task id, e.g. for ``BPMTool.show_instances``."""
+        counts = self.counts().tolist()
+        return {task_id: Counter({status: n for status, n in zip(STATUS_CODES, row) if n})
+                for task_id, row in zip(self.plan.task_ids, counts)}
+
+    def _set(self, instances: np.ndarray, units: np.ndarray, code: int):
+        _, rows = _gather(self._unit_indptr, self._rows, units)
+        if len(rows) == len(units):
+            # No cycles among these units: one row each
+            self.status[instances, rows] = code
+        else:
+            counts = self._unit_indptr[units + 1] - self._first_row[units]
+            self.status[np.repeat(instances, counts), rows] = code
+
+    def _skip_downstream(self, instances: np.ndarray, units: np.ndarray):
+        """Mark every not-yet-started unit reachable from the given ones as SKIPPED."""
+        indptr, indices = self.plan.indptr, self.plan.indices
+        width = self.remaining.shape[1]
+        while len(units):
+            counts = indptr[units + 1] - indptr[units]
+            _, successors = _gather(indptr, indices, units)
+            cells = np.unique(np.repeat(instances, counts) * width + successors)
+            instances, units = np.divmod(cells, width)
+            waiting = self.status[instances, self._first_row[units]] == DEFAULT
+            instances, units = instances[waiting], units[waiting]
+            self._set(instances, units, SKIPPED)
@@ -0,0 +1,78 @@
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+# An op is (method name, *args); a journal entry is the list of
+# (forward, inverse) op pairs produced by one edit or one batch.
+OpPair = Tuple[tuple, tuple]
+
+# Ops whose consecutive repeats on the same element merge into one entry
+COALESCIBLE_OPS = ('move_task', 'move_context')
+
+
+class OperationLog:
+    """Bounded undo/redo journal of (forward, inverse) operations.
+
+    Entries live in a ring buffer, so the oldest edits fall off once
+    ``capacity`` is reached. Repeated moves of the same element within
+    ``coalesce_window`` seconds (a drag) collapse into a single entry.
+    """
+
+    def __init__(self, capacity: int = 200, coalesce_window: float = 1.0):
+        self.capacity = capacity
+        self.coalesce_window = coalesce_window
+        self.undo_stack: Deque[List[OpPair]] = deque(maxlen=capacity)
+        self.redo_stack: Deque[List[OpPair]] = deque(maxlen=capacity)
+        self._last_push = 0.0
+
+    def push(self, entry: List[OpPair]):
+        if not entry:
+            return
+        now = time.monotonic()
+        if self._coalesces(entry, now):
+            # Keep the original inverse, take the latest forward
+            forward, _ = entry[0]
+            _, inverse = self.undo_stack[-1][0]
+            self.undo_stack[-1] = [(forward, inverse)]
+        else:
+            self.undo_stack.append(entry)
+        self.redo_stack.clear()
+        self._last_push = now
+
+    def _coalesces(self, entry: List[OpPair], now: float) -> bool:
+        if len(entry) != 1 or not self.undo_stack or len(self.undo_stack[-1]) != 1:
+            return False
+        forward, _ = entry[0]
+        last_forward, _ = self.undo_stack[-1][0]
+        return (forward[0] in COALESCIBLE_OPS
+                and forward[:2] == last_forward[:2]
+                and now - self._last_push <= self.coalesce_window)
+
+    def pop_undo(self) -> Optional[List[OpPair]]:
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry)
+        # The next move must not merge into the entry now on top
+        self._last_push = 0.0
+        return entry
+
+    def pop_redo(self) -> Optional[List[OpPair]]:
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry)
+        # A redone move must not merge with the next drag
+        self._last_push = 0.0
+        return entry
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._last_push = 0.0
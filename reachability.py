@@ -0,0 +1,224 @@
+from collections import deque
+from typing import Dict, Hashable, List, Set
+
+
+def _bits(mask: int):
+    """Yield the positions of the set bits of ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ReachabilityIndex:
+    """Transitive closure of the task graph as per-node bitsets.
+
+    Each node owns one bit; ``descendants[node]``/``ancestors[node]`` are
+    Python ints with the bits of every node reachable from / reaching it,
+    so ``reachable(a, b)`` is a single shift-and-mask.
+
+    The closure is built on the first query and then kept up to date:
+    adding an edge ORs the new pairs into the affected bitsets, removing an
+    edge or node marks the nodes on either side dirty and only those are
+    recomputed (in topological order) before the next query.
+
+    Above ``max_nodes`` the O(n^2)-bit closure is not kept; queries fall
+    back to a graph search pruned by topological position.
+    """
+
+    def __init__(self, successors: Dict[Hashable, Set[Hashable]],
+                 predecessors: Dict[Hashable, Set[Hashable]],
+                 topo_order, max_nodes: int = 20000):
+        self.successors = successors
+        self.predecessors = predecessors
+        self.topo_order = topo_order
+        self.max_nodes = max_nodes
+        self.built = False
+        self.bit: Dict[Hashable, int] = {}
+        self.nodes: List[Hashable] = []
+        self.descendant_bits: Dict[Hashable, int] = {}
+        self.ancestor_bits: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        # Bits of removed nodes may still be set in dirty bitsets until the next refresh
+        self._released: List[int] = []
+        self._dirty_descendants = 0
+        self._dirty_ancestors = 0
+
+    # Graph updates -------------------------------------------------------
+
+    def add_node(self, node: Hashable):
+        if not self.built:
+            return
+        if len(self.bit) >= self.max_nodes:
+            self.invalidate()
+            return
+        if self._free:
+            slot = self._free.pop()
+            self.nodes[slot] = node
+        else:
+            slot = len(self.nodes)
+            self.nodes.append(node)
+        self.bit[node] = slot
+        self.descendant_bits[node] = 0
+        self.ancestor_bits[node] = 0
+
+    def remove_node(self, node: Hashable):
+        """Drop ``node``; call after its edges are gone from the edge indexes."""
+        if not self.built or node not in self.bit:
+            return
+        self._dirty_descendants |= self.ancestor_bits.pop(node)
+        self._dirty_ancestors |= self.descendant_bits.pop(node)
+        slot = self.bit.pop(node)
+        self.nodes[slot] = None
+        self._released.append(slot)
+
+    def add_edge(self, source: Hashable, target: Hashable):
+        """Record source → target; call after the edge is in the edge indexes."""
+        if not self.built:
+            return
+        # A refresh already sees the new edge, but only in the dirty bitsets
+        refreshed = bool(self._dirty_descendants or self._dirty_ancestors)
+        self._refresh()
+        descendants, ancestors = self.descendant_bits, self.ancestor_bits
+        target_bit = 1 << self.bit[target]
+        if not refreshed and descendants[source] & target_bit:
+            return
+        gained = descendants[target] | target_bit
+        for slot in _bits(ancestors[source]):
+            descendants[self.nodes[slot]] |= gained
+        descendants[source] |= gained
+        gained = ancestors[source] | (1 << self.bit[source])
+        for slot in _bits(descendants[target]):
+            ancestors[self.nodes[slot]] |= gained
+        ancestors[target] |= gained
+
+    def remove_edge(self, source: Hashable, target: Hashable):
+        """Forget source → target; call after the edge is gone from the edge indexes."""
+        if not self.built:
+            return
+        self._dirty_descendants |= self.ancestor_bits[source] | (1 << self.bit[source])
+        self._dirty_ancestors |= self.descendant_bits[target] | (1 << self.bit[target])
+
+    def invalidate(self):
+        """Discard the closure; it is rebuilt on the next query."""
+        self.built = False
+        self.bit.clear()
+        self.nodes = []
+        self.descendant_bits.clear()
+        self.ancestor_bits.clear()
+        self._free = []
+        self._released = []
+        self._dirty_descendants = 0
+        self._dirty_ancestors = 0
+
+    clear = invalidate
+
+    # Maintenance ---------------------------------------------------------
+
+    def _build(self):
+        self.invalidate()
+        if len(self.successors) > self.max_nodes:
+            return
+        self.nodes = list(self.successors)
+        self.bit = {node: slot for slot, node in enumerate(self.nodes)}
+        self.descendant_bits = dict.fromkeys(self.nodes, 0)
+        self.ancestor_bits = dict.fromkeys(self.nodes, 0)
+        self.built = True
+        everything = (1 << len(self.nodes)) - 1
+        self._dirty_descendants = self._dirty_ancestors = everything
+        self._refresh()
+
+    def _refresh(self):
+        """Recompute the dirty bitsets."""
+        if not (self._dirty_descendants or self._dirty_ancestors):
+            return
+        nodes, bit = self.nodes, self.bit
+        dirty_descendants = [nodes[slot] for slot in _bits(self._dirty_descendants) if nodes[slot] is not None]
+        dirty_ancestors = [nodes[slot] for slot in _bits(self._dirty_ancestors) if nodes[slot] is not None]
+        if self.topo_order.acyclic:
+            position = self.topo_order.position
+            descendants, ancestors = self.descendant_bits, self.ancestor_bits
+            # Successors of a dirty node are either dirty and later in the order, or clean
+            for node in sorted(dirty_descendants, key=position.__getitem__, reverse=True):
+                mask = 0
+                for successor in self.successors[node]:
+                    mask |= descendants[successor] | (1 << bit[successor])
+                descendants[node] = mask
+            for node in sorted(dirty_ancestors, key=position.__getitem__):
+                mask = 0
+                for predecessor in self.predecessors[node]:
+                    mask |= ancestors[predecessor] | (1 << bit[predecessor])
+                ancestors[node] = mask
+        else:
+            for node in dirty_descendants:
+                self.descendant_bits[node] = self._search_mask(node, self.successors)
+            for node in dirty_ancestors:
+                self.ancestor_bits[node] = self._search_mask(node, self.predecessors)
+        self._dirty_descendants = self._dirty_ancestors = 0
+        self._free.extend(self._released)
+        self._released = []
+
+    def _search_mask(self, start: Hashable, edges: Dict[Hashable, Set[Hashable]]) -> int:
+        mask = 0
+        seen = set()
+        stack = [start]
+        while stack:
+            for neighbor in edges[stack.pop()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    mask |= 1 << self.bit[neighbor]
+                    stack.append(neighbor)
+        return mask
+
+    def _ready(self) -> bool:
+        if not self.built:
+            self._build()
+        else:
+            self._refresh()
+        return self.built
+
+    # Queries -------------------------------------------------------------
+
+    def descendants(self, node: Hashable) -> Set[Hashable]:
+        """Every node reachable from ``node`` (excluding itself unless on a cycle)."""
+        if self._ready():
+            return {self.nodes[slot] for slot in _bits(self.descendant_bits[node])}
+        return self._search(node, self.successors)
+
+    def ancestors(self, node: Hashable) -> Set[Hashable]:
+        """Every node that can reach ``node``."""
+        if self._ready():
+            return {self.nodes[slot] for slot in _bits(self.ancestor_bits[node])}
+        return self._search(node, self.predecessors)
+
+    def reachable(self, source: Hashable, target: Hashable) -> bool:
+        """True if a path of one or more edges leads from ``source`` to ``target``."""
+        if self._ready():
+            return bool(self.descendant_bits[source] >> self.bit[target] & 1)
+        position = self.topo_order.position
+        if self.topo_order.acyclic:
+            if position[source] >= position[target]:
+                return False
+            # Nodes placed after the target cannot lead back to it
+            limit = position[target]
+            seen = {source}
+            stack = [source]
+            while stack:
+                for successor in self.successors[stack.pop()]:
+                    if successor == target:
+                        return True
+                    if successor not in seen and position[successor] < limit:
+                        seen.add(successor)
+                        stack.append(successor)
+            return False
+        return target in self._search(source, self.successors)
+
+    def _search(self, start: Hashable, edges: Dict[Hashable, Set[Hashable]]) -> Set[Hashable]:
+        seen = set()
+        queue = deque([start])
+        while queue:
+            for neighbor in edges[queue.popleft()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return seen
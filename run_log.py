@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RunLog:
+    """Append-only write-ahead log of task state transitions.
+
+    Records are JSON lines. ``append`` only buffers; a background thread
+    writes whatever has accumulated and fsyncs it in one go (group commit),
+    waiting up to ``commit_interval`` seconds so that a burst of transitions
+    costs one fsync instead of one each. ``flush`` forces a commit.
+
+    A crash can lose at most the last uncommitted group. Resuming then
+    re-runs those tasks, so runs are at-least-once. If a write or fsync
+    fails, the commit thread stops and ``append``, ``flush`` and ``close``
+    raise its error instead of waiting for it.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 0.05, truncate: bool = False):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._file = open(path, 'wb' if truncate else 'ab')
+        self._buffer = []
+        self._pending = 0   # Records appended but not yet fsynced
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._synced = threading.Condition(self._lock)
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self.commits = 0
+        self._thread = threading.Thread(target=self._commit_loop, name="run-log-commit", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        with self._lock:
+            self._check()
+            self._buffer.append(line)
+            self._pending += 1
+            self._wake.notify()
+
+    def flush(self):
+        """Block until everything appended so far is on disk."""
+        with self._lock:
+            self._wake.notify()
+            while self._pending and self._error is None:
+                self._synced.wait()
+            self._check()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closing = True
+                self._wake.notify()
+            self._thread.join()
+            self._file.close()
+
+    def _check(self):
+        if self._error is not None:
+            raise OSError(f"run log {self.path} stopped committing: {self._error}") from self._error
+
+    def _commit_loop(self):
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closing:
+                    self._wake.wait()
+                if not self._buffer:
+                    return
+            # Let the group grow for a moment before paying for the fsync
+            time.sleep(self.commit_interval)
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            try:
+                self._file.write(b''.join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except BaseException as e:
+                # Wake the waiters so they raise rather than hang
+                with self._lock:
+                    self._error = e
+                    self._synced.notify_all()
+                return
+            with self._lock:
+                self._pending -= len(lines)
+                self.commits += 1
+                self._synced.notify_all()
+
+
+def replay_run_log(path: str) -> Optional[Dict[str, object]]:
+    """Read the log of the last run; None if there is none or it finished.
+
+    Returns the run's ``begin`` record with the latest status of each task
+    under ``'statuses'`` (task id -> status value). A torn last line from a
+    crash mid-write is ignored.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Only newline-terminated records were fully written
+    data = data[:data.rfind(b'\n') + 1]
+    try:
+        # One parse for the whole log is far cheaper than one per line
+        records = json.loads(b'[' + data.rstrip(b'\n').replace(b'\n', b',') + b']')
+    except ValueError:
+        records = []
+        for line in data.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    run = None
+    for record in records:
+        kind = record.get('type')
+        if kind == 'begin':
+            run = dict(record, statuses={})
+        elif kind == 'end':
+            run = None
+        elif run is not None and kind is None:
+            run['statuses'][record['task']] = record['status']
+    return run
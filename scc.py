@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+
+def tarjan(indptr: Sequence[int], indices: Sequence[int]) -> Tuple[List[int], int]:
+    """Strongly connected components of a CSR graph (iterative Tarjan).
+
+    Returns ``(labels, count)``: ``labels[row]`` is the component of each
+    row, numbered in topological order of the condensed graph (every edge
+    goes from a lower or equal label to a higher or equal one). Runs in
+    O(V + E) without recursion, so deep graphs do not hit recursion limits.
+    """
+    if hasattr(indptr, 'tolist'):
+        indptr, indices = indptr.tolist(), indices.tolist()
+    n = len(indptr) - 1
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    labels = [-1] * n
+    stack = []
+    counter = 0
+    finished = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        # Frames of (node, next edge offset)
+        work = [[root, indptr[root]]]
+        while work:
+            frame = work[-1]
+            node, edge = frame
+            end = indptr[node + 1]
+            while edge < end:
+                successor = indices[edge]
+                edge += 1
+                if index[successor] < 0:
+                    frame[1] = edge
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append([successor, indptr[successor]])
+                    break
+                if on_stack[successor] and index[successor] < low[node]:
+                    low[node] = index[successor]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        labels[member] = finished
+                        if member == node:
+                            break
+                    finished += 1
+    # Tarjan emits components sinks first; flip to a topological numbering
+    last = finished - 1
+    return [last - label for label in labels], finished
+
+
+@dataclass
+class Condensation:
+    """A graph with every strongly connected component collapsed to one node."""
+    components: List[List[Hashable]]  # In topological order
+    component_of: Dict[Hashable, int]
+    successors: List[Set[int]]  # Component DAG
+    cyclic: List[bool]  # Component is a cycle (two or more nodes, or a self-loop)
+
+    @property
+    def cycles(self) -> List[List[Hashable]]:
+        return [members for members, cyclic in zip(self.components, self.cyclic) if cyclic]
+
+    @property
+    def acyclic(self) -> bool:
+        return not any(self.cyclic)
+
+
+def condense(nodes: Iterable[Hashable], successors: Dict[Hashable, Set[Hashable]]) -> Condensation:
+    """Condense the graph given by ``successors`` (node -> set of nodes)."""
+    nodes = list(nodes)
+    rows = {node: row for row, node in enumerate(nodes)}
+    indptr = [0]
+    indices = []
+    for node in nodes:
+        indices.extend(rows[successor] for successor in successors[node])
+        indptr.append(len(indices))
+    labels, count = tarjan(indptr, indices)
+
+    components: List[List[Hashable]] = [[] for _ in range(count)]
+    for node, label in zip(nodes, labels):
+        components[label].append(node)
+    component_successors: List[Set[int]] = [set() for _ in range(count)]
+    cyclic = [len(members) > 1 for members in components]
+    for row, node in enumerate(nodes):
+        label = labels[row]
+        for edge in range(indptr[row], indptr[row + 1]):
+            target = labels[indices[edge]]
+            if target != label:
+                component_successors[label].add(target)
+            elif indices[edge] == row:
+                cyclic[label] = True
+    return Condensation(components, dict(zip(nodes, labels)), component_successors, cyclic)
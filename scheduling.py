@@ -0,0 +1,152 @@
+"""Scheduling policies: which ready task an execution engine starts first.
+
+A policy gives every unit of a run (a task, or a whole cycle) a sort key;
+lower keys start first and equal keys keep first-come, first-served order.
+The default, "critical_path", starts the unit with the longest chain of
+work still ahead of it, so the chains that decide the makespan are not
+starved by short side branches.
+"""
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+# As in critical_path: tasks without an estimate count as one time unit
+DEFAULT_DURATION = 1.0
+
+
+def unit_durations(tool, units: Sequence[Sequence]) -> List[float]:
+    """Estimated duration of each unit (the sum over a cycle's members)."""
+    tasks = tool.tasks
+    return [sum(DEFAULT_DURATION if tasks[t].duration is None else tasks[t].duration for t in members)
+            for members in units]
+
+
+def remaining_path(successors: Sequence[Sequence[int]], durations: Sequence[float]) -> List[float]:
+    """Longest path from the start of each unit to the end of the workflow (its bottom level)."""
+    n = len(successors)
+    indegree = [0] * n
+    for targets in successors:
+        for target in targets:
+            indegree[target] += 1
+    order = [unit for unit in range(n) if indegree[unit] == 0]
+    for unit in order:
+        for target in successors[unit]:
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                order.append(target)
+    remaining = list(durations)
+    for unit in reversed(order):
+        tail = max((remaining[target] for target in successors[unit]), default=0.0)
+        remaining[unit] = durations[unit] + tail
+    return remaining
+
+
+class SchedulingPolicy:
+    """First come, first served; subclasses override ``keys``."""
+    name = "fifo"
+
+    def keys(self, tool, units: Sequence[Sequence], successors: Sequence[Sequence[int]]) -> List[Any]:
+        return [0] * len(units)
+
+
+class CriticalPathPolicy(SchedulingPolicy):
+    """Longest remaining path (by Task.duration) first."""
+    name = "critical_path"
+
+    def keys(self, tool, units, successors):
+        return [-length for length in remaining_path(successors, unit_durations(tool, units))]
+
+
+class PriorityPolicy(SchedulingPolicy):
+    """Highest Task.priority first, then longest remaining path."""
+    name = "priority"
+
+    def keys(self, tool, units, successors):
+        tasks = tool.tasks
+        remaining = remaining_path(successors, unit_durations(tool, units))
+        return [(-max(tasks[t].priority for t in members), -length)
+                for members, length in zip(units, remaining)]
+
+
+class ContextWeightPolicy(SchedulingPolicy):
+    """Highest Context.weight first, then longest remaining path."""
+    name = "context"
+
+    def keys(self, tool, units, successors):
+        tasks, contexts = tool.tasks, tool.contexts
+        remaining = remaining_path(successors, unit_durations(tool, units))
+        keys = []
+        for members, length in zip(units, remaining):
+            context = contexts.get(tasks[members[0]].context_id)
+            keys.append((-(context.weight if context is not None else 1.0), -length))
+        return keys
+
+
+POLICIES: Dict[str, SchedulingPolicy] = {
+    policy.name: policy for policy in (SchedulingPolicy(), CriticalPathPolicy(), PriorityPolicy(), ContextWeightPolicy())
+}
+
+
+def get_policy(policy: Union[str, SchedulingPolicy, None]) -> SchedulingPolicy:
+    """Look up a policy by name; None gives the default (critical path first)."""
+    if policy is None:
+        return POLICIES["critical_path"]
+    if isinstance(policy, str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy!r}")
+        return POLICIES[policy]
+    return policy
+
+
+class ReadyQueue:
+    """Heap of ready units ordered by policy key, first come first served among equals."""
+
+    def __init__(self, keys: Sequence[Any]):
+        self.keys = keys
+        self._heap: List[tuple] = []
+        self._arrivals = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, units: Sequence[int]):
+        keys, heap = self.keys, self._heap
+        for unit in units:
+            heapq.heappush(heap, (keys[unit], self._arrivals, unit))
+            self._arrivals += 1
+
+    def pop(self) -> int:
+        return heapq.heappop(self._heap)[2]
+
+
+def simulate_makespan(successors: Sequence[Sequence[int]], durations: Sequence[float],
+                      workers: int, keys: Optional[Sequence[Any]] = None) -> float:
+    """Makespan of a list schedule on ``workers`` identical workers.
+
+    Whenever a worker is free it takes the ready unit with the lowest key,
+    as the execution engines do.
+    """
+    if workers < 1:
+        raise ValueError(f"Need at least one worker, got {workers!r}")
+    n = len(successors)
+    indegree = [0] * n
+    for targets in successors:
+        for target in targets:
+            indegree[target] += 1
+    ready = ReadyQueue(keys if keys is not None else [0] * n)
+    ready.push([unit for unit in range(n) if indegree[unit] == 0])
+    running: List[tuple] = []  # (finish time, unit)
+    now = 0.0
+    while ready or running:
+        while ready and len(running) < workers:
+            unit = ready.pop()
+            heapq.heappush(running, (now + durations[unit], unit))
+        now, unit = heapq.heappop(running)
+        finished = [unit]
+        while running and running[0][0] == now:
+            finished.append(heapq.heappop(running)[1])
+        for unit in finished:
+            for target in successors[unit]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.push([target])
+    return now
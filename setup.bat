@@ -6,7 +6,7 @@ echo Activating virtual environment...
 call bmp_env\Scripts\activate.bat
 echo.
 echo Installing required packages...
-pip install gradio
+pip install -r requirements.txt
 echo.
 echo Setup complete! 
 echo.
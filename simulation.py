@@ -0,0 +1,213 @@
+"""Monte Carlo makespan simulation for capacity planning.
+
+Every trial draws a duration for each task from its distribution and
+schedules the workflow on a limited number of workers. Trials run side
+by side as rows of NumPy arrays, so the Python loop is over tasks only.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from critical_path import DEFAULT_DURATION
+from id_allocator import ElementId
+
+
+@dataclass(frozen=True)
+class Fixed:
+    value: float
+
+    @property
+    def mean(self) -> float:
+        return self.value
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return np.full(size, self.value, dtype=float)
+
+
+@dataclass(frozen=True)
+class Uniform:
+    low: float
+    high: float
+
+    @property
+    def mean(self) -> float:
+        return (self.low + self.high) / 2
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass(frozen=True)
+class Triangular:
+    """Three-point (PERT-style) estimate: optimistic, most likely, pessimistic."""
+    low: float
+    mode: float
+    high: float
+
+    @property
+    def mean(self) -> float:
+        return (self.low + self.mode + self.high) / 3
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        if self.low == self.high:
+            return np.full(size, self.low, dtype=float)
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+@dataclass(frozen=True)
+class LogNormal:
+    """Right-skewed durations: half the runs take less than ``median``."""
+    median: float
+    sigma: float = 0.5
+
+    @property
+    def mean(self) -> float:
+        return self.median * float(np.exp(self.sigma ** 2 / 2))
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return self.median * rng.lognormal(0.0, self.sigma, size)
+
+
+@dataclass(frozen=True)
+class Exponential:
+    mean: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.exponential(self.mean, size)
+
+
+Distribution = Union[Fixed, Uniform, Triangular, LogNormal, Exponential]
+
+
+@dataclass
+class SimulationResult:
+    makespans: np.ndarray  # One per trial
+    criticality: Dict[ElementId, float]  # Share of trials in which the task was on the critical chain
+    workers: Optional[int]
+
+    def percentiles(self, qs: Iterable[float] = (50, 90, 95, 99)) -> Dict[float, float]:
+        qs = list(qs)
+        return dict(zip(qs, np.percentile(self.makespans, qs).tolist()))
+
+    def most_critical(self, count: int = 10):
+        """The ``count`` tasks most often on the critical chain, as (task id, share) pairs."""
+        return sorted(self.criticality.items(), key=lambda item: -item[1])[:count]
+
+    def summary(self) -> str:
+        p = self.percentiles((50, 95))
+        limit = f"{self.workers} workers" if self.workers else "unlimited workers"
+        return (f"{len(self.makespans):,} trials on {limit}: mean {self.makespans.mean():.1f}, "
+                f"p50 {p[50]:.1f}, p95 {p[95]:.1f}")
+
+
+def simulate(tool, trials: int = 10_000, workers: Optional[int] = None,
+             distributions: Optional[Dict[ElementId, Union[Distribution, float]]] = None,
+             seed: Optional[int] = None, chunk_size: int = 2048) -> SimulationResult:
+    """Simulate ``trials`` runs of the workflow and collect makespans and criticality.
+
+    ``distributions`` maps task ids to a Distribution (or a fixed number);
+    other tasks take their Task.duration (1.0 when unset). A cycle takes
+    the sum of its members' durations.
+
+    Tasks are scheduled in one fixed order per run: longest mean remaining
+    path first (a topological order). Each task starts once its
+    predecessors are done and a worker is free, on the worker that became
+    free last before it was ready (else the first to become free), so
+    later tasks can still use idle gaps. With ``workers=None`` every task
+    starts as soon as it is ready.
+
+    The critical chain of a trial is traced back from the last task to
+    finish, through whichever predecessor or previous task on the same
+    worker delayed each start.
+    """
+    plan = tool.compile()
+    distributions = distributions or {}
+    rng = np.random.default_rng(seed)
+    rows = []
+    for row, task_id in enumerate(plan.task_ids):
+        distribution = distributions.get(task_id)
+        if distribution is None:
+            duration = plan.durations[row]
+            distribution = DEFAULT_DURATION if duration is None else duration
+        rows.append(Fixed(float(distribution)) if isinstance(distribution, (int, float)) else distribution)
+
+    n = len(plan.units)
+    unit_start = np.array([members[0] for members in plan.units], dtype=np.int64)
+    predecessors = [[] for _ in range(n)]
+    for unit, targets in enumerate(plan.successors):
+        for target in targets:
+            predecessors[target].append(unit)
+    predecessors = [np.array(p, dtype=np.int64) for p in predecessors]
+
+    # Static priority order: longest mean remaining path first, ties in topological order
+    means = np.add.reduceat(np.array([d.mean for d in rows]), unit_start) if n else np.zeros(0)
+    remaining = means.copy()
+    for unit in range(n - 1, -1, -1):
+        if plan.successors[unit]:
+            remaining[unit] += remaining[list(plan.successors[unit])].max()
+    order = np.lexsort((np.arange(n), -remaining))
+
+    makespans = np.empty(trials)
+    critical_counts = np.zeros(n, dtype=np.int64)
+    for first in range(0, trials, chunk_size):
+        size = min(chunk_size, trials - first)
+        samples = np.stack([d.sample(rng, size) for d in rows], axis=1) if rows else np.zeros((size, 0))
+        durations = np.add.reduceat(samples, unit_start, axis=1) if n else samples
+        makespans[first:first + size], critical = _schedule(durations, order, predecessors, workers)
+        critical_counts += critical.sum(axis=0)
+
+    shares = (critical_counts / max(trials, 1)).tolist()
+    criticality = {}
+    for unit, members in enumerate(plan.units):
+        for row in members:
+            criticality[plan.task_ids[row]] = shares[unit]
+    return SimulationResult(makespans, criticality, workers)
+
+
+def _schedule(durations: np.ndarray, order: np.ndarray, predecessors, workers: Optional[int]):
+    """Schedule every trial (row of ``durations``); returns (makespans, critical mask)."""
+    trials, n = durations.shape
+    if n == 0:
+        return np.zeros(trials), np.zeros((trials, 0), dtype=bool)
+    trial = np.arange(trials)
+    finish = np.zeros((trials, n))
+    # What delayed each unit's start: a predecessor or the worker's previous unit (-1: nothing)
+    cause = np.full((trials, n), -1, dtype=np.int64)
+    if workers:
+        free = np.zeros((trials, workers))
+        last = np.full((trials, workers), -1, dtype=np.int64)
+    for unit in order.tolist():
+        preds = predecessors[unit]
+        if len(preds):
+            pred_finish = finish[:, preds]
+            ready = pred_finish.max(axis=1)
+            ready_cause = preds[pred_finish.argmax(axis=1)]
+        else:
+            ready = np.zeros(trials)
+            ready_cause = np.full(trials, -1, dtype=np.int64)
+        if workers:
+            idle = free <= ready[:, None]
+            best_fit = np.where(idle, free, -np.inf).argmax(axis=1)
+            worker = np.where(idle.any(axis=1), best_fit, free.argmin(axis=1))
+            available = free[trial, worker]
+            start = np.maximum(ready, available)
+            cause[:, unit] = np.where(available > ready, last[trial, worker], ready_cause)
+            end = start + durations[:, unit]
+            free[trial, worker] = end
+            last[trial, worker] = unit
+        else:
+            end = ready + durations[:, unit]
+            cause[:, unit] = ready_cause
+        finish[:, unit] = end
+
+    makespans = finish.max(axis=1)
+    critical = np.zeros((trials, n), dtype=bool)
+    current = finish.argmax(axis=1)
+    active = np.ones(trials, dtype=bool)
+    while active.any():
+        rows = trial[active]
+        critical[rows, current[active]] = True
+        current[active] = cause[rows, current[active]]
+        active &= current >= 0
+    return makespans, critical
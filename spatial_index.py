@@ -0,0 +1,151 @@
+import math
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+Box = Tuple[float, float, float, float]  # (x0, y0, x1, y1)
+
+
+class SpatialGrid:
+    """Uniform-grid index over axis-aligned bounding boxes.
+
+    Each element is stored in every cell its box overlaps, so rectangle and
+    point queries only visit the cells under the query instead of every
+    element on the canvas.
+    """
+
+    def __init__(self, cell_size: float = 200.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.boxes: Dict[Hashable, Box] = {}
+        # Cell extent ever occupied (only grows until clear); bounds nearest() searches
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, key: Hashable):
+        return key in self.boxes
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        size = self.cell_size
+        return (math.floor(x0 / size), math.floor(y0 / size),
+                math.floor(x1 / size), math.floor(y1 / size))
+
+    def insert(self, key: Hashable, x: float, y: float, width: float, height: float):
+        if key in self.boxes:
+            self.remove(key)
+        box = (x, y, x + width, y + height)
+        self.boxes[key] = box
+        cx0, cy0, cx1, cy1 = self._cell_range(*box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), set()).add(key)
+        if self._extent is None:
+            self._extent = (cx0, cy0, cx1, cy1)
+        else:
+            ex0, ey0, ex1, ey1 = self._extent
+            self._extent = (min(ex0, cx0), min(ey0, cy0), max(ex1, cx1), max(ey1, cy1))
+
+    def remove(self, key: Hashable) -> bool:
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return False
+        cx0, cy0, cx1, cy1 = self._cell_range(*box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del self.cells[(cx, cy)]
+        return True
+
+    def update(self, key: Hashable, x: float, y: float, width: float, height: float):
+        old = self.boxes.get(key)
+        box = (x, y, x + width, y + height)
+        if old is not None and self._cell_range(*old) == self._cell_range(*box):
+            # Same cells: only the stored box changes
+            self.boxes[key] = box
+            return
+        self.insert(key, x, y, width, height)
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+        self._extent = None
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[Hashable]:
+        """Keys whose boxes intersect the rectangle ``(x0, y0)-(x1, y1)``."""
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        found: Set[Hashable] = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Query covers more cells than are occupied: walk the occupied ones
+            candidates = (cell for (cx, cy), cell in self.cells.items()
+                          if cx0 <= cx <= cx1 and cy0 <= cy <= cy1)
+        else:
+            candidates = (self.cells[(cx, cy)]
+                          for cx in range(cx0, cx1 + 1)
+                          for cy in range(cy0, cy1 + 1)
+                          if (cx, cy) in self.cells)
+        boxes = self.boxes
+        for cell in candidates:
+            for key in cell:
+                if key in found:
+                    continue
+                bx0, by0, bx1, by1 = boxes[key]
+                if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0:
+                    found.add(key)
+        return list(found)
+
+    def query_point(self, x: float, y: float) -> List[Hashable]:
+        """Keys whose boxes contain the point."""
+        size = self.cell_size
+        cell = self.cells.get((math.floor(x / size), math.floor(y / size)), ())
+        result = []
+        for key in cell:
+            bx0, by0, bx1, by1 = self.boxes[key]
+            if bx0 <= x <= bx1 and by0 <= y <= by1:
+                result.append(key)
+        return result
+
+    @staticmethod
+    def _distance(box: Box, x: float, y: float) -> float:
+        bx0, by0, bx1, by1 = box
+        dx = max(bx0 - x, 0.0, x - bx1)
+        dy = max(by0 - y, 0.0, y - by1)
+        return math.hypot(dx, dy)
+
+    def _ring(self, cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield (gx, cy - ring)
+            yield (gx, cy + ring)
+        for gy in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, gy)
+            yield (cx + ring, gy)
+
+    def nearest(self, x: float, y: float, max_distance: Optional[float] = None) -> Optional[Hashable]:
+        """Key of the box closest to the point (0 distance if inside), or None."""
+        if not self.boxes:
+            return None
+        size = self.cell_size
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        ex0, ey0, ex1, ey1 = self._extent
+        max_ring = max(cx - ex0, ex1 - cx, cy - ey0, ey1 - cy, 0)
+        best_key, best_distance = None, math.inf
+        # Search rings of cells outwards until no closer box can exist
+        for ring in range(max_ring + 1):
+            lower_bound = (ring - 1) * size
+            if best_distance <= lower_bound:
+                break
+            if max_distance is not None and lower_bound > max_distance:
+                break
+            for cell_key in self._ring(cx, cy, ring):
+                for key in self.cells.get(cell_key, ()):
+                    distance = self._distance(self.boxes[key], x, y)
+                    if distance < best_distance:
+                        best_key, best_distance = key, distance
+        if max_distance is not None and best_distance > max_distance:
+            return None
+        return best_key
@@ -0,0 +1,295 @@
+"""Incremental SVG rendering of a BPMTool canvas.
+
+Every context, edge and task is rendered once into an SVG fragment and
+cached; change events from the tool's event bus evict the fragments that
+are stale, and only those are rendered again. The document is
+assembled with a single join, so a one-task status change on a 20k-task
+canvas re-renders one fragment instead of 20k. For exports, ``iter_svg``
+streams the same document in chunks without keeping it in memory.
+
+Only elements that intersect the tool's visible rectangle are emitted
+(found through its spatial grids and sorted by the tool's draw order, so
+a render costs the elements in view, not the whole canvas), and the
+level of detail follows the zoom: FULL, OUTLINE (no labels or shadows)
+or SUMMARY (contexts as status histograms, edges bundled per context
+pair, cached until the next change).
+"""
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterator, List, Set, Tuple
+
+import event_bus
+from id_allocator import ElementId
+
+Edge = Tuple[ElementId, ElementId]
+
+# Levels of detail, see BPMTool.detail_level
+FULL = "full"
+OUTLINE = "outline"
+SUMMARY = "summary"
+
+
+class SvgRenderer:
+    """Cache of SVG fragments per element, kept current by the tool's events.
+
+    The tool supplies the fragments (``svg_header``, ``render_context``,
+    ``render_edge``, ``render_task``, ``svg_footer``). A fragment is
+    rendered the first time its element is in view and reused until an
+    event evicts it; documents draw the visible elements in layers
+    (contexts, then edges, then tasks) in the tool's order, as
+    ``generate_svg`` always did.
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+        self._contexts: Dict[ElementId, str] = {}
+        self._edges: Dict[Edge, str] = {}
+        self._tasks: Dict[ElementId, str] = {}
+        # What the cached fragments were rendered from
+        self._edges_of: Dict[ElementId, Set[Edge]] = {}
+        self._task_context: Dict[ElementId, ElementId] = {}
+        self._critical_tasks: Set[ElementId] = set()
+        self._critical_edges: Set[Edge] = set()
+        self._instance_counts = None
+        self._detail = FULL
+        # (rect, zoom, fragments) of the last SUMMARY body; any event drops it
+        self._summary = None
+        # Elements to evict before the next document
+        self._stale = True
+        self._dirty_tasks: Set[ElementId] = set()
+        self._restyled_tasks: Set[ElementId] = set()  # Only the task's own fragment changed
+        self._dirty_edges: Set[Edge] = set()
+        self._dirty_contexts: Set[ElementId] = set()
+        self._moved_contexts: Set[ElementId] = set()
+        self._lock = threading.Lock()
+        self.rendered = 0  # Fragments rendered so far
+        self.subscription = tool.subscribe(self._on_events, window=0)
+
+    def invalidate(self):
+        """Re-render everything on the next call to ``render``."""
+        with self._lock:
+            self._stale = True
+
+    def close(self):
+        self.subscription.close()
+
+    def _on_events(self, events: List[event_bus.Event]):
+        with self._lock:
+            self._summary = None
+            for event in events:
+                kind = event.kind
+                if kind == event_bus.RESET:
+                    self._stale = True
+                elif kind == event_bus.EDGE_CHANGED:
+                    self._dirty_edges.add(event.id)
+                elif kind in (event_bus.CONTEXT_ADDED, event_bus.CONTEXT_REMOVED, event_bus.CONTEXT_UPDATED):
+                    self._dirty_contexts.add(event.id)
+                elif kind == event_bus.CONTEXT_MOVED:
+                    # Moving a context moves its tasks without an event per task
+                    self._dirty_contexts.add(event.id)
+                    self._moved_contexts.add(event.id)
+                elif kind == event_bus.TASK_STATUS:
+                    # A status only recolors the task; its edges and context stay as they are
+                    self._restyled_tasks.add(event.id)
+                elif kind != event_bus.TASK_UPDATED:
+                    # Duration, action, retry and priority are not drawn
+                    self._dirty_tasks.add(event.id)
+
+    def render(self) -> str:
+        tool = self.tool
+        # Pick up events of a batch that is still open on this thread
+        self.subscription.flush()
+        critical_tasks, critical_edges, makespan = tool._critical_highlight()
+        rect, detail = tool.visible_rect(), tool.detail_level()
+        with self._lock:
+            if self._stale or detail != self._detail or tool.instance_counts is not self._instance_counts:
+                self._reset(detail)
+            else:
+                self._restyled_tasks |= critical_tasks ^ self._critical_tasks
+                self._dirty_edges |= critical_edges ^ self._critical_edges
+                self._evict()
+            self._critical_tasks, self._critical_edges = critical_tasks, critical_edges
+            body = self._summary_body(rect) if detail == SUMMARY else self._visible(rect)
+            return ''.join(chain((tool.svg_header(),), body, (tool.svg_footer(makespan),)))
+
+    def _visible(self, rect) -> Iterator[str]:
+        """Fragments of the elements in ``rect``, rendering the ones not cached."""
+        tool, detail = self.tool, self._detail
+        contexts, edges, tasks = visible_elements(tool, rect)
+        for context in contexts:
+            fragment = self._contexts.get(context.id)
+            if fragment is None:
+                fragment = self._contexts[context.id] = tool.render_context(context)
+                self.rendered += 1
+            yield fragment
+        for task, successor in edges:
+            edge = (task.id, successor.id)
+            fragment = self._edges.get(edge)
+            if fragment is None:
+                fragment = self._edges[edge] = tool.render_edge(task, successor, edge in self._critical_edges, detail)
+                self._edges_of.setdefault(task.id, set()).add(edge)
+                self._edges_of.setdefault(successor.id, set()).add(edge)
+                self.rendered += 1
+            yield fragment
+        for task in tasks:
+            fragment = self._tasks.get(task.id)
+            if fragment is None:
+                fragment = self._tasks[task.id] = tool.render_task(task, task.id in self._critical_tasks, detail)
+                self.rendered += 1
+            yield fragment
+
+    def _summary_body(self, rect) -> List[str]:
+        """Summary fragments for ``rect``, reused while nothing changed."""
+        # Summaries depend on every task of a context, so they are kept whole rather than per element
+        zoom = self.tool.zoom_level
+        if self._summary is None or self._summary[:2] != (rect, zoom):
+            self._summary = (rect, zoom, list(summary_fragments(self.tool, rect)))
+            self.rendered += len(self._summary[2])
+        return self._summary[2]
+
+    def _clear_dirty(self):
+        for dirty in (self._dirty_tasks, self._restyled_tasks, self._dirty_edges, self._dirty_contexts, self._moved_contexts):
+            dirty.clear()
+
+    def _reset(self, detail: str):
+        self._contexts, self._edges, self._tasks, self._edges_of = {}, {}, {}, {}
+        self._task_context = {task.id: task.context_id for task in self.tool.tasks.values()}
+        self._instance_counts = self.tool.instance_counts
+        self._detail = detail
+        self._summary = None
+        self._stale = False
+        self._clear_dirty()
+
+    def _evict(self):
+        """Drop the cached fragments that the pending events made stale."""
+        tool = self.tool
+        tasks, contexts = tool.tasks, tool.contexts
+        dirty_tasks, dirty_edges, dirty_contexts = self._dirty_tasks, self._dirty_edges, self._dirty_contexts
+        for context_id in self._moved_contexts:
+            if context_id in contexts:
+                dirty_tasks.update(contexts[context_id].tasks)
+
+        for task_id in dirty_tasks:
+            self._tasks.pop(task_id, None)
+            # Edges follow the task when it moves
+            dirty_edges.update(self._edges_of.pop(task_id, ()))
+            task = tasks.get(task_id)
+            if task is None:
+                context_id = self._task_context.pop(task_id, None)
+                if context_id is not None:
+                    dirty_contexts.add(context_id)
+            elif self._task_context.get(task_id) != task.context_id:
+                # Added (or restored): its context's task count changed too
+                self._task_context[task_id] = task.context_id
+                dirty_contexts.add(task.context_id)
+
+        for task_id in self._restyled_tasks:
+            self._tasks.pop(task_id, None)
+
+        for edge in dirty_edges:
+            if self._edges.pop(edge, None) is not None:
+                source_id, target_id = edge
+                self._edges_of.get(source_id, set()).discard(edge)
+                self._edges_of.get(target_id, set()).discard(edge)
+
+        for context_id in dirty_contexts:
+            self._contexts.pop(context_id, None)
+        self._clear_dirty()
+
+
+def visible_elements(tool, rect) -> Tuple[List, List, List]:
+    """Contexts, edges (task, successor) and tasks that intersect ``rect``, in drawing order.
+
+    Elements are found through the tool's spatial grids; an edge is drawn
+    when either end is in view.
+    """
+    context_ids, task_ids = tool.query_rect(*rect)
+    by_id, order = tool.tasks, tool.draw_order.__getitem__
+    contexts = [tool.contexts[context_id] for context_id in sorted(context_ids, key=order)]
+    tasks = [by_id[task_id] for task_id in sorted(task_ids, key=order)]
+    task_ids = set(task_ids)
+    edges = []
+    for task in tasks:
+        for successor_id in task.successors:
+            successor = by_id.get(successor_id)
+            if successor is not None:
+                edges.append((task, successor))
+    for task in tasks:
+        for predecessor_id in tool.predecessor_index.get(task.id, ()):
+            if predecessor_id not in task_ids:
+                edges.append((by_id[predecessor_id], task))
+    return contexts, edges, tasks
+
+
+def iter_svg(tool, chunk_size: int = 64 * 1024, whole: bool = False) -> Iterator[str]:
+    """Yield the canvas SVG in chunks of about ``chunk_size`` characters.
+
+    Fragments are rendered as they are written instead of cached, so the
+    memory held is one chunk however large the workflow is. The chunks
+    can go straight to a file or a chunked HTTP response. ``whole=True``
+    renders the entire workflow at full detail rather than the tool's view.
+    """
+    critical_tasks, critical_edges, makespan = tool._critical_highlight()
+    if whole:
+        view = rect = tool.bounds()
+        detail = FULL
+    else:
+        view, rect, detail = None, tool.visible_rect(), tool.detail_level()
+
+    def fragments():
+        yield tool.svg_header(view)
+        if detail == SUMMARY:
+            yield from summary_fragments(tool, rect)
+        else:
+            contexts, edges, tasks = visible_elements(tool, rect)
+            for context in contexts:
+                yield tool.render_context(context)
+            for task, successor in edges:
+                yield tool.render_edge(task, successor, (task.id, successor.id) in critical_edges, detail)
+            for task in tasks:
+                yield tool.render_task(task, task.id in critical_tasks, detail)
+        yield tool.svg_footer(makespan, view)
+
+    chunk, size = [], 0
+    for fragment in fragments():
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def summary_fragments(tool, rect) -> Iterator[str]:
+    """Visible contexts as status histograms, with the edges between contexts bundled per pair."""
+    tasks, contexts = tool.tasks, tool.contexts
+    context_ids, task_ids = tool.query_rect(*rect)
+    visible = set(context_ids)
+    shown = [contexts[context_id] for context_id in sorted(context_ids, key=tool.draw_order.__getitem__)]
+    for context in shown:
+        yield tool.render_context_summary(context, tool.context_status_counts[context.id])
+
+    # Only the tasks of visible contexts are walked; an edge into one from an
+    # off-screen context is counted from its target's side
+    bundles: Counter = Counter()
+    for context in shown:
+        for task_id in context.tasks:
+            for successor_id in tool.successor_index.get(task_id, ()):
+                target = tasks[successor_id].context_id
+                if target != context.id:
+                    bundles[(context.id, target)] += 1
+            for predecessor_id in tool.predecessor_index.get(task_id, ()):
+                source = tasks[predecessor_id].context_id
+                if source != context.id and source not in visible:
+                    bundles[(source, context.id)] += 1
+    for (source, target), count in bundles.items():
+        if source in contexts and target in contexts:
+            yield tool.render_bundle(contexts[source], contexts[target], count)
+
+    # Tasks outside any context have nothing to collapse into
+    for task_id in sorted(task_ids, key=tool.draw_order.__getitem__):
+        task = tasks[task_id]
+        if task.context_id not in contexts:
+            yield tool.render_task(task, False, OUTLINE)
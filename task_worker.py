@@ -0,0 +1,139 @@
+"""Task-running helpers that are safe to import in worker processes.
+
+Nothing here imports the Gradio UI, so process-pool workers start fast
+even where they are spawned rather than forked.
+"""
+import importlib
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+ENTRY_POINT = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$')
+
+
+class ActionError(RuntimeError):
+    """Raised when a shell command exits with a non-zero status."""
+
+
+def resolve_action(action) -> Callable[[Any], Any]:
+    """Turn a task action into a callable taking the task."""
+    if callable(action):
+        return action
+    if ENTRY_POINT.match(action):
+        module_name, _, attribute = action.partition(':')
+        target = importlib.import_module(module_name)
+        for part in attribute.split('.'):
+            target = getattr(target, part)
+        return target
+    return lambda task: run_shell(action)
+
+
+def run_shell(command: str) -> str:
+    completed = subprocess.run(command, shell=True, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise ActionError(f"exit {completed.returncode}: {completed.stderr.strip()}")
+    return completed.stdout
+
+
+def _attach(name: Optional[str] = None, size: int = 0) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+    if os.name == 'posix':
+        # The process that started the run unlinks segments; keep this process's
+        # resource tracker from unlinking (and warning about) them on exit
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+@dataclass
+class SharedOutput:
+    """A large task output parked in shared memory instead of being pickled."""
+    name: str
+    size: int
+    dtype: Optional[str] = None   # Set for NumPy arrays, None for bytes
+    shape: Tuple[int, ...] = ()
+
+    def load(self):
+        """Copy the value out of shared memory."""
+        segment = _attach(self.name)
+        try:
+            if self.dtype is None:
+                return bytes(segment.buf[:self.size])
+            import numpy as np
+            return np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf).copy()
+        finally:
+            segment.close()
+
+    def unlink(self):
+        segment = shared_memory.SharedMemory(name=self.name)
+        segment.close()
+        segment.unlink()
+
+
+def share(value, threshold: int):
+    """Move bytes or a NumPy array of at least ``threshold`` bytes into shared memory."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = memoryview(value).cast('B')
+        dtype, shape = None, ()
+    elif type(value).__module__ == 'numpy' and hasattr(value, 'dtype'):
+        import numpy as np
+        value = np.ascontiguousarray(value)
+        data = memoryview(value).cast('B')
+        dtype, shape = value.dtype.str, value.shape
+    else:
+        return value
+    if data.nbytes < threshold or data.nbytes == 0:
+        return value
+    segment = _attach(size=data.nbytes)
+    segment.buf[:data.nbytes] = data
+    segment.close()
+    return SharedOutput(segment.name, data.nbytes, dtype, shape)
+
+
+@dataclass
+class TaskSpec:
+    """Picklable description of one task for a worker process.
+
+    Handlers receive the spec itself; ``inputs`` maps each predecessor id to
+    its output (loaded from shared memory when it was large).
+    """
+    id: Hashable
+    name: str
+    context_id: Hashable
+    action: Any = None
+    duration: Optional[float] = None
+    inputs: Dict[Hashable, Any] = field(default_factory=dict)
+
+
+# Actions resolved in this worker process
+_resolved: Dict[Any, Callable[[Any], Any]] = {}
+
+
+def run_specs(chunk: List[Tuple[int, List[TaskSpec]]], threshold: int) -> List[Tuple[int, list]]:
+    """Worker entry point: run a chunk of units, each a list of specs run in order.
+
+    Returns ``(unit, outcomes)`` pairs, outcomes being ``(task id, ok, output
+    or error message)`` for each task that ran.
+    """
+    results = []
+    for unit, specs in chunk:
+        outcomes = []
+        for spec in specs:
+            try:
+                spec.inputs = {key: value.load() if isinstance(value, SharedOutput) else value
+                               for key, value in spec.inputs.items()}
+                if spec.action is None:
+                    output = None
+                else:
+                    handler = _resolved.get(spec.action) if isinstance(spec.action, str) else spec.action
+                    if handler is None:
+                        handler = _resolved[spec.action] = resolve_action(spec.action)
+                    output = share(handler(spec), threshold)
+            except Exception as e:
+                outcomes.append((spec.id, False, f"{type(e).__name__}: {e}"))
+                break
+            outcomes.append((spec.id, True, output))
+        results.append((unit, outcomes))
+    return results
@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def test_batch_notifies_once():
+    tool = BPMTool()
+    calls = []
+    tool.add_change_listener(lambda: calls.append(1))
+    with tool.batch():
+        context_id = tool.add_context("Main")
+        a = tool.add_task("a", context_id)
+        b = tool.add_task("b", context_id)
+        tool.connect_tasks(a, b)
+    assert calls == [1]
+    assert len(tool.journal.undo_stack) == 1
+
+
+def test_batch_rolls_back_on_error():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    with pytest.raises(RuntimeError):
+        with tool.batch():
+            tool.add_task("a", context_id)
+            tool.move_context(context_id, 500, 500)
+            raise RuntimeError("boom")
+    assert tool.tasks == {}
+    assert (tool.contexts[context_id].x, tool.contexts[context_id].y) == (100, 100)
+    tool.check_stats()
+
+
+def test_an_edit_from_another_thread_waits_for_the_batch():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a = tool.add_task("a", context_id)
+    inside, edited = threading.Event(), threading.Event()
+
+    def edit():
+        inside.wait()
+        tool.add_task("b", context_id)
+        tool.move_task(a, 400, 400)
+        edited.set()
+
+    worker = threading.Thread(target=edit)
+    worker.start()
+    with tool.batch():
+        tool.add_task("c", context_id)
+        inside.set()
+        assert not edited.wait(0.2)
+        assert len(tool.tasks) == 2
+        tool.move_task(a, 300, 300)
+    worker.join(5)
+    assert edited.is_set()
+    assert len(tool.tasks) == 3
+    assert (tool.tasks[a].x, tool.tasks[a].y) == (400, 400)
+    assert len(tool.journal.undo_stack) == 5
+    tool.check_stats()
+
+
+def test_apply_ops_resolves_refs():
+    tool = BPMTool()
+    results = tool.apply_ops([
+        {'op': 'add_context', 'name': "Review", 'ref': 'c'},
+        {'op': 'add_task', 'name': "Check", 'context_id': '@c', 'status': 'delayed', 'ref': 't'},
+        {'op': 'add_task', 'name': "Ship", 'context_id': '@c', 'ref': 'u'},
+        {'op': 'connect_tasks', 'source_id': '@t', 'target_id': '@u'},
+    ])
+    context_id, check, ship, connected = results
+    assert connected is True
+    assert tool.tasks[check].status == TaskStatus.DELAYED
+    assert tool.tasks[ship].status == TaskStatus.DELAYED  # Propagated
+    assert tool.contexts[context_id].tasks == [check, ship]
+
+
+@pytest.mark.parametrize('ops', [
+    [{'op': 'explode'}],
+    [{'op': 'add_task', 'name': "x", 'context_id': '@missing'}],
+    [{'op': 'add_task', 'name': "x", 'context_id': 999}],
+    [{'op': 'add_context'}],
+])
+def test_apply_ops_validates_before_applying(ops):
+    tool = BPMTool()
+    tool.add_context("Main")
+    with pytest.raises(ValueError):
+        tool.apply_ops([{'op': 'add_context', 'name': "Extra"}] + ops)
+    assert len(tool.contexts) == 1
+
+
+def test_apply_ops_accepts_external_ids_from_files():
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {'ctx-a': {'id': 'ctx-a', 'name': "A", 'x': 0, 'y': 0, 'width': 300, 'height': 200,
+                               'color': "#fff", 'tasks': ['task-1', 'task-2']}},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': 'ctx-a', 'successors': [], 'predecessors': []}
+            for name in ('task-1', 'task-2')
+        },
+    })
+    native = tool.add_task("native", tool.id_allocator.lookup('ctx-a'))
+    exported = tool.to_dict()['tasks']
+    assert tool.id_allocator.external(native) in exported
+    tool.apply_ops([
+        {'op': 'connect_tasks', 'source_id': 'task-1', 'target_id': 'task-2'},
+        {'op': 'set_task_status', 'task_id': tool.id_allocator.external(native), 'status': 'failure'},
+        {'op': 'add_task', 'name': "new", 'context_id': 'ctx-a'},
+    ])
+    task_1, task_2 = tool.id_allocator.lookup('task-1'), tool.id_allocator.lookup('task-2')
+    assert tool.tasks[task_1].successors == [task_2]
+    assert tool.tasks[native].status == TaskStatus.FAILURE
+    # "1" is exported as "task-1", so it does not name the element with model id 1
+    with pytest.raises(ValueError):
+        tool.apply_ops([{'op': 'delete_task', 'task_id': str(task_1)}])
+
+
+def test_apply_ops_rolls_back_a_failed_op():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    task_id = tool.add_task("a", context_id)
+    with pytest.raises(ValueError):
+        tool.apply_ops([
+            {'op': 'add_task', 'name': "b", 'context_id': context_id},
+            {'op': 'delete_task', 'task_id': task_id},
+            {'op': 'delete_task', 'task_id': task_id},
+        ])
+    assert list(tool.tasks) == [task_id]
+    tool.check_stats()
+
+
+def test_undoing_a_multi_context_restore_removes_every_context():
+    tool = BPMTool()
+    first = tool.add_context("First")
+    second = tool.add_context("Second")
+    a = tool.add_task("a", first)
+    b = tool.add_task("b", second)
+    tool.connect_tasks(a, b)
+    snapshots = [tool._snapshot_context(tool.contexts[c]) for c in (first, second)]
+    tasks = [tool._snapshot_task(tool.tasks[t]) for t in (a, b)]
+    tool.clear()
+    tool.restore(snapshots, tasks)
+    assert set(tool.contexts) == {first, second}
+    assert tool.successor_index[a] == {b}
+
+    assert tool.undo()
+    assert tool.contexts == {} and tool.tasks == {}
+    tool.check_stats()
+    assert tool.redo()
+    assert set(tool.contexts) == {first, second}
+    assert tool.contexts[second].tasks == [b]
+    assert tool.successor_index[a] == {b}
+    tool.check_stats()
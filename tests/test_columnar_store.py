@@ -0,0 +1,59 @@
+import numpy as np
+
+from columnar_store import ColumnarBPMTool
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def make_store():
+    store = ColumnarBPMTool(capacity=2)
+    context_id = store.add_context("Main")
+    ids = [store.add_task(f"t{i}", context_id, duration=i + 1.0) for i in range(5)]
+    return store, context_id, ids
+
+
+def test_columns_grow_past_capacity():
+    store, _, ids = make_store()
+    assert store.task_count == 5
+    assert len(store.x) >= 5
+    assert np.isnan(store.duration[5:]).all()
+    assert store.get_task(ids[4]).duration == 5.0
+
+
+def test_pending_edges_merge_into_csr():
+    store, _, (a, b, c, d, e) = make_store()
+    assert store.connect_tasks(a, c)
+    assert store.connect_tasks(a, b)
+    assert not store.connect_tasks(a, b)
+    store.flush_edges()
+    assert not store.connect_tasks(a, c)  # Found in the merged arrays
+    store.connect_tasks(c, e)
+    assert store.successors(a) == [b, c]
+    assert store.predecessors(e) == [c]
+    assert store.get_workflow_stats()['total_connections'] == 3
+
+
+def test_strings_are_interned():
+    store, context_id, _ = make_store()
+    store.add_task("t0", context_id)
+    assert len(store.names) == 5
+    assert len(store.colors) == 1
+
+
+def test_round_trip_through_bpm_tool():
+    store, _, (a, b, c, d, e) = make_store()
+    store.connect_tasks(a, b)
+    store.connect_tasks(b, e)
+    tool = store.to_bpm_tool()
+    assert isinstance(tool, BPMTool)
+    assert tool.to_dict() == store.to_dict()
+    back = ColumnarBPMTool.from_bpm_tool(tool)
+    assert back.to_dict() == store.to_dict()
+
+
+def test_stats_count_statuses():
+    store = ColumnarBPMTool()
+    context_id = store.add_context("Main")
+    store.add_task("ok", context_id, status=TaskStatus.SUCCESS)
+    store.add_task("bad", context_id, status=TaskStatus.FAILURE)
+    counts = store.get_workflow_stats()['status_counts']
+    assert counts['success'] == 1 and counts['failure'] == 1 and counts['default'] == 0
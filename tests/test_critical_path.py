@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pytest
+
+from critical_path import compute_schedule, critical_path
+from enhanced_bpm_tool import BPMTool
+from topological_order import CycleError
+
+
+def csr(n, edges):
+    edges = sorted(edges)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount([s for s, _ in edges], minlength=n), out=indptr[1:])
+    return indptr, np.array([t for _, t in edges], dtype=np.int64)
+
+
+def reference_earliest_start(n, edges, durations):
+    start = [0.0] * n
+    for _ in range(n):
+        for s, t in edges:
+            start[t] = max(start[t], start[s] + durations[s])
+    return start
+
+
+def test_diamond():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a = tool.add_task("a", context_id, duration=2)
+    b = tool.add_task("b", context_id, duration=5)
+    c = tool.add_task("c", context_id, duration=1)
+    d = tool.add_task("d", context_id, duration=3)
+    for source, target in ((a, b), (a, c), (b, d), (c, d)):
+        tool.connect_tasks(source, target)
+    result = critical_path(tool)
+    assert result.makespan == 10
+    assert result.critical_chain == [a, b, d]
+    assert set(result.critical_tasks) == {a, b, d}
+    assert result.timing()[c]['slack'] == 4
+
+
+@pytest.mark.parametrize('n', [10, 200])
+def test_matches_a_reference_on_random_dags(n):
+    # 200 rows exercise the vectorized levels, 10 the scalar tail
+    rng = random.Random(n)
+    edges = {(i, j) for i in range(n) for j in range(i + 1, min(n, i + 30)) if rng.random() < 0.1}
+    durations = [rng.uniform(0.5, 5) for _ in range(n)]
+    indptr, indices = csr(n, edges)
+    schedule = compute_schedule(indptr, indices, np.array(durations))
+    assert np.allclose(schedule.earliest_start, reference_earliest_start(n, sorted(edges), durations))
+    assert (schedule.slack >= -1e-9).all()
+    chain = schedule.critical_chain
+    assert sum(durations[row] for row in chain) == pytest.approx(schedule.makespan)
+
+
+def test_cycles_are_condensed_or_rejected():
+    indptr, indices = csr(3, {(0, 1), (1, 0), (1, 2)})
+    with pytest.raises(CycleError):
+        compute_schedule(indptr, indices, np.ones(3))
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': successors, 'predecessors': [], 'duration': 2}
+            for name, successors in (('p', ['q']), ('q', ['p', 'r']), ('r', []))
+        },
+    })
+    result = critical_path(tool)
+    assert result.makespan == 6
+    assert [sorted(tool.tasks[t].name for t in cycle) for cycle in result.cycles] == [['p', 'q']]
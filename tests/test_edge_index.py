@@ -0,0 +1,64 @@
+from enhanced_bpm_tool import BPMTool
+
+
+def make_chain(n=4):
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(n)]
+    for source, target in zip(ids, ids[1:]):
+        tool.connect_tasks(source, target)
+    return tool, context_id, ids
+
+
+def test_connect_maintains_both_indexes_and_lists():
+    tool, _, (a, b, c, d) = make_chain()
+    assert tool.successor_index[a] == {b}
+    assert tool.predecessor_index[b] == {a}
+    assert tool.tasks[b].predecessors == [a]
+    assert tool.tasks[b].successors == [c]
+    assert not tool.connect_tasks(a, b)  # Duplicate edges are ignored
+    assert tool.edge_count == 3
+
+
+def test_disconnect_updates_indexes():
+    tool, _, (a, b, c, d) = make_chain()
+    assert tool.disconnect_tasks(b, c)
+    assert c not in tool.successor_index[b]
+    assert b not in tool.predecessor_index[c]
+    assert tool.tasks[b].successors == []
+    assert tool.tasks[c].predecessors == []
+    assert not tool.disconnect_tasks(b, c)
+    tool.check_stats()
+
+
+def test_delete_tasks_removes_selection_and_dangling_edges():
+    tool, context_id, (a, b, c, d) = make_chain()
+    assert tool.delete_tasks([b, c, 12345]) == 2
+    assert set(tool.tasks) == {a, d}
+    assert tool.successor_index[a] == set()
+    assert tool.predecessor_index[d] == set()
+    assert tool.tasks[a].successors == []
+    assert tool.contexts[context_id].tasks == [a, d]
+    assert tool.edge_count == 0
+    tool.check_stats()
+
+
+def test_delete_context_removes_its_tasks():
+    tool, context_id, ids = make_chain()
+    other = tool.add_context("Other")
+    outside = tool.add_task("outside", other)
+    tool.connect_tasks(ids[-1], outside)
+    assert tool.delete_context(context_id)
+    assert set(tool.tasks) == {outside}
+    assert tool.predecessor_index[outside] == set()
+    assert tool.tasks[outside].predecessors == []
+    tool.check_stats()
+
+
+def test_load_rebuilds_indexes_from_successors():
+    tool, _, (a, b, c, d) = make_chain()
+    loaded = BPMTool()
+    loaded.load_dict(tool.to_dict())
+    assert loaded.successor_index == tool.successor_index
+    assert loaded.predecessor_index == tool.predecessor_index
+    assert loaded.tasks[c].predecessors == [b]
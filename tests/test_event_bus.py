@@ -0,0 +1,136 @@
+import threading
+import time
+
+import event_bus
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from event_bus import EventBus
+
+
+def test_latest_event_per_element_wins():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe(received.append, window=0)
+    for status in ("running", "success"):
+        bus.publish(event_bus.TASK_STATUS, 1, status)
+    bus.publish(event_bus.TASK_STATUS, 2, "failure")
+    bus.changed()
+    assert [(e.id, e.data) for e in received[0]] == [(1, "success"), (2, "failure")]
+    subscription.close()
+    assert not bus
+
+
+def test_kinds_filter_and_reset_drop_events():
+    bus = EventBus()
+    received = []
+    bus.subscribe(received.append, kinds=[event_bus.TASK_MOVED, event_bus.RESET], window=0)
+    bus.publish(event_bus.TASK_STATUS, 1, "success")
+    bus.publish(event_bus.TASK_MOVED, 1, (0, 0))
+    bus.publish(event_bus.RESET)
+    bus.changed()
+    assert [e.kind for e in received[0]] == [event_bus.RESET]
+
+
+def test_windowed_subscription_delivers_once_from_a_timer():
+    bus = EventBus()
+    received = []
+    delivered = threading.Event()
+
+    def callback(events):
+        received.append(events)
+        delivered.set()
+    bus.subscribe(callback, window=0.05)
+    for task_id in range(100):
+        bus.publish(event_bus.TASK_STATUS, task_id, "success")
+    bus.changed()  # Not for windowed subscriptions
+    assert not received
+    assert delivered.wait(2)
+    time.sleep(0.1)
+    assert len(received) == 1 and len(received[0]) == 100
+
+
+def test_close_delivers_pending_events():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe(received.append, window=60)
+    bus.publish(event_bus.TASK_ADDED, 1)
+    subscription.close()
+    assert [e.kind for e in received[0]] == [event_bus.TASK_ADDED]
+
+
+def test_tool_publishes_one_delivery_per_batch():
+    tool = BPMTool()
+    received = []
+    tool.subscribe(received.append, window=0)
+    context_id = tool.add_context("Main")
+    with tool.batch():
+        a = tool.add_task("a", context_id)
+        b = tool.add_task("b", context_id)
+        tool.connect_tasks(a, b)
+        tool.move_task(a, 10, 20)
+    assert len(received) == 2
+    kinds = {(e.kind, e.id): e.data for e in received[1]}
+    assert kinds[(event_bus.EDGE_CHANGED, (a, b))] is True
+    assert kinds[(event_bus.TASK_MOVED, a)] == (10, 20)
+    tool.undo()
+    assert {e.kind for e in received[2]} >= {event_bus.TASK_REMOVED, event_bus.EDGE_CHANGED}
+
+
+def test_status_events_carry_the_shown_status():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a = tool.add_task("a", context_id)
+    received = []
+    tool.subscribe(received.append, kinds=[event_bus.TASK_STATUS], window=0)
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    assert [(e.id, e.data) for e in received[0]] == [(a, TaskStatus.FAILURE)]
+
+
+def test_readers_wait_for_a_batch_on_another_thread():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    inside, release = threading.Event(), threading.Event()
+
+    def writer():
+        with tool.batch():
+            tool.add_task("a", context_id)
+            inside.set()
+            release.wait(2)
+            tool.add_task("b", context_id)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    inside.wait(2)
+    threading.Timer(0.1, release.set).start()
+    # Never sees the half-applied batch
+    assert tool.get_workflow_stats()['total_tasks'] == 2
+    thread.join()
+
+
+def test_rendering_and_stats_during_a_run_on_another_thread():
+    tool = BPMTool()
+    contexts = [tool.add_context(f"c{i}", 100 + 300 * (i % 4), 100 + 300 * (i // 4)) for i in range(8)]
+    previous = None
+    for i in range(400):
+        task_id = tool.add_task(f"t{i}", contexts[i % 8])
+        if previous is not None and i % 3:
+            tool.connect_tasks(previous, task_id)
+        previous = task_id
+    tool.generate_svg()
+    errors = []
+
+    def run():
+        try:
+            tool.run(max_workers=8, actions=dict.fromkeys(tool.tasks, lambda task: None))
+        except Exception as e:
+            errors.append(e)
+    runner = threading.Thread(target=run)
+    runner.start()
+    while runner.is_alive():
+        tool.generate_svg()
+        tool.get_workflow_stats()
+    runner.join()
+    assert not errors
+    assert tool.get_workflow_stats()['status_counts']['success'] == 400
+    # The cached fragments match a render from scratch
+    svg = tool.generate_svg()
+    tool._renderer.invalidate()
+    assert tool.generate_svg() == svg
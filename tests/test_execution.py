@@ -0,0 +1,248 @@
+import threading
+import time
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def diamond():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a, b, c, d = (tool.add_task(name, context_id) for name in "abcd")
+    for source, target in ((a, b), (a, c), (b, d), (c, d)):
+        tool.connect_tasks(source, target)
+    return tool, context_id, (a, b, c, d)
+
+
+def recorder(log, lock=None):
+    lock = lock or threading.Lock()
+
+    def action(task):
+        with lock:
+            log.append(task.name)
+        return task.name.upper()
+    return action
+
+
+def test_threads_run_in_dependency_order():
+    tool, _, (a, b, c, d) = diamond()
+    order = []
+    result = tool.run(actions=dict.fromkeys((a, b, c, d), recorder(order)))
+    assert result.ok
+    assert order[0] == "a" and order[-1] == "d"
+    assert result.outputs[d] == "D"
+    assert all(task.status == TaskStatus.SUCCESS for task in tool.tasks.values())
+
+
+def test_a_run_leaves_the_undo_journal_alone():
+    tool, context_id, (a, b, c, d) = diamond()
+    position = (tool.tasks[d].x, tool.tasks[d].y)
+    tool.move_task(d, 600, 300)
+    undo = list(tool.journal.undo_stack)
+    tool.journal._last_push = 0.0
+    tool.move_task(c, 400, 300)
+    tool.undo()
+    redo = list(tool.journal.redo_stack)
+    for engine in ("threads", "asyncio"):
+        assert tool.run(engine=engine).ok
+    assert list(tool.journal.undo_stack) == undo
+    assert list(tool.journal.redo_stack) == redo
+    # Undo reverts the last edit, not a status transition of the run
+    tool.undo()
+    assert (tool.tasks[d].x, tool.tasks[d].y) == position
+    assert all(task.status == TaskStatus.SUCCESS for task in tool.tasks.values())
+
+
+def test_failure_leaves_dependents_not_run():
+    tool, _, (a, b, c, d) = diamond()
+
+    def boom(task):
+        raise RuntimeError("no")
+    result = tool.run(actions={b: boom})
+    assert result.failed == [b]
+    assert result.errors[b] == "RuntimeError: no"
+    assert result.not_run == [d]
+    assert tool.tasks[d].status == TaskStatus.SKIPPED
+    assert tool.tasks[c].status == TaskStatus.SUCCESS
+
+
+def test_succeeded_tasks_are_not_run_again():
+    tool, _, (a, b, c, d) = diamond()
+    tool.run()
+    order = []
+    tool.set_task_status(d, TaskStatus.DEFAULT)
+    result = tool.run(actions=dict.fromkeys((a, b, c, d), recorder(order)))
+    assert order == ["d"]
+    assert result.succeeded == [d]
+
+
+def test_max_workers_bounds_concurrency():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(12)]
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def action(task):
+        with lock:
+            running.append(task.id)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(task.id)
+    result = tool.run(max_workers=3, actions=dict.fromkeys(ids, action))
+    assert result.ok
+    assert max(peak) <= 3
+
+
+def test_cycles_run_as_one_unit():
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': successors, 'predecessors': []}
+            for name, successors in (('x', ['p']), ('p', ['q']), ('q', ['p', 'y']), ('y', []))
+        },
+    })
+    order = []
+    result = tool.run(actions=dict.fromkeys(tool.tasks, recorder(order)))
+    assert result.ok
+    assert order[0] == "x" and order[-1] == "y"
+    assert sorted(order[1:3]) == ["p", "q"]
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        BPMTool().run(engine="fibers")
+
+
+def test_asyncio_running_count_never_exceeds_the_context_limit():
+    import asyncio
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(20)]
+    running = []
+    tool.add_change_listener(lambda: running.append(tool.status_counts[TaskStatus.RUNNING]))
+
+    async def action(task):
+        running.append(tool.status_counts[TaskStatus.RUNNING])
+        await asyncio.sleep(0.005)
+    result = tool.run(engine="asyncio", max_workers=2, actions=dict.fromkeys(ids, action))
+    assert result.ok
+    assert max(running) == 2
+
+
+def test_asyncio_limits_are_per_context():
+    import asyncio
+    tool = BPMTool()
+    slow = tool.add_context("Slow")
+    fast = tool.add_context("Fast")
+    tool.set_context_concurrency(slow, 1)
+    slow_ids = [tool.add_task(f"s{i}", slow) for i in range(4)]
+    fast_ids = [tool.add_task(f"f{i}", fast) for i in range(4)]
+    peak = {slow: 0, fast: 0}
+    active = {slow: 0, fast: 0}
+
+    async def action(task):
+        active[task.context_id] += 1
+        peak[task.context_id] = max(peak[task.context_id], active[task.context_id])
+        await asyncio.sleep(0.005)
+        active[task.context_id] -= 1
+    result = tool.run(engine="asyncio", actions=dict.fromkeys(slow_ids + fast_ids, action))
+    assert result.ok
+    assert peak == {slow: 1, fast: 4}
+
+
+def test_asyncio_fail_fast_cancels_the_rest():
+    import asyncio
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    bad = tool.add_task("bad", context_id)
+    slow = tool.add_task("slow", context_id)
+
+    async def fail(task):
+        raise RuntimeError("no")
+
+    async def wait(task):
+        await asyncio.sleep(5)
+    started = time.perf_counter()
+    result = tool.run(engine="asyncio", fail_fast=True, actions={bad: fail, slow: wait})
+    assert time.perf_counter() - started < 2
+    assert result.failed == [bad]
+    assert result.not_run == [slow]
+    assert tool.tasks[slow].status == TaskStatus.DEFAULT
+
+
+def test_threads_report_a_handler_raising_base_exception():
+    tool, _, (a, b, c, d) = diamond()
+
+    def leave(task):
+        raise SystemExit(3)
+    result = tool.run(actions={b: leave})
+    assert result.failed == [b]
+    assert result.errors[b] == "SystemExit: 3"
+    assert result.not_run == [d]
+
+
+def double_inputs(spec):
+    return sum(spec.inputs.values()) * 2 if spec.inputs else 1
+
+
+def big_output(spec):
+    return bytes(2048)
+
+
+def byte_count(spec):
+    return sum(len(value) for value in spec.inputs.values())
+
+
+def test_processes_pass_outputs_to_dependents():
+    tool, _, (a, b, c, d) = diamond()
+    result = tool.run(engine="processes", max_workers=2, actions=dict.fromkeys((a, b, c, d), double_inputs))
+    assert result.ok
+    assert [result.outputs[t] for t in (a, b, c, d)] == [1, 2, 2, 8]
+
+
+def test_processes_share_large_outputs():
+    tool, _, (a, b, c, d) = diamond()
+    actions = {a: big_output, b: byte_count, c: byte_count}
+    result = tool.run(engine="processes", max_workers=2, actions=actions, shared_memory_threshold=1024)
+    assert result.ok
+    assert result.outputs[a] == bytes(2048)
+    assert result.outputs[b] == 2048
+
+
+def test_a_failed_chunk_fails_every_task_of_its_units():
+    from concurrent.futures import Future
+    from execution import ProcessPoolRunner
+    from task_worker import TaskSpec
+    future = Future()
+    future.set_exception(RuntimeError("worker died"))
+    chunk = [(0, [TaskSpec(1, "p", None), TaskSpec(2, "q", None)]), (1, [])]
+    assert ProcessPoolRunner._chunk_outcomes(chunk, future) == [
+        (0, [(1, False, "RuntimeError: worker died"), (2, False, "RuntimeError: worker died")]),
+        (1, []),
+    ]
+
+
+def test_an_unpicklable_action_fails_the_whole_cycle_once():
+    from enhanced_bpm_tool import RetryPolicy
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': successors, 'predecessors': []}
+            for name, successors in (('p', ['q']), ('q', ['p']))
+        },
+    })
+    p, q = tool.id_allocator.lookup('p'), tool.id_allocator.lookup('q')
+    retry = RetryPolicy(max_attempts=2, backoff=0.01, jitter=0)
+    result = tool.run(engine="processes", max_workers=1, actions={p: lambda spec: 1}, retry=retry)
+    assert sorted(result.failed) == sorted([p, q])
+    assert set(result.errors) == {p, q}
+    assert result.retries == {p: 1, q: 1}
+    assert tool.tasks[p].status == tool.tasks[q].status == TaskStatus.FAILURE
@@ -0,0 +1,150 @@
+import threading
+
+import numpy as np
+import pytest
+
+from enhanced_bpm_tool import BPMTool, RetryPolicy, TaskStatus
+from execution_plan import ExecutionPlan, PlanRunner
+
+
+def diamond():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a, b, c, d = (tool.add_task(name, context_id) for name in "abcd")
+    for source, target in ((a, b), (a, c), (b, d), (c, d)):
+        tool.connect_tasks(source, target)
+    return tool, (a, b, c, d)
+
+
+def load_cyclic(edges):
+    tool = BPMTool()
+    names = sorted({name for edge in edges for name in edge})
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': [t for s, t in edges if s == name], 'predecessors': []}
+            for name in names
+        },
+    })
+    return tool, {name: tool.id_allocator.lookup(name) for name in names}
+
+
+def test_compile_builds_csr_arrays_in_topological_order():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+    assert len(plan) == 4
+    row = {task_id: index for index, task_id in enumerate(plan.task_ids)}
+    assert row[a] == 0 and row[d] == 3
+    assert plan.units == ((0,), (1,), (2,), (3,))
+    assert plan.sources == (0,)
+    assert plan.in_degree.tolist() == [0, 1, 1, 2]
+    assert plan.indptr.tolist() == [0, 2, 3, 4, 4]
+    assert sorted(plan.indices[plan.indptr[0]:plan.indptr[1]].tolist()) == [row[b], row[c]]
+    with pytest.raises(ValueError):
+        plan.in_degree[0] = 5
+
+
+def test_plan_is_a_snapshot_of_the_tool():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+    e = tool.add_task("e", tool.tasks[a].context_id)
+    tool.connect_tasks(d, e)
+    tool.set_task_duration(a, 7)
+    assert len(plan) == 4
+    assert plan.durations[0] is None
+    assert e not in plan.task_ids
+
+
+def test_instances_do_not_share_in_degrees():
+    tool, _ = diamond()
+    plan = tool.compile()
+    first, second = plan.start(), plan.start()
+    assert first.complete(0) == [1, 2]
+    assert first.complete(1) == []
+    assert first.complete(2) == [3]
+    assert second.remaining == [0, 1, 1, 2]
+    assert plan.in_degree.tolist() == [0, 1, 1, 2]
+
+
+def test_cycles_compile_into_one_unit():
+    tool, ids = load_cyclic([('x', 'p'), ('p', 'q'), ('q', 'p'), ('q', 'y')])
+    plan = tool.compile()
+    assert len(plan.units) == 3
+    cycle = next(unit for unit in plan.units if len(unit) == 2)
+    assert {plan.task_ids[row] for row in cycle} == {ids['p'], ids['q']}
+    assert plan.in_degree.tolist() == [0, 1, 1]
+
+
+def test_run_passes_specs_and_leaves_the_tool_untouched():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+    seen = []
+    lock = threading.Lock()
+
+    def action(spec):
+        with lock:
+            seen.append(spec.name)
+        return spec.name.upper()
+    result = plan.run(actions=dict.fromkeys((a, b, c, d), action), max_workers=2)
+    assert result.ok
+    assert seen[0] == "a" and seen[-1] == "d"
+    assert result.outputs[d] == "D"
+    assert all(task.status == TaskStatus.DEFAULT for task in tool.tasks.values())
+
+
+def test_repeated_runs_are_independent():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+
+    def boom(spec):
+        raise RuntimeError("no")
+    failed = plan.run(actions={b: boom})
+    assert failed.failed == [b]
+    assert failed.not_run == [d]
+    assert plan.run().ok
+
+
+def test_failed_task_is_retried_under_its_policy():
+    tool, (a, b, c, d) = diamond()
+    tool.set_task_retry(b, RetryPolicy(max_attempts=3, backoff=0.01, jitter=0))
+    plan = tool.compile()
+    calls = []
+
+    def flaky(spec):
+        calls.append(spec.name)
+        if len(calls) < 3:
+            raise RuntimeError("not yet")
+    result = plan.run(actions={b: flaky})
+    assert result.ok
+    assert calls == ["b"] * 3
+    assert result.retries[b] == 2
+
+
+def test_retried_cycle_resumes_at_the_failed_member():
+    tool, ids = load_cyclic([('p', 'q'), ('q', 'p')])
+    plan = tool.compile()
+    calls = []
+
+    def record(spec):
+        calls.append(spec.name)
+        if spec.name == plan.names[plan.units[0][1]] and calls.count(spec.name) == 1:
+            raise RuntimeError("once")
+    result = plan.run(actions=dict.fromkeys(ids.values(), record),
+                      retry=RetryPolicy(max_attempts=2, backoff=0.01, jitter=0))
+    assert result.ok
+    first, second = (plan.names[row] for row in plan.units[0])
+    assert calls == [first, second, second]
+
+
+def test_cancel_drops_pending_retries():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+
+    def boom(spec):
+        raise RuntimeError("no")
+    runner = PlanRunner(plan, {a: boom}, retry=RetryPolicy(max_attempts=3, backoff=10, jitter=0))
+    threading.Timer(0.2, runner.cancel).start()
+    result = runner.run()
+    assert result.failed == [a]
+    assert sorted(result.not_run) == sorted([b, c, d])
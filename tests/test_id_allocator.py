@@ -0,0 +1,54 @@
+import pickle
+from dataclasses import replace
+
+from enhanced_bpm_tool import BPMTool
+from id_allocator import IntegerIdAllocator, UUIDAllocator
+
+
+def test_integer_ids_are_dense_and_truthy():
+    allocator = IntegerIdAllocator()
+    assert [allocator.allocate() for _ in range(3)] == [1, 2, 3]
+    allocator.reset()
+    assert allocator.allocate() == 1
+
+
+def test_external_ids_round_trip():
+    allocator = IntegerIdAllocator()
+    uuid_id = allocator.register("3f2b8c1e-0000-4000-8000-000000000000")
+    named = allocator.register("task-001")
+    assert allocator.register("task-001") == named
+    assert allocator.lookup("task-001") == named
+    assert allocator.external(uuid_id) == "3f2b8c1e-0000-4000-8000-000000000000"
+    assert allocator.external(allocator.allocate()) == str(named + 1)
+
+
+def test_own_exports_keep_their_integer():
+    allocator = IntegerIdAllocator()
+    assert allocator.register("42") == 42
+    assert allocator.allocate() == 43
+    # Taken numbers and non-canonical digits get a fresh id and keep their text
+    assert allocator.register("007") == 44
+    assert allocator.external(44) == "007"
+
+
+def test_file_ids_survive_a_load_save_cycle():
+    source = BPMTool(id_allocator=UUIDAllocator())
+    context_id = source.add_context("Main")
+    a = source.add_task("a", context_id)
+    b = source.add_task("b", context_id)
+    source.connect_tasks(a, b)
+    data = source.to_dict()
+    tool = BPMTool()
+    tool.load_dict(data)
+    assert all(isinstance(task_id, int) for task_id in tool.tasks)
+    assert tool.to_dict() == data
+
+
+def test_tasks_and_contexts_have_no_instance_dict():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    task = tool.tasks[tool.add_task("a", context_id)]
+    assert not hasattr(task, '__dict__')
+    assert not hasattr(tool.contexts[context_id], '__dict__')
+    assert replace(task, name="b").name == "b"
+    assert pickle.loads(pickle.dumps(task)) == task
@@ -0,0 +1,110 @@
+from collections import Counter
+
+import numpy as np
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from instance_store import CODE, DEFAULT, FAILURE, SKIPPED, SUCCESS, InstanceStore
+
+
+def diamond():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a, b, c, d = (tool.add_task(name, context_id) for name in "abcd")
+    for source, target in ((a, b), (a, c), (b, d), (c, d)):
+        tool.connect_tasks(source, target)
+    return tool, (a, b, c, d)
+
+
+def load_cyclic(edges):
+    tool = BPMTool()
+    names = sorted({name for edge in edges for name in edge})
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': [t for s, t in edges if s == name], 'predecessors': []}
+            for name in names
+        },
+    })
+    return tool, {name: tool.id_allocator.lookup(name) for name in names}
+
+
+def test_codes_follow_task_status_order():
+    assert [CODE[status] for status in TaskStatus] == list(range(len(TaskStatus)))
+
+
+def test_all_instances_advance_together():
+    tool, _ = diamond()
+    store = InstanceStore(tool.compile(), 1000)
+    assert store.instances == 1000
+    instances, units = store.ready()
+    assert len(instances) == 1000 and set(units.tolist()) == {0}
+    # a, then b and c together, then d
+    assert store.run() == 3
+    assert (store.status == SUCCESS).all()
+    assert (store.remaining == 0).all()
+
+
+def test_a_failure_skips_downstream_in_that_instance_only():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+    row = {task_id: index for index, task_id in enumerate(plan.task_ids)}
+    store = InstanceStore(plan, 4)
+
+    def fail_b_in_odd_instances(store, instances, units):
+        return ~((units == row[b]) & (instances % 2 == 1))
+    store.run(fail_b_in_odd_instances)
+    assert store.status[:, row[b]].tolist() == [SUCCESS, FAILURE, SUCCESS, FAILURE]
+    assert store.status[:, row[d]].tolist() == [SUCCESS, SKIPPED, SUCCESS, SKIPPED]
+    assert (store.status[:, row[c]] == SUCCESS).all()
+
+
+def test_cycle_rows_move_together():
+    tool, ids = load_cyclic([('x', 'p'), ('p', 'q'), ('q', 'p'), ('q', 'y')])
+    plan = tool.compile()
+    row = {task_id: index for index, task_id in enumerate(plan.task_ids)}
+    store = InstanceStore(plan, 3)
+    store.step()
+    store.step()
+    assert (store.status[:, [row[ids['p']], row[ids['q']]]] == SUCCESS).all()
+    assert (store.status[:, row[ids['y']]] == DEFAULT).all()
+    store.run()
+    assert (store.status == SUCCESS).all()
+
+
+def test_task_counts_feed_the_heat_view():
+    tool, (a, b, c, d) = diamond()
+    plan = tool.compile()
+    row = {task_id: index for index, task_id in enumerate(plan.task_ids)}
+    store = InstanceStore(plan, 10)
+    store.run(lambda store, instances, units: ~((units == row[c]) & (instances < 3)))
+    counts = store.task_counts()
+    assert counts[c] == Counter({TaskStatus.SUCCESS: 7, TaskStatus.FAILURE: 3})
+    assert counts[d] == Counter({TaskStatus.SUCCESS: 7, TaskStatus.SKIPPED: 3})
+    assert store.counts().sum(axis=1).tolist() == [10] * 4
+
+    tool.show_instances(store)
+    assert tool.instance_counts == counts
+    svg = tool.generate_svg()
+    assert "✓7 ✗3" in svg
+    tool.show_instances(None)
+    assert "✓7" not in tool.generate_svg()
+
+
+def test_heat_color_runs_green_to_red():
+    tool = BPMTool()
+    assert tool.get_heat_color(0.0) == "#28a745"
+    assert tool.get_heat_color(0.5) == "#ffc107"
+    assert tool.get_heat_color(1.0) == "#dc3545"
+
+
+def test_executor_may_return_none_for_all_succeeded():
+    tool, _ = diamond()
+    store = InstanceStore(tool.compile(), 5)
+    calls = []
+
+    def execute(store, instances, units):
+        calls.append(len(units))
+    store.run(execute)
+    assert calls == [5, 10, 5]
+    assert np.all(store.status == SUCCESS)
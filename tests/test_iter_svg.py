@@ -0,0 +1,60 @@
+import xml.etree.ElementTree as ET
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def grid(columns=10, rows=10):
+    """A context per cell, spread well beyond the 1400x900 canvas."""
+    tool = BPMTool()
+    previous = None
+    for i in range(columns * rows):
+        context_id = tool.add_context(f"c{i}", 50 + 400 * (i % columns), 50 + 250 * (i // columns))
+        task_id = tool.add_task(f"t{i}", context_id)
+        if previous is not None:
+            tool.connect_tasks(previous, task_id)
+        previous = task_id
+    return tool
+
+
+def test_chunks_join_to_the_rendered_view():
+    tool = grid()
+    chunks = list(tool.iter_svg(chunk_size=1024))
+    assert ''.join(chunks) == tool.generate_svg()
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 1024 for chunk in chunks[:-1])
+
+
+def test_whole_covers_every_element_at_full_detail():
+    tool = grid()
+    tool.zoom_level = 0.2
+    view = ET.fromstring(''.join(tool.iter_svg()))
+    whole = ET.fromstring(''.join(tool.iter_svg(whole=True)))
+    assert len(whole.findall(f".//{SVG}g[@class='task']")) == 100
+    assert len(whole.findall(f".//{SVG}g[@class='connection']")) == 99
+    # The summary view collapses tasks into their contexts
+    assert not view.findall(f".//{SVG}g[@class='task']")
+    x0, y0, width, height = map(float, whole.get('viewBox').split())
+    assert x0 < 50 and x0 + width > 50 + 400 * 9 + 300
+
+
+def test_export_writes_the_whole_workflow(tmp_path):
+    tool = grid(3, 2)
+    tool.set_task_status(next(iter(tool.tasks)), TaskStatus.FAILURE)
+    path = tmp_path / "out.svg"
+    assert tool.export_svg(str(path)).startswith("✅")
+    assert path.read_text(encoding='utf-8') == ''.join(tool.iter_svg(whole=True))
+    assert "Failure" in path.read_text(encoding='utf-8')
+
+
+def test_export_reports_errors(tmp_path):
+    tool = grid(1, 1)
+    assert tool.export_svg(str(tmp_path / "missing" / "out.svg")).startswith("❌")
+
+
+def test_empty_workflow_streams_a_valid_document():
+    tool = BPMTool()
+    chunks = list(tool.iter_svg(whole=True))
+    assert len(chunks) == 1
+    assert ET.fromstring(chunks[0]).tag == f"{SVG}svg"
@@ -0,0 +1,69 @@
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from operation_log import OperationLog
+
+
+def test_ring_buffer_drops_oldest_entries():
+    log = OperationLog(capacity=2)
+    for i in range(3):
+        log.push([(('set_task_duration', i, 1), ('set_task_duration', i, None))])
+    assert [entry[0][0][1] for entry in log.undo_stack] == [1, 2]
+
+
+def test_moves_of_one_element_coalesce():
+    log = OperationLog()
+    log.push([(('move_task', 1, 10, 10), ('move_task', 1, 0, 0))])
+    log.push([(('move_task', 1, 20, 20), ('move_task', 1, 10, 10))])
+    log.push([(('move_task', 2, 5, 5), ('move_task', 2, 0, 0))])
+    assert len(log.undo_stack) == 2
+    assert log.undo_stack[0] == [(('move_task', 1, 20, 20), ('move_task', 1, 0, 0))]
+
+
+def test_a_move_after_undo_does_not_merge_into_an_older_entry():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a = tool.add_task("a", context_id, 120, 120)
+    tool.journal._last_push = 0.0
+    tool.move_task(a, 500, 120)
+    tool.journal._last_push = 0.0  # Longer than the coalesce window
+    tool.move_task(a, 600, 120)
+    tool.undo()
+    tool.move_task(a, 700, 120)  # Right after the undo
+    tool.undo()
+    assert tool.tasks[a].x == 500
+
+
+def test_new_edit_clears_redo():
+    log = OperationLog()
+    log.push([(('a',), ('b',))])
+    log.pop_undo()
+    assert log.can_redo()
+    log.push([(('c',), ('d',))])
+    assert not log.can_redo()
+
+
+def test_undo_redo_round_trip():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a = tool.add_task("a", context_id)
+    b = tool.add_task("b", context_id)
+    tool.connect_tasks(a, b)
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    tool.journal._last_push = 0.0
+    tool.move_task(b, 400, 400)
+    before = tool.to_dict()
+
+    tool.delete_context(context_id)
+    assert tool.tasks == {}
+    assert tool.undo()
+    assert tool.to_dict() == before
+    assert tool.tasks[b].status == TaskStatus.SKIPPED
+
+    for _ in range(6):
+        assert tool.undo()
+    assert not tool.undo()
+    assert tool.contexts == {}
+    for _ in range(7):
+        assert tool.redo()
+    assert not tool.redo()
+    assert tool.contexts == {}
+    tool.check_stats()
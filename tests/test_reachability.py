@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool
+
+
+def search(tool, start):
+    seen, stack = set(), [start]
+    while stack:
+        for successor in tool.successor_index[stack.pop()]:
+            if successor not in seen:
+                seen.add(successor)
+                stack.append(successor)
+    return seen
+
+
+@pytest.mark.parametrize('max_nodes', [20000, 5])
+def test_queries_match_a_graph_search_under_edits(max_nodes):
+    rng = random.Random(max_nodes)
+    tool = BPMTool()
+    tool.reachability.max_nodes = max_nodes
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(25)]
+    tool.descendants(ids[0])  # Build the closure, then keep it up to date
+    for step in range(200):
+        action = rng.random()
+        if action < 0.5:
+            a, b = sorted(rng.sample(list(tool.tasks), 2))
+            tool.connect_tasks(a, b)
+        elif action < 0.8:
+            a, b = rng.sample(list(tool.tasks), 2)
+            tool.disconnect_tasks(a, b)
+        elif action < 0.9:
+            tool.delete_task(rng.choice(list(tool.tasks)))
+        else:
+            ids.append(tool.add_task(f"n{step}", context_id))
+        for task_id in rng.sample(list(tool.tasks), 3):
+            expected = search(tool, task_id)
+            assert tool.descendants(task_id) == expected
+            other = rng.choice(list(tool.tasks))
+            assert tool.reachable(task_id, other) == (other in expected)
+            assert (task_id in tool.ancestors(other)) == (other in expected)
+
+
+def test_cycles_reach_themselves():
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': successors, 'predecessors': []}
+            for name, successors in (('p', ['q']), ('q', ['p', 'r']), ('r', []))
+        },
+    })
+    p, q, r = (tool.id_allocator.lookup(name) for name in "pqr")
+    assert tool.descendants(p) == {p, q, r}
+    assert tool.ancestors(r) == {p, q}
+    assert not tool.reachable(r, p)
+    tool.disconnect_tasks(q, p)
+    assert tool.descendants(p) == {q, r}
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool, RetryPolicy, TaskStatus
+from execution import ThreadPoolRunner
+
+
+def chain(*names):
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(name, context_id) for name in names]
+    for source, target in zip(ids, ids[1:]):
+        tool.connect_tasks(source, target)
+    return tool, ids
+
+
+def flaky(failures):
+    calls = []
+
+    def action(task):
+        calls.append(task.name)
+        if len(calls) <= failures:
+            raise RuntimeError(f"attempt {len(calls)}")
+        return "ok"
+    return action, calls
+
+
+FAST = RetryPolicy(max_attempts=3, backoff=0.01, jitter=0)
+
+
+def test_delay_grows_exponentially_up_to_max_delay():
+    policy = RetryPolicy(backoff=1.0, multiplier=2.0, max_delay=5.0, jitter=0)
+    assert [policy.delay(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_delay_jitter_stays_within_bounds():
+    policy = RetryPolicy(backoff=1.0, jitter=0.25)
+    delays = [policy.delay(1) for _ in range(200)]
+    assert all(0.75 <= delay <= 1.25 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_flaky_task_is_retried_until_it_succeeds(engine):
+    tool, (a, b) = chain("a", "b")
+    action, calls = flaky(2)
+    log = []
+    result = tool.run(actions={a: action}, engine=engine, retry=FAST, log=log)
+    assert result.ok
+    assert calls == ["a", "a", "a"]
+    assert result.retries[a] == 2
+    assert result.errors == {}
+    statuses = [record['status'] for record in log if record['task'] == tool.id_allocator.external(a)]
+    assert statuses == ["running", "delayed", "running", "delayed", "running", "success"]
+    assert tool.tasks[b].status == TaskStatus.SUCCESS
+
+
+def test_failure_is_final_once_attempts_run_out():
+    tool, (a, b) = chain("a", "b")
+    action, calls = flaky(5)
+    result = tool.run(actions={a: action}, retry=FAST)
+    assert len(calls) == 3
+    assert result.failed == [a]
+    assert result.errors[a] == "RuntimeError: attempt 3"
+    assert tool.tasks[a].status == TaskStatus.FAILURE
+    assert result.not_run == [b]
+
+
+def test_task_policy_overrides_run_default():
+    tool, (a,) = chain("a")
+    tool.set_task_retry(a, RetryPolicy(max_attempts=2, backoff=0.01, jitter=0))
+    action, calls = flaky(5)
+    tool.run(actions={a: action}, retry=FAST)
+    assert len(calls) == 2
+
+
+def test_no_policy_means_no_retry():
+    tool, (a,) = chain("a")
+    action, calls = flaky(1)
+    result = tool.run(actions={a: action})
+    assert calls == ["a"]
+    assert result.failed == [a]
+
+
+def test_dependents_show_delayed_while_a_retry_is_pending():
+    tool, (a, b) = chain("a", "b")
+    seen = []
+    action, calls = flaky(1)
+    runner = ThreadPoolRunner(tool, actions={a: action}, retry=RetryPolicy(max_attempts=2, backoff=0.3, jitter=0))
+
+    def watch():
+        while tool.tasks[a].status is not TaskStatus.DELAYED:
+            if tool.tasks[a].status is TaskStatus.SUCCESS:
+                return
+            time.sleep(0.001)
+        seen.append(tool.tasks[b].status)
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    assert runner.run().ok
+    watcher.join()
+    assert seen == [TaskStatus.DELAYED]
+
+
+def test_cancel_while_waiting_ends_as_failure():
+    tool, (a, b) = chain("a", "b")
+    action, calls = flaky(5)
+    runner = ThreadPoolRunner(tool, actions={a: action}, retry=RetryPolicy(max_attempts=3, backoff=10, jitter=0))
+    threading.Timer(0.2, runner.cancel).start()
+    result = runner.run()
+    assert calls == ["a"]
+    assert result.failed == [a]
+    assert tool.tasks[a].status == TaskStatus.FAILURE
+
+
+def test_retry_policy_is_saved_and_undoable():
+    tool, (a,) = chain("a")
+    policy = RetryPolicy(max_attempts=4, backoff=0.5)
+    tool.set_task_retry(a, policy)
+    copy = BPMTool()
+    copy.load_dict(json.loads(json.dumps(tool.to_dict())))
+    assert next(iter(copy.tasks.values())).retry == policy
+    tool.undo()
+    assert tool.tasks[a].retry is None
+
+
+def test_apply_ops_accepts_a_retry_dict():
+    tool, (a,) = chain("a")
+    tool.apply_ops([{'op': 'set_task_retry', 'task_id': a, 'retry': {'max_attempts': 5}}])
+    assert tool.tasks[a].retry == RetryPolicy(max_attempts=5)
+    with pytest.raises(ValueError):
+        tool.apply_ops([{'op': 'set_task_retry', 'task_id': a, 'retry': {'tries': 5}}])
+    assert tool.tasks[a].retry == RetryPolicy(max_attempts=5)
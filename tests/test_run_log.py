@@ -0,0 +1,88 @@
+import json
+import threading
+
+import pytest
+
+import run_log
+from run_log import RunLog, replay_run_log
+from enhanced_bpm_tool import TaskStatus
+
+
+def test_replay_returns_latest_status_of_unfinished_run(tmp_path):
+    path = str(tmp_path / "run.wal")
+    log = RunLog(path, commit_interval=0)
+    log.append({'type': 'begin', 'engine': 'threads'})
+    log.append({'task': 'a', 'status': 'running'})
+    log.append({'task': 'a', 'status': 'success'})
+    log.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"task":"b","sta')  # Torn by a crash
+    run = replay_run_log(path)
+    assert run['engine'] == 'threads'
+    assert run['statuses'] == {'a': 'success'}
+
+
+def test_replay_of_finished_run_is_none(tmp_path):
+    path = str(tmp_path / "run.wal")
+    log = RunLog(path, commit_interval=0)
+    log.append({'type': 'begin'})
+    log.append({'type': 'end'})
+    log.close()
+    assert replay_run_log(path) is None
+    assert replay_run_log(str(tmp_path / "missing.wal")) is None
+
+
+def test_flush_raises_when_commit_fails(tmp_path, monkeypatch):
+    def broken_fsync(fd):
+        raise OSError("disk gone")
+    monkeypatch.setattr(run_log.os, 'fsync', broken_fsync)
+    log = RunLog(str(tmp_path / "run.wal"), commit_interval=0)
+    log.append({'type': 'begin'})
+    errors = []
+
+    def flush():
+        try:
+            log.flush()
+        except OSError as e:
+            errors.append(e)
+    waiter = threading.Thread(target=flush, daemon=True)
+    waiter.start()
+    waiter.join(5)
+    assert not waiter.is_alive(), "flush hung after the commit thread died"
+    assert "disk gone" in str(errors[0])
+    with pytest.raises(OSError):
+        log.append({'task': 'a', 'status': 'success'})
+    with pytest.raises(OSError):
+        log.close()
+
+
+def test_resume_runs_only_the_unfinished_tasks(tmp_path):
+    docker_bmp_tool = pytest.importorskip("docker_bmp_tool")
+    tool = docker_bmp_tool.BPMTool()
+    tool.data_dir = str(tmp_path)
+    context_id = tool.add_context("Main")
+    a, b, c = (tool.add_task(name, context_id) for name in "abc")
+    tool.connect_tasks(a, b)
+    tool.connect_tasks(b, c)
+    assert tool.run().ok
+
+    # Cut the log off as if the container stopped while c was running
+    path = tool.resolve_path(tool.RUN_LOG)
+    with open(path, 'rb') as f:
+        records = [json.loads(line) for line in f]
+    c_name = tool.id_allocator.external(c)
+    kept = [r for r in records if r.get('type') != 'end' and not (r.get('task') == c_name and r['status'] == 'success')]
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(r) + '\n' for r in kept)
+
+    fresh = docker_bmp_tool.BPMTool()
+    fresh.data_dir = str(tmp_path)
+    run = fresh.load_interrupted_run()
+    assert run is not None
+    # The snapshot is loaded before anything runs
+    assert [t.status for t in fresh.tasks.values()] == [TaskStatus.SUCCESS, TaskStatus.SUCCESS, TaskStatus.DEFAULT]
+    ran = []
+    result = fresh.continue_run(run, actions=dict.fromkeys(fresh.tasks, lambda task: ran.append(task.name)))
+    assert result.ok
+    assert ran == ["c"]
+    assert fresh.interrupted_run() is None
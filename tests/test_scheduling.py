@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool
+from scheduling import POLICIES, ReadyQueue, SchedulingPolicy, get_policy, remaining_path, simulate_makespan
+
+
+def fan_out():
+    """A root followed by a short branch, a long chain and a prioritised task."""
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = {name: tool.add_task(name, context_id) for name in ("root", "short", "long1", "long2", "long3", "urgent")}
+    for target in ("short", "long1", "urgent"):
+        tool.connect_tasks(ids["root"], ids[target])
+    tool.connect_tasks(ids["long1"], ids["long2"])
+    tool.connect_tasks(ids["long2"], ids["long3"])
+    return tool, ids
+
+
+def recorder():
+    order, lock = [], threading.Lock()
+
+    def action(task):
+        with lock:
+            order.append(task.name)
+    return order, action
+
+
+def test_remaining_path_is_the_bottom_level():
+    successors = [[1, 2], [3], [], []]
+    assert remaining_path(successors, [1.0, 2.0, 5.0, 1.0]) == [6.0, 3.0, 5.0, 1.0]
+
+
+def test_get_policy_by_name_default_and_instance():
+    assert get_policy(None) is POLICIES["critical_path"]
+    assert get_policy("fifo") is POLICIES["fifo"]
+    custom = SchedulingPolicy()
+    assert get_policy(custom) is custom
+    with pytest.raises(ValueError):
+        get_policy("shortest")
+
+
+def test_ready_queue_breaks_ties_first_come_first_served():
+    queue = ReadyQueue([1, 0, 1, 0])
+    queue.push([0, 2])
+    queue.push([3, 1])
+    assert [queue.pop() for _ in range(len(queue))] == [3, 1, 0, 2]
+
+
+def test_critical_path_starts_the_long_chain_first():
+    tool, ids = fan_out()
+    order, action = recorder()
+    tool.run(max_workers=1, actions=dict.fromkeys(ids.values(), action))
+    assert order[:2] == ["root", "long1"]
+
+
+def test_priority_policy_prefers_higher_priority():
+    tool, ids = fan_out()
+    tool.set_task_priority(ids["urgent"], 5)
+    order, action = recorder()
+    tool.run(max_workers=1, actions=dict.fromkeys(ids.values(), action), policy="priority")
+    assert order[:2] == ["root", "urgent"]
+
+
+def test_context_policy_prefers_heavier_contexts():
+    tool = BPMTool()
+    light, heavy = tool.add_context("Light"), tool.add_context("Heavy")
+    tool.set_context_weight(heavy, 3)
+    a, b = tool.add_task("a", light), tool.add_task("b", heavy)
+    order, action = recorder()
+    tool.run(max_workers=1, actions={a: action, b: action}, policy="context")
+    assert order == ["b", "a"]
+
+
+def test_plan_runner_applies_the_policy():
+    tool, ids = fan_out()
+    tool.set_task_priority(ids["urgent"], 5)
+    plan = tool.compile()
+    # Edits after compiling do not change the plan's keys
+    tool.set_task_priority(ids["short"], 10)
+    seen, lock = [], threading.Lock()
+
+    def action(spec):
+        with lock:
+            seen.append(spec.name)
+    actions = dict.fromkeys(ids.values(), action)
+    plan.run(actions, max_workers=1, policy="priority")
+    assert seen[:2] == ["root", "urgent"]
+    seen.clear()
+    plan.run(actions, max_workers=1)
+    assert seen[:2] == ["root", "long1"]
+    with pytest.raises(ValueError):
+        plan.run(policy="shortest")
+
+
+def test_plan_keys_are_cached_per_policy():
+    tool, _ = fan_out()
+    plan = tool.compile()
+    assert plan.policy_keys("fifo") is plan.policy_keys("fifo")
+    assert plan.policy_keys() == plan.policy_keys("critical_path")
+
+
+def test_simulated_makespan_follows_the_keys():
+    # Two workers; unit 2 heads the long chain 2 -> 3
+    successors, durations = [[], [], [3], []], [1.0, 1.0, 1.0, 5.0]
+    assert simulate_makespan(successors, durations, 2) == 7.0
+    assert simulate_makespan(successors, durations, 2, keys=[1, 1, 0, 0]) == 6.0
+    assert simulate_makespan([], [], 4) == 0.0
+
+
+@pytest.mark.parametrize("workers", [0, -2])
+def test_simulated_makespan_needs_a_worker(workers):
+    with pytest.raises(ValueError):
+        simulate_makespan([[]], [1.0], workers)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from enhanced_bpm_tool import BPMTool
+from simulation import Exponential, Fixed, LogNormal, Triangular, Uniform, simulate
+
+
+def diamond(durations=(1, 2, 1, 1)):
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a, b, c, d = (tool.add_task(name, context_id) for name in "abcd")
+    for source, target in ((a, b), (a, c), (b, d), (c, d)):
+        tool.connect_tasks(source, target)
+    for task_id, duration in zip((a, b, c, d), durations):
+        tool.set_task_duration(task_id, duration)
+    return tool, (a, b, c, d)
+
+
+def test_fixed_durations_give_the_critical_path_length():
+    tool, (a, b, c, d) = diamond()
+    result = tool.simulate(trials=50)
+    assert np.all(result.makespans == 4)
+    assert result.criticality == {a: 1.0, b: 1.0, c: 0.0, d: 1.0}
+    assert [task_id for task_id, _ in result.most_critical(3)] == [a, b, d]
+
+
+def test_one_worker_runs_everything_back_to_back():
+    tool, _ = diamond()
+    result = simulate(tool, trials=20, workers=1)
+    assert np.all(result.makespans == 5)
+    assert "1 workers" in result.summary()
+
+
+def test_distributions_override_task_durations():
+    tool, (a, b, c, d) = diamond()
+    result = simulate(tool, trials=2000, distributions={c: Fixed(10), b: 0.5}, seed=1)
+    assert np.all(result.makespans == 12)
+    assert result.criticality[c] == 1.0 and result.criticality[b] == 0.0
+
+
+def test_a_seed_makes_runs_reproducible_across_chunk_sizes():
+    tool, (a, b, c, d) = diamond()
+    distributions = {b: Uniform(1, 3), c: Uniform(1, 3)}
+    first = simulate(tool, trials=1000, distributions=distributions, seed=7)
+    again = simulate(tool, trials=1000, distributions=distributions, seed=7, chunk_size=1000)
+    assert np.array_equal(first.makespans, again.makespans)
+    # Whichever branch is longer is critical; they split the trials
+    assert 0.4 < first.criticality[b] < 0.6
+    assert first.criticality[b] + first.criticality[c] == pytest.approx(1.0)
+
+
+def test_percentiles_are_ordered():
+    tool, (a, b, c, d) = diamond()
+    result = simulate(tool, trials=5000, distributions={b: LogNormal(2, 0.8)}, seed=3)
+    p = result.percentiles()
+    assert p[50] <= p[90] <= p[95] <= p[99]
+    assert result.makespans.min() > 2
+
+
+@pytest.mark.parametrize("distribution, mean", [
+    (Fixed(2), 2), (Uniform(1, 3), 2), (Triangular(1, 2, 3), 2), (Exponential(2), 2), (LogNormal(2, 0.5), 2 * np.exp(0.125)),
+])
+def test_sample_means_match(distribution, mean):
+    samples = distribution.sample(np.random.default_rng(0), 200_000)
+    assert distribution.mean == pytest.approx(mean)
+    assert samples.mean() == pytest.approx(mean, rel=0.02)
+
+
+def test_degenerate_triangular_is_fixed():
+    samples = Triangular(3, 3, 3).sample(np.random.default_rng(0), 5)
+    assert samples.tolist() == [3.0] * 5
+
+
+def test_a_cycle_takes_the_sum_of_its_members():
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': successors, 'predecessors': [], 'duration': 2}
+            for name, successors in (('p', ['q']), ('q', ['p', 'y']), ('y', []))
+        },
+    })
+    result = simulate(tool, trials=10)
+    assert np.all(result.makespans == 6)
+
+
+def test_empty_workflow():
+    result = simulate(BPMTool(), trials=10)
+    assert np.all(result.makespans == 0)
+    assert result.criticality == {}
@@ -0,0 +1,58 @@
+import random
+
+from enhanced_bpm_tool import BPMTool
+from spatial_index import SpatialGrid
+
+
+def brute_force(boxes, x0, y0, x1, y1):
+    return {key for key, (bx0, by0, bx1, by1) in boxes.items()
+            if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0}
+
+
+def test_query_rect_matches_brute_force():
+    rng = random.Random(1)
+    grid = SpatialGrid(cell_size=50)
+    for key in range(300):
+        grid.insert(key, rng.uniform(-500, 500), rng.uniform(-500, 500), rng.uniform(1, 120), rng.uniform(1, 120))
+    for _ in range(50):
+        x0, y0 = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        rect = (x0, y0, x0 + rng.uniform(0, 800), y0 + rng.uniform(0, 800))
+        assert set(grid.query_rect(*rect)) == brute_force(grid.boxes, *rect)
+
+
+def test_update_and_remove():
+    grid = SpatialGrid(cell_size=100)
+    grid.insert('a', 0, 0, 10, 10)
+    grid.update('a', 5, 5, 10, 10)  # Same cell
+    grid.update('a', 450, 450, 10, 10)  # New cells
+    assert grid.query_point(7, 7) == []
+    assert grid.query_point(455, 455) == ['a']
+    assert grid.remove('a')
+    assert not grid.remove('a')
+    assert grid.cells == {} and len(grid) == 0
+
+
+def test_nearest():
+    grid = SpatialGrid(cell_size=100)
+    assert grid.nearest(0, 0) is None
+    grid.insert('near', 150, 0, 10, 10)
+    grid.insert('far', 900, 900, 10, 10)
+    assert grid.nearest(0, 0) == 'near'
+    assert grid.nearest(155, 5) == 'near'
+    assert grid.nearest(0, 0, max_distance=100) is None
+    assert grid.nearest(1000, 1000) == 'far'
+
+
+def test_tool_keeps_grids_in_sync():
+    tool = BPMTool()
+    context_id = tool.add_context("Main", 0, 0)
+    task_id = tool.add_task("a", context_id, 20, 50)
+    assert tool.query_point(30, 60) == ([context_id], [task_id])
+    tool.move_context(context_id, 1000, 1000)
+    assert tool.query_point(30, 60) == ([], [])
+    assert tool.query_point(1030, 1060) == ([context_id], [task_id])
+    assert tool.nearest_task(0, 0) == task_id
+    tool.delete_task(task_id)
+    assert tool.nearest_task(0, 0) is None
+    tool.undo()
+    assert tool.query_point(1030, 1060)[1] == [task_id]
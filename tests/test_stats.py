@@ -0,0 +1,42 @@
+import random
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def test_counters_survive_random_edits():
+    rng = random.Random(7)
+    tool = BPMTool()
+    tool.verify_stats = True
+    contexts = [tool.add_context(f"c{i}") for i in range(3)]
+    for step in range(300):
+        tasks = list(tool.tasks)
+        action = rng.random()
+        if action < 0.3 or len(tasks) < 2:
+            tool.add_task(f"t{step}", rng.choice(contexts), status=rng.choice(list(TaskStatus)))
+        elif action < 0.55:
+            a, b = sorted(rng.sample(tasks, 2))
+            tool.connect_tasks(a, b)
+        elif action < 0.7:
+            tool.set_task_status(rng.choice(tasks), rng.choice(list(TaskStatus)))
+        elif action < 0.8:
+            a, b = rng.sample(tasks, 2)
+            tool.disconnect_tasks(a, b)
+        elif action < 0.9:
+            tool.delete_tasks(rng.sample(tasks, 2))
+        else:
+            tool.undo()
+        tool.check_stats()
+    stats = tool.get_workflow_stats()
+    assert stats['total_tasks'] == len(tool.tasks)
+    assert sum(stats['status_counts'].values()) == len(tool.tasks)
+    assert sum(stats['context_task_counts'].values()) == len(tool.tasks)
+
+
+def test_context_counts_drop_with_the_context():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    tool.add_task("a", context_id, status=TaskStatus.SUCCESS)
+    assert tool.get_workflow_stats()['context_task_counts'] == {context_id: 1}
+    tool.delete_context(context_id)
+    assert tool.get_workflow_stats()['context_task_counts'] == {}
+    assert tool.status_counts[TaskStatus.SUCCESS] == 0
@@ -0,0 +1,132 @@
+from enhanced_bpm_tool import BPMTool, TaskStatus
+
+
+def chain(n=3):
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(n)]
+    for source, target in zip(ids, ids[1:]):
+        tool.connect_tasks(source, target)
+    return tool, context_id, ids
+
+
+def statuses(tool, ids):
+    return [tool.tasks[task_id].status for task_id in ids]
+
+
+def test_failure_skips_and_clearing_restores():
+    tool, _, ids = chain()
+    tool.set_task_status(ids[0], TaskStatus.FAILURE)
+    assert statuses(tool, ids) == [TaskStatus.FAILURE, TaskStatus.SKIPPED, TaskStatus.SKIPPED]
+    tool.set_task_status(ids[0], TaskStatus.DEFAULT)
+    assert statuses(tool, ids) == [TaskStatus.DEFAULT] * 3
+    tool.check_stats()
+
+
+def test_delay_is_outranked_by_skip():
+    tool, context_id, (a, b, c) = chain()
+    other = tool.add_task("other", context_id)
+    tool.connect_tasks(other, c)
+    tool.set_task_status(a, TaskStatus.DELAYED)
+    assert tool.tasks[c].status == TaskStatus.DELAYED
+    tool.set_task_status(other, TaskStatus.FAILURE)
+    assert tool.tasks[c].status == TaskStatus.SKIPPED
+    tool.set_task_status(other, TaskStatus.SUCCESS)
+    assert tool.tasks[c].status == TaskStatus.DELAYED
+
+
+def test_hand_set_status_returns_when_the_block_clears():
+    tool, _, (a, b, c) = chain()
+    tool.set_task_status(c, TaskStatus.DELAYED)
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    assert tool.tasks[c].status == TaskStatus.SKIPPED
+    assert tool.tasks[c].own_status == TaskStatus.DELAYED
+    tool.set_task_status(a, TaskStatus.DEFAULT)
+    assert tool.tasks[c].status == TaskStatus.DELAYED
+    assert tool.tasks[c].own_status is None
+
+
+def test_results_are_never_overridden():
+    tool, _, (a, b, c) = chain()
+    tool.set_task_status(b, TaskStatus.SUCCESS)
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    assert statuses(tool, [a, b, c]) == [TaskStatus.FAILURE, TaskStatus.SUCCESS, TaskStatus.DEFAULT]
+
+
+def test_connect_and_disconnect_update_the_target():
+    tool, context_id, (a, b, c) = chain()
+    failed = tool.add_task("failed", context_id, status=TaskStatus.FAILURE)
+    tool.connect_tasks(failed, a)
+    assert statuses(tool, [a, b, c]) == [TaskStatus.SKIPPED] * 3
+    tool.disconnect_tasks(failed, a)
+    assert statuses(tool, [a, b, c]) == [TaskStatus.DEFAULT] * 3
+    tool.undo()
+    assert statuses(tool, [a, b, c]) == [TaskStatus.SKIPPED] * 3
+
+
+def test_connecting_a_non_blocking_source_seeds_nothing():
+    tool, context_id, (a, b, c) = chain()
+    done = tool.add_task("done", context_id, status=TaskStatus.SUCCESS)
+    last = tool.add_task("last", context_id)
+    with tool.batch():
+        tool.connect_tasks(done, a)
+        tool.connect_tasks(c, last)
+        assert tool._status_seeds == set()
+        tool.set_task_status(a, TaskStatus.FAILURE)
+    assert statuses(tool, [b, c, last]) == [TaskStatus.SKIPPED] * 3
+    assert tool.tasks[done].status == TaskStatus.SUCCESS
+
+
+def test_deleting_the_failed_task_unblocks():
+    tool, _, (a, b, c) = chain()
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    tool.delete_task(a)
+    assert statuses(tool, [b, c]) == [TaskStatus.DEFAULT] * 2
+    tool.undo()
+    assert statuses(tool, [b, c]) == [TaskStatus.SKIPPED] * 2
+    tool.check_stats()
+
+
+def load_cyclic(edges):
+    tool = BPMTool()
+    names = sorted({name for edge in edges for name in edge})
+    tool.load_dict({
+        'contexts': {},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': None, 'successors': [t for s, t in edges if s == name], 'predecessors': []}
+            for name in names
+        },
+    })
+    return tool, {name: tool.id_allocator.lookup(name) for name in names}
+
+
+def test_fail_then_clear_upstream_of_a_cycle():
+    tool, ids = load_cyclic([('x', 'p'), ('p', 'q'), ('q', 'p'), ('q', 'y')])
+    x, cycle = ids['x'], [ids['p'], ids['q'], ids['y']]
+    tool.set_task_status(x, TaskStatus.FAILURE)
+    assert statuses(tool, cycle) == [TaskStatus.SKIPPED] * 3
+    tool.set_task_status(x, TaskStatus.DEFAULT)
+    assert statuses(tool, cycle) == [TaskStatus.DEFAULT] * 3
+    tool.undo()
+    assert statuses(tool, cycle) == [TaskStatus.SKIPPED] * 3
+    tool.undo()
+    assert statuses(tool, cycle) == [TaskStatus.DEFAULT] * 3
+    tool.check_stats()
+
+
+def test_a_delay_set_inside_a_cycle_delays_the_whole_cycle_until_cleared():
+    tool, ids = load_cyclic([('p', 'q'), ('q', 'p'), ('q', 'y')])
+    p, q, y = ids['p'], ids['q'], ids['y']
+    tool.set_task_status(p, TaskStatus.DELAYED)
+    assert statuses(tool, [p, q, y]) == [TaskStatus.DELAYED] * 3
+    tool.set_task_status(p, TaskStatus.DEFAULT)
+    assert statuses(tool, [p, q, y]) == [TaskStatus.DEFAULT] * 3
+
+
+def test_self_loop_does_not_block_itself():
+    tool, ids = load_cyclic([('x', 'p'), ('p', 'p')])
+    tool.set_task_status(ids['x'], TaskStatus.FAILURE)
+    assert tool.tasks[ids['p']].status == TaskStatus.SKIPPED
+    tool.set_task_status(ids['x'], TaskStatus.SUCCESS)
+    assert tool.tasks[ids['p']].status == TaskStatus.DEFAULT
@@ -0,0 +1,83 @@
+import pytest
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from svg_renderer import SvgRenderer
+
+
+def workflow():
+    tool = BPMTool()
+    first, second = tool.add_context("First", 50, 50), tool.add_context("Second", 450, 50)
+    ids = [tool.add_task(f"t{i}", first if i < 3 else second) for i in range(6)]
+    for source, target in zip(ids, ids[1:]):
+        tool.connect_tasks(source, target)
+    return tool, (first, second), ids
+
+
+def fresh(tool):
+    renderer = SvgRenderer(tool)
+    try:
+        return renderer.render()
+    finally:
+        renderer.close()
+
+
+EDITS = {
+    "status": lambda tool, contexts, ids: tool.set_task_status(ids[2], TaskStatus.FAILURE),
+    "move task": lambda tool, contexts, ids: tool.move_task(ids[1], 300, 300),
+    "move context": lambda tool, contexts, ids: tool.move_context(contexts[1], 600, 200),
+    "add task": lambda tool, contexts, ids: tool.add_task("new", contexts[0]),
+    "delete task": lambda tool, contexts, ids: tool.delete_task(ids[3]),
+    "delete context": lambda tool, contexts, ids: tool.delete_context(contexts[0]),
+    "connect": lambda tool, contexts, ids: tool.connect_tasks(ids[0], ids[5]),
+    "disconnect": lambda tool, contexts, ids: tool.disconnect_tasks(ids[2], ids[3]),
+    "critical path": lambda tool, contexts, ids: setattr(tool, 'highlight_critical', True),
+    "zoom out": lambda tool, contexts, ids: setattr(tool, 'zoom_level', 0.5),
+    "summary": lambda tool, contexts, ids: setattr(tool, 'zoom_level', 0.2),
+    "clear": lambda tool, contexts, ids: tool.clear(),
+}
+
+
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_incremental_render_matches_a_fresh_one(edit):
+    tool, contexts, ids = workflow()
+    tool.generate_svg()
+    EDITS[edit](tool, contexts, ids)
+    assert tool.generate_svg() == fresh(tool)
+    tool.undo()
+    assert tool.generate_svg() == fresh(tool)
+
+
+def test_a_status_change_rerenders_only_that_task():
+    tool, contexts, ids = workflow()
+    tool.generate_svg()
+    renderer = tool._renderer
+    before = renderer.rendered
+    tool.set_task_status(ids[0], TaskStatus.SUCCESS)
+    tool.generate_svg()
+    assert renderer.rendered - before == 1
+
+
+def test_moving_a_task_rerenders_it_its_edges_and_nothing_else():
+    tool, contexts, ids = workflow()
+    tool.generate_svg()
+    renderer = tool._renderer
+    before = renderer.rendered
+    tool.move_task(ids[2], 200, 200)
+    tool.generate_svg()
+    assert renderer.rendered - before == 3
+
+
+def test_a_batch_open_on_this_thread_is_picked_up():
+    tool, contexts, ids = workflow()
+    tool.generate_svg()
+    with tool.batch():
+        tool.set_task_status(ids[0], TaskStatus.FAILURE)
+        svg = tool.generate_svg()
+    assert "Failure" in svg
+
+
+def test_close_stops_listening():
+    tool, _, ids = workflow()
+    renderer = SvgRenderer(tool)
+    renderer.close()
+    assert renderer.subscription not in tool.events.subscriptions
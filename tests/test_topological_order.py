@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from topological_order import CycleError, DynamicTopologicalOrder
+
+
+def assert_valid(tool):
+    position = tool.topo_order.position
+    for source, targets in tool.successor_index.items():
+        for target in targets:
+            assert position[source] < position[target]
+
+
+def test_random_inserts_keep_a_valid_order():
+    rng = random.Random(3)
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    ids = [tool.add_task(f"t{i}", context_id) for i in range(60)]
+    rank = {task_id: rng.random() for task_id in ids}
+    for _ in range(300):
+        a, b = sorted(rng.sample(ids, 2), key=rank.__getitem__)
+        tool.connect_tasks(a, b)
+        assert_valid(tool)
+    assert tool.topological_order() == tool.topo_order.order()
+
+
+def test_cycle_is_rejected_with_its_path():
+    tool = BPMTool()
+    context_id = tool.add_context("Main")
+    a, b, c = (tool.add_task(name, context_id) for name in "abc")
+    tool.connect_tasks(a, b)
+    tool.connect_tasks(b, c)
+    with pytest.raises(CycleError) as error:
+        tool.connect_tasks(c, a)
+    assert error.value.path == [c, a, b, c]
+    with pytest.raises(CycleError):
+        tool.connect_tasks(a, a)
+    assert c not in tool.predecessor_index[a]
+
+
+def test_rebuild_orders_cycles_contiguously():
+    successors = {'a': {'b'}, 'b': {'c'}, 'c': {'b', 'd'}, 'd': set()}
+    predecessors = {'a': set(), 'b': {'a', 'c'}, 'c': {'b'}, 'd': {'c'}}
+    order = DynamicTopologicalOrder(successors, predecessors)
+    order.rebuild(successors)
+    assert not order.acyclic
+    assert order.order() == ['a', 'b', 'c', 'd'] or order.order() == ['a', 'c', 'b', 'd']
+
+
+def cyclic_tool():
+    # p <-> q is a cycle; the rebuilt order puts d before b before a
+    tool = BPMTool()
+    tool.load_dict({
+        'contexts': {'c': {'id': 'c', 'name': "Main", 'x': 0, 'y': 0, 'width': 350, 'height': 250,
+                           'color': "#fff", 'tasks': ['a', 'b', 'd', 'p', 'q']}},
+        'tasks': {
+            name: {'id': name, 'name': name, 'x': 0, 'y': 0, 'status': 'default', 'color': "#fff",
+                   'context_id': 'c', 'successors': successors, 'predecessors': []}
+            for name, successors in (('a', []), ('b', []), ('d', []), ('p', ['q']), ('q', ['p']))
+        },
+    })
+    return tool, {task.name: task.id for task in tool.tasks.values()}
+
+
+def test_edges_added_after_a_cyclic_load_reorder_before_propagation():
+    tool, ids = cyclic_tool()
+    assert not tool.topo_order.acyclic
+    a, b, d = ids['a'], ids['b'], ids['d']
+    tool.connect_tasks(a, b)
+    tool.connect_tasks(a, d)
+    tool.connect_tasks(b, d)
+    with pytest.raises(CycleError):
+        tool.connect_tasks(d, a)
+
+    tool.set_task_status(a, TaskStatus.FAILURE)
+    assert tool.tasks[d].status == TaskStatus.SKIPPED
+    tool.set_task_status(a, TaskStatus.DEFAULT)
+    assert tool.tasks[b].status == TaskStatus.DEFAULT
+    assert tool.tasks[d].status == TaskStatus.DEFAULT
+    order = tool.topo_order.order()
+    assert order.index(a) < order.index(b) < order.index(d)
+
+
+def test_breaking_the_last_cycle_restores_acyclic_mode():
+    tool, ids = cyclic_tool()
+    tool.disconnect_tasks(ids['q'], ids['p'])
+    tool.connect_tasks(ids['a'], ids['b'])
+    assert tool.topo_order.acyclic
+    assert tool.find_cycles() == []
+    assert_valid(tool)
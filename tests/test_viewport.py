@@ -0,0 +1,91 @@
+from enhanced_bpm_tool import BPMTool, TaskStatus
+from svg_renderer import FULL, OUTLINE, SUMMARY, SvgRenderer, visible_elements
+
+
+class NoScan(dict):
+    """A model dict that fails if a render walks all of it."""
+
+    def values(self):
+        raise AssertionError("render scanned every element")
+
+
+def canvas(columns=6, rows=6):
+    tool = BPMTool()
+    ids = {}
+    for i in range(columns * rows):
+        context_id = tool.add_context(f"c{i}", 50 + 400 * (i % columns), 50 + 250 * (i // columns))
+        ids[i] = (context_id, tool.add_task(f"t{i}", context_id, 70 + 400 * (i % columns), 110 + 250 * (i // columns)))
+    for i in range(columns * rows - 1):
+        tool.connect_tasks(ids[i][1], ids[i + 1][1])
+    return tool, ids
+
+
+def test_only_elements_in_view_are_drawn():
+    tool, ids = canvas()
+    tool.set_viewport(0, 0)
+    contexts, edges, tasks = visible_elements(tool, tool.visible_rect())
+    assert 0 < len(tasks) < len(tool.tasks)
+    assert ids[0][1] in [task.id for task in tasks]
+    assert ids[35][1] not in [task.id for task in tasks]
+    # Edges with one end in view are drawn too
+    assert any(successor.id not in {task.id for task in tasks} for _, successor in edges)
+
+
+def test_hits_are_drawn_in_insertion_order_without_scanning():
+    tool, ids = canvas()
+    first, second = ids[0][1], ids[1][1]
+    tool.move_task(second, 80, 120)  # On top of the first task
+    tool.delete_task(first)
+    tool.undo()  # Restored tasks are drawn last, as when they were appended
+    tool.generate_svg()
+    tasks, contexts = tool.tasks, tool.contexts
+    tool.tasks, tool.contexts = NoScan(tasks), NoScan(contexts)
+    try:
+        _, _, shown = visible_elements(tool, tool.visible_rect())
+        svg = tool.generate_svg()
+    finally:
+        tool.tasks, tool.contexts = tasks, contexts
+    order = [task.id for task in tasks.values()]
+    assert [task.id for task in shown] == [task_id for task_id in order if task_id in {t.id for t in shown}]
+    assert [task.id for task in shown].index(second) < [task.id for task in shown].index(first)
+    assert svg == SvgRenderer(tool).render()
+
+
+def test_detail_follows_zoom():
+    tool = BPMTool()
+    for zoom, detail in ((1.0, FULL), (0.5, OUTLINE), (0.2, SUMMARY)):
+        tool.zoom_level = zoom
+        assert tool.detail_level() == detail
+
+
+def test_summary_render_is_cached_until_a_change():
+    tool, ids = canvas()
+    tool.zoom_level = 0.2
+    first = tool.generate_svg()
+    renderer = tool._renderer
+    rendered = renderer.rendered
+    assert tool.generate_svg() == first
+    assert renderer.rendered == rendered
+    tool.set_task_status(ids[3][1], TaskStatus.FAILURE)
+    changed = tool.generate_svg()
+    assert changed != first
+    assert renderer.rendered > rendered
+    assert changed == SvgRenderer(tool).render()
+    # A different zoom is a different summary
+    tool.zoom_level = 0.25
+    assert tool.generate_svg() == SvgRenderer(tool).render()
+
+
+def test_focus_context_frames_the_context():
+    tool, ids = canvas()
+    context_id = ids[14][0]
+    assert tool.focus_context(context_id)
+    context = tool.contexts[context_id]
+    x0, y0, x1, y1 = tool.visible_rect()
+    assert x0 < context.x and y0 < context.y
+    assert x1 >= context.x + context.width and y1 >= context.y + context.height
+    contexts, _, _ = visible_elements(tool, tool.visible_rect())
+    assert context_id in [c.id for c in contexts]
+    assert not tool.focus_context(-1)
+    tool.set_viewport(None)
+    assert tool.visible_rect() == (0, 0, tool.canvas_width, tool.canvas_height)
@@ -0,0 +1,188 @@
+from collections import deque
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from scc import condense
+
+
+class CycleError(ValueError):
+    """Raised when an edge would close a cycle; ``path`` lists the cycle's nodes."""
+
+    def __init__(self, message: str, path: List[Hashable]):
+        super().__init__(message)
+        self.path = path
+
+
+class DynamicTopologicalOrder:
+    """Online topological order with cycle detection (Pearce-Kelly).
+
+    Every node has an integer position such that each edge points from a
+    lower to a higher position. Inserting an edge that already agrees with
+    the order is O(1); otherwise only the nodes whose positions lie between
+    the two endpoints and are reachable from them are searched and
+    re-numbered.
+
+    The order reads ``successors``/``predecessors`` (node -> set of nodes)
+    in place, so callers must keep those dicts up to date and call
+    ``add_edge`` *before* inserting an edge.
+    """
+
+    def __init__(self, successors: Dict[Hashable, Set[Hashable]],
+                 predecessors: Dict[Hashable, Set[Hashable]],
+                 label: Optional[Callable[[Hashable], str]] = None):
+        self.successors = successors
+        self.predecessors = predecessors
+        self.label = label or str
+        self.position: Dict[Hashable, int] = {}
+        self._next = 0
+        # False when built from a graph that already has cycles (e.g. a loaded file)
+        self.acyclic = True
+        # While cyclic: a removal may have broken a cycle, or positions no longer follow the edges
+        self._recheck = False
+        self._stale = False
+        # While cyclic: the members of each node's cycle (nodes not listed are on none)
+        self.cycle_of: Dict[Hashable, List[Hashable]] = {}
+
+    def add_node(self, node: Hashable):
+        self.position[node] = self._next
+        self._next += 1
+
+    def remove_node(self, node: Hashable):
+        self.position.pop(node, None)
+        if not self.acyclic:
+            # A split cycle's former members may now be out of order
+            self._recheck = self._stale = True
+
+    def remove_edge(self, source: Hashable, target: Hashable):
+        if not self.acyclic:
+            self._recheck = self._stale = True
+
+    def clear(self):
+        self.position.clear()
+        self._next = 0
+        self.acyclic = True
+        self._recheck = False
+        self._stale = False
+        self.cycle_of = {}
+
+    def rebuild(self, nodes: Iterable[Hashable]):
+        """Recompute the order from scratch (Kahn).
+
+        If the graph has cycles, nodes are ordered by its condensation instead:
+        each cycle's nodes are contiguous and every other edge points forward.
+        """
+        nodes = list(nodes)
+        indegree = {node: len(self.predecessors[node]) for node in nodes}
+        queue = deque(node for node in nodes if indegree[node] == 0)
+        self.position = {}
+        while queue:
+            node = queue.popleft()
+            self.position[node] = len(self.position)
+            for successor in self.successors[node]:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    queue.append(successor)
+        self.acyclic = len(self.position) == len(nodes)
+        self.cycle_of = {}
+        if not self.acyclic:
+            condensation = condense(nodes, self.successors)
+            self.position = {}
+            for members, cyclic in zip(condensation.components, condensation.cyclic):
+                for node in members:
+                    self.position[node] = len(self.position)
+                    if cyclic:
+                        self.cycle_of[node] = members
+        self._next = len(self.position)
+        self._recheck = False
+        self._stale = False
+
+    def refresh(self):
+        """Rebuild the order if edits to a cyclic graph left the positions stale.
+
+        Call before reading ``position`` directly; ``order`` does so itself.
+        """
+        if self._stale:
+            self.rebuild(list(self.position))
+
+    def order(self) -> List[Hashable]:
+        """Nodes sorted by position (a valid topological order when ``acyclic``)."""
+        self.refresh()
+        return sorted(self.position, key=self.position.__getitem__)
+
+    def _cycle_error(self, path: List[Hashable]):
+        names = " → ".join(self.label(node) for node in path)
+        return CycleError(f"Connection would create a cycle: {names}", path)
+
+    def add_edge(self, source: Hashable, target: Hashable):
+        """Update the order for a new edge source → target, or raise CycleError."""
+        if source == target:
+            raise self._cycle_error([source, source])
+        if not self.acyclic:
+            if self._recheck:
+                self.rebuild(list(self.position))
+            if not self.acyclic:
+                path = self._find_path(target, source)
+                if path is not None:
+                    raise self._cycle_error([source] + path)
+                # The edge closes no cycle; reorder lazily, on the next refresh
+                if self.position[target] < self.position[source]:
+                    self._stale = True
+                return
+        position = self.position
+        lower, upper = position[target], position[source]
+        if lower > upper:
+            return
+
+        # Forward search from target among nodes ordered before source
+        parent = {target: None}
+        forward = [target]
+        stack = [target]
+        while stack:
+            node = stack.pop()
+            for successor in self.successors[node]:
+                if successor == source:
+                    path = [source]
+                    while node is not None:
+                        path.append(node)
+                        node = parent[node]
+                    raise self._cycle_error([source] + path[:0:-1] + [source])
+                if successor not in parent and position[successor] < upper:
+                    parent[successor] = node
+                    forward.append(successor)
+                    stack.append(successor)
+
+        # Backward search from source among nodes ordered after target
+        seen = {source}
+        backward = [source]
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            for predecessor in self.predecessors[node]:
+                if predecessor not in seen and position[predecessor] > lower:
+                    seen.add(predecessor)
+                    backward.append(predecessor)
+                    stack.append(predecessor)
+
+        # Reuse the affected positions: ancestors of source first, then descendants of target
+        backward.sort(key=position.__getitem__)
+        forward.sort(key=position.__getitem__)
+        nodes = backward + forward
+        slots = sorted(position[node] for node in nodes)
+        for node, slot in zip(nodes, slots):
+            position[node] = slot
+
+    def _find_path(self, start: Hashable, goal: Hashable) -> Optional[List[Hashable]]:
+        parent = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return path[::-1]
+            for successor in self.successors[node]:
+                if successor not in parent:
+                    parent[successor] = node
+                    stack.append(successor)
+        return None